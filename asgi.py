@@ -0,0 +1,268 @@
+"""ASGI entry point, served alongside the WSGI app.
+
+    uvicorn asgi:application --host 0.0.0.0 --port $PORT
+    gunicorn asgi:application -k uvicorn.workers.UvicornWorker
+
+Requests are answered by the same Flask app as ``app_production:app``, so
+routes and responses are identical. What changes is where the waiting
+happens: request bodies are read on the event loop, so slow clients do not
+hold a thread, and with the default MAIL_BACKEND=queue outbound mail is
+delivered by coroutines over `async_smtp` instead of by the threaded mail
+workers. Only the short Flask
+handler itself runs on a small thread pool, and so does producing each chunk
+of a response: exports and downloads are sent as they are read, never held
+in memory whole.
+"""
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from creative_brief import Config, create_app
+from creative_brief.config import load_env_file
+from creative_brief.async_smtp import create_async_smtp_pool
+from creative_brief.circuit_breaker import CircuitOpenError
+from creative_brief.delivery import build_message, guarded
+from creative_brief.log_pipeline import configure_logging
+from creative_brief.mail_queue import AsyncMailQueue
+from creative_brief.metrics import MAIL_SEND_FAILURES, SMTP_CIRCUIT_REJECTIONS
+from creative_brief.profiling import stage
+from creative_brief.services import EXTENSION
+
+logger = logging.getLogger(__name__)
+
+BODY_SPOOL_SIZE = 1024 * 1024
+
+# Returned by `next` on the executor once a response body is exhausted
+_END = object()
+
+
+class ASGIApp:
+    """Runs a `create_app` app under ASGI with mail delivery on the event loop"""
+
+    def __init__(self, wsgi_app, threads=16, mail_concurrency=10):
+        self.wsgi_app = wsgi_app
+        self.service = wsgi_app.extensions[EXTENSION]
+        self.config = self.service.config
+        self.mail_concurrency = mail_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi')
+        self.smtp_pool = None
+        self._threaded_queue = None
+        self._started = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.startup()
+            await self._http(scope, receive, send)
+
+    async def startup(self):
+        """Swap the threaded SMTP mail queue for one running on this event loop"""
+        if self._started is None:
+            self._started = asyncio.get_running_loop().create_future()
+            if self.service.mail_backend != 'queue':
+                # Only the default backend sends over SMTP in the background. With the spool
+                # the delivery daemon sends; log, smtp and a `delivery` given to create_app stay
+                self._started.set_result(False)
+                return
+            config = self.config
+            self.smtp_pool = create_async_smtp_pool(
+                config.smtp_server, config.smtp_port, config.smtp_username, config.smtp_password)
+            self._threaded_queue = self.service.mail_queue
+            self.service.mail_queue = AsyncMailQueue(
+                self.send_email, asyncio.get_running_loop(), concurrency=self.mail_concurrency)
+            self._started.set_result(True)
+        await self._started
+
+    async def shutdown(self):
+        if self._started is None:
+            return
+        if self.service.admin_digest is not None:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.service.admin_digest.flush)
+        if self.smtp_pool is not None:
+            await self.service.mail_queue.drain()
+            await self.smtp_pool.close()
+            self.smtp_pool = None
+            # Anything sent after the loop is gone (atexit digest flush) goes through the threads again
+            self.service.mail_queue = self._threaded_queue
+        self._started = None
+
+    async def send_email(self, to_email, subject, html_body, is_client_email=False, attachments=()):
+        """Coroutine counterpart of `creative_brief.delivery.SMTPSender.send`"""
+        if not self.config.smtp_configured:
+            logger.warning("SMTP credentials not configured. Email not sent.")
+            return False
+
+        try:
+            msg = build_message(self.config.from_email, to_email, subject, html_body, attachments)
+            with guarded(self.service.smtp_breaker), \
+                    stage('send_client' if is_client_email else 'send_admin'):
+                await self.smtp_pool.send_message(msg)
+            logger.info(f"Email sent successfully to {to_email}", extra={'sample': True})
+            return True
+        except CircuitOpenError:
+            SMTP_CIRCUIT_REJECTIONS.inc()
+            logger.warning(f"SMTP circuit open, email to {to_email} not attempted")
+            # Not a failed attempt: the queue passes it on so the message keeps its retry budget
+            raise
+        except Exception:
+            MAIL_SEND_FAILURES.inc('client' if is_client_email else 'admin')
+            raise
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await self.startup()
+                except Exception as e:
+                    await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                try:
+                    await self.shutdown()
+                except Exception as e:
+                    logger.error(f"ASGI shutdown failed: {str(e)}")
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        # Bodies over MAX_CONTENT_LENGTH are not buffered; Flask sees the
+        # oversized length and answers 413 exactly as under WSGI
+        limit = self.wsgi_app.config['MAX_CONTENT_LENGTH']
+        declared = _content_length(scope)
+        # Uploads past BODY_SPOOL_SIZE go to a temporary file instead of memory
+        body = tempfile.SpooledTemporaryFile(max_size=BODY_SPOOL_SIZE)
+        size = 0
+        if limit is not None and declared is not None and declared > limit:
+            too_large = declared
+        else:
+            too_large = None
+            while True:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    body.close()
+                    return
+                chunk = message.get('body', b'')
+                size += len(chunk)
+                if limit is not None and size > limit:
+                    too_large = size
+                    body.truncate(0)
+                    break
+                body.write(chunk)
+                if not message.get('more_body'):
+                    break
+        body.seek(0)
+
+        environ = _build_environ(scope, body, content_length=too_large if too_large is not None else size)
+        loop = asyncio.get_running_loop()
+        try:
+            status, headers, result, chunks, chunk = await loop.run_in_executor(self.executor, self._call_wsgi, environ)
+        except BaseException:
+            body.close()
+            raise
+
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': status,
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+            })
+            # Each chunk is produced on the executor (it may read a file or the database)
+            # and sent before the next one is asked for
+            while chunk is not _END:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(self.executor, next, chunks, _END)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            try:
+                if hasattr(result, 'close'):
+                    await loop.run_in_executor(self.executor, result.close)
+            finally:
+                body.close()
+
+    def _call_wsgi(self, environ):
+        """Call the WSGI app; returns ``(status, headers, result, iterator over it, first chunk or _END)``"""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = headers
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            # An app may call start_response as late as its first chunk (PEP 3333)
+            chunks = iter(result)
+            chunk = next(chunks, _END)
+        except BaseException:
+            if hasattr(result, 'close'):
+                result.close()
+            raise
+        return response['status'], response['headers'], result, chunks, chunk
+
+
+def _content_length(scope):
+    """Declared Content-Length of an ASGI HTTP scope, or None"""
+    for name, value in scope.get('headers', []):
+        if name.lower() == b'content-length':
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+def _build_environ(scope, body, content_length):
+    """WSGI environ for an ASGI HTTP scope whose body has been read into the file `body`.
+
+    `content_length` is the body's length, or the declared length of a body
+    that was too large to read.
+    """
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if content_length:
+        environ['CONTENT_LENGTH'] = str(content_length)
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+load_env_file()
+configure_logging()
+
+application = ASGIApp(
+    create_app(Config.from_env()),
+    threads=int(os.getenv('ASGI_THREADS', 16)),
+    mail_concurrency=int(os.getenv('ASGI_MAIL_CONCURRENCY', 10)),
+)
@@ -0,0 +1,129 @@
+"""Latency check for the admin submissions API.
+
+Fills a scratch database with generated briefs spread over the past year,
+then times the /admin/submissions queries an admin actually runs (plain
+listing, filters, date ranges, full-text search and deep keyset pages)
+through the Flask test client. Exits 1 if any query's p99 is over budget.
+
+    python benchmarks/bench_admin_api.py                   # 100k briefs, 100 ms budget
+    python benchmarks/bench_admin_api.py --rows 20000 --repeat 50
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_submit import BUDGETS, METHODS, PROJECT_TYPES, make_payload, percentile  # noqa: E402
+
+TOKEN = 'bench-admin-token'
+YEAR = 365 * 24 * 3600
+
+
+def populate(store, rows, seed=1234, batch=5000):
+    """Insert `rows` briefs with submission times spread over the last year"""
+    rng = random.Random(seed)
+    now = time.time()
+    conn = store._conn()
+    for start in range(0, rows, batch):
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO submissions (created_at, remote_addr, data, admin_sent_at, client_sent_at)"
+            " VALUES (?, '127.0.0.1', ?, ?, ?)",
+            [(now - YEAR * (1 - i / rows), json.dumps(make_payload(rng, i), ensure_ascii=False), now, now)
+             for i in range(start, min(rows, start + batch))],
+        )
+        conn.execute("COMMIT")
+
+
+def queries(rows):
+    """(name, url) pairs of the timed requests, with filter values drawn from the generated ones"""
+    rng = random.Random(99)
+    half_year_ago = time.strftime('%Y-%m-%d', time.localtime(time.time() - YEAR / 2))
+    last_month = time.strftime('%Y-%m-%d', time.localtime(time.time() - YEAR / 12))
+    deep_cursor = max(1, rows // 2)
+    return [
+        ('list', '/admin/submissions'),
+        ('list, 200 per page', '/admin/submissions?limit=200'),
+        ('deep page', f"/admin/submissions?cursor={deep_cursor}"),
+        ('projectType', f"/admin/submissions?projectType={rng.choice(PROJECT_TYPES)}"),
+        ('projectType deep page', f"/admin/submissions?projectType={rng.choice(PROJECT_TYPES)}&cursor={deep_cursor}"),
+        ('budget + method', f"/admin/submissions?budget={rng.choice(BUDGETS)}&communicationMethod={rng.choice(METHODS)}"),
+        ('all filters + date range', f"/admin/submissions?projectType={rng.choice(PROJECT_TYPES)}"
+                                     f"&budget={rng.choice(BUDGETS)}&communicationMethod={rng.choice(METHODS)}"
+                                     f"&from={half_year_ago}"),
+        ('last month', f"/admin/submissions?from={last_month}"),
+        ('text, common word', '/admin/submissions?q=brand'),
+        ('text, two words', '/admin/submissions?q=brand%20motion'),
+        ('text, rare', f"/admin/submissions?q=Client%20{rows - 7}"),
+        ('text, no match', '/admin/submissions?q=zebra'),
+        ('text + filter', f"/admin/submissions?q=video&projectType={rng.choice(PROJECT_TYPES)}"),
+        ('detail', f"/admin/submissions/{deep_cursor}"),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=100, help='requests per query')
+    parser.add_argument('--budget-ms', type=float, default=100.0, help='p99 limit per query')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-admin-')
+    try:
+        os.environ.update({
+            'SMTP_SERVER': '127.0.0.1',
+            'SMTP_PORT': '1',
+            'SUBMISSIONS_DB': os.path.join(workdir, 'submissions.db'),
+            'MAIL_RETRY_DB': os.path.join(workdir, 'mail_retry.db'),
+            'METRICS_DIR': '',
+            'UPLOAD_DIR': os.path.join(workdir, 'uploads'),
+        })
+        import logging
+        logging.disable(logging.WARNING)
+        from creative_brief import Config, create_app
+
+        app = create_app(Config.from_env(mail_backend='log', admin_token=TOKEN))
+        store = app.extensions['creative_brief'].submission_store
+        started = time.perf_counter()
+        populate(store, args.rows)
+        print(f"Inserted {args.rows} briefs in {time.perf_counter() - started:.1f}s"
+              f" (full-text index: {'FTS5' if store.full_text else 'LIKE fallback'})")
+
+        client = app.test_client()
+        headers = {'Authorization': f"Bearer {TOKEN}"}
+        over_budget = []
+        print(f"{'query':<28}{'rows':>6}{'p50 ms':>10}{'p99 ms':>10}")
+        for name, url in queries(args.rows):
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                response = client.get(url, headers=headers)
+                samples.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    sys.exit(f"{name}: HTTP {response.status_code} {response.get_data(as_text=True)}")
+            body = response.get_json()
+            found = len(body['submissions']) if 'submissions' in body else 1
+            p99 = percentile(samples, 0.99)
+            print(f"{name:<28}{found:>6}{percentile(samples, 0.50):>10.2f}{p99:>10.2f}")
+            if p99 > args.budget_ms:
+                over_budget.append(name)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if over_budget:
+        print(f"Over the {args.budget_ms:.0f} ms p99 budget: {', '.join(over_budget)}")
+        sys.exit(1)
+    print(f"All queries within the {args.budget_ms:.0f} ms p99 budget")
+
+
+if __name__ == '__main__':
+    main()
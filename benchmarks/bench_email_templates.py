@@ -0,0 +1,282 @@
+"""Micro-benchmark: precompiled email templates vs. the old f-string builders.
+
+Run from the repository root:
+
+    python benchmarks/bench_email_templates.py [--number N]
+
+The legacy renderers below are frozen copies of the functions that
+`app_production.py` used before `email_templates` was introduced. Both
+implementations are checked for byte-identical output before timing.
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from creative_brief import email_templates  # noqa: E402
+
+WEBSITE_URL = 'https://chroniclecraft.tech'
+TO_EMAIL = 'irfan@chroniclecraft.tech'
+
+SAMPLE_FORM = {
+    'fullName': 'Jordan Rivera',
+    'companyName': 'Northwind Studio',
+    'jobTitle': 'Marketing Lead',
+    'email': 'jordan@example.com',
+    'phone': '+1 555 0100',
+    'website': 'https://northwind.example',
+    'projectTitle': 'Spring Launch Campaign',
+    'projectType': 'Campaign',
+    'projectDescription': 'A multi-channel launch for our new product line.\n' * 20,
+    'keyObjectives': 'Awareness\nSign-ups\nRetention',
+    'targetAudience': 'Small business owners aged 25-45',
+    'preferredStyle': 'Modern, Bold',
+    'designElements': 'Brand palette, product photography',
+    'avoidElements': 'Stock imagery',
+    'inspirations': 'https://example.com/moodboard\n' * 5,
+    'mainMessage': 'Run your shop from anywhere.',
+    'contentProvided': 'Copy deck and logo files',
+    'deliverables': 'Landing page, 12 social posts, 30s video',
+    'fileFormats': 'PNG, MP4, PDF',
+    'startDate': '2026-11-01',
+    'deadline': '2026-12-15',
+    'budget': '$10,000 - $25,000',
+    'primaryContact': 'Jordan Rivera',
+    'communicationMethod': 'Email',
+    'secondaryContact': 'Sam Lee',
+    'additionalNotes': 'Please include a Spanish variant.\n' * 10,
+}
+
+
+def legacy_admin_email_body(form_data, submitted_at, remote_addr):
+    """Admin notification as built before email_templates existed"""
+    email_body = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset='UTF-8'>
+        <style>
+            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }}
+            .header {{ background: linear-gradient(135deg, #2c3e50 0%, #34495e 100%); color: white; padding: 30px; text-align: center; }}
+            .header h1 {{ margin: 0; font-size: 28px; }}
+            .header p {{ margin: 10px 0 0 0; opacity: 0.9; }}
+            .content {{ padding: 30px; max-width: 800px; margin: 0 auto; }}
+            .section {{ margin-bottom: 30px; }}
+            .section h3 {{ color: #2c3e50; border-bottom: 2px solid #667eea; padding-bottom: 8px; margin-bottom: 15px; }}
+            .field {{ margin-bottom: 15px; }}
+            .field-label {{ font-weight: bold; color: #555; margin-bottom: 5px; }}
+            .field-value {{ 
+                padding: 12px; 
+                background: #f8f9fa; 
+                border-left: 4px solid #667eea; 
+                border-radius: 0 4px 4px 0;
+                word-wrap: break-word;
+            }}
+            .footer {{ 
+                background: #f1f1f1; 
+                padding: 20px; 
+                text-align: center; 
+                font-size: 14px; 
+                color: #666; 
+                margin-top: 30px;
+            }}
+            .priority {{ background: #fff3cd; border-left-color: #ffc107; }}
+            .highlight {{ background: #e8f4fd; border-left-color: #2196f3; }}
+        </style>
+    </head>
+    <body>
+        <div class='header'>
+            <h1>New Creative Brief Submission</h1>
+            <p>ChronicleChraft Creative Solutions</p>
+        </div>
+        
+        <div class='content'>
+    """
+    
+    # Field mappings with sections
+    sections = [
+        ("Client Information", {
+            'fullName': 'Full Name',
+            'companyName': 'Company/Organization Name',
+            'jobTitle': 'Job Title/Role',
+            'email': 'Email Address',
+            'phone': 'Phone Number',
+            'website': 'Website / Social Media Handles'
+        }),
+        ("Project Overview", {
+            'projectTitle': 'Project Title',
+            'projectType': 'Type of Project',
+            'projectDescription': 'Project Description',
+            'keyObjectives': 'Key Objectives',
+            'targetAudience': 'Target Audience'
+        }),
+        ("Creative Direction", {
+            'preferredStyle': 'Preferred Style/Tone',
+            'designElements': 'Design Elements to Use',
+            'avoidElements': 'Design Elements to Avoid',
+            'inspirations': 'Inspirations/References'
+        }),
+        ("Content & Deliverables", {
+            'mainMessage': 'Main Message',
+            'contentProvided': 'Content Provided by Client',
+            'deliverables': 'Final Deliverables Expected',
+            'fileFormats': 'File Formats Required'
+        }),
+        ("Timeline & Budget", {
+            'startDate': 'Ideal Start Date',
+            'deadline': 'Ideal Completion Date',
+            'budget': 'Budget Range'
+        }),
+        ("Contact & Communication", {
+            'primaryContact': 'Primary Contact Person',
+            'communicationMethod': 'Preferred Communication Method',
+            'secondaryContact': 'Secondary Contact'
+        })
+    ]
+    
+    # Add each section
+    for section_name, fields in sections:
+        email_body += f"""
+            <div class='section'>
+                <h3>{section_name}</h3>
+        """
+        
+        for field_key, field_label in fields.items():
+            if form_data.get(field_key):
+                value = form_data[field_key].replace('\n', '<br>')
+                css_class = 'highlight' if field_key in ['projectTitle', 'email', 'deliverables'] else ''
+                email_body += f"""
+                    <div class='field'>
+                        <div class='field-label'>{field_label}:</div>
+                        <div class='field-value {css_class}'>{value}</div>
+                    </div>
+                """
+        
+        email_body += "</div>"
+    
+    # Add additional notes if present
+    if form_data.get('additionalNotes'):
+        notes = form_data['additionalNotes'].replace('\n', '<br>')
+        email_body += f"""
+            <div class='section'>
+                <h3>Additional Notes</h3>
+                <div class='field'>
+                    <div class='field-value priority'>{notes}</div>
+                </div>
+            </div>
+        """
+    
+    # Close email body
+    email_body += f"""
+        </div>
+        
+        <div class='footer'>
+            <p><strong>Submission Details:</strong></p>
+            <p>Submitted on {submitted_at.strftime('%B %d, %Y at %I:%M %p')}</p>
+            <p>From IP: {remote_addr}</p>
+            <p>ChronicleChraft Creative Solutions | {WEBSITE_URL}</p>
+        </div>
+    </body>
+    </html>
+    """
+    
+    return email_body
+
+def legacy_client_confirmation_email(form_data, sent_on):
+    """Client confirmation as built before email_templates existed"""
+    return f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset='UTF-8'>
+        <style>
+            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }}
+            .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; }}
+            .content {{ padding: 30px; max-width: 600px; margin: 0 auto; }}
+            .highlight {{ background: #f0f8ff; padding: 15px; border-radius: 8px; border-left: 4px solid #667eea; }}
+            .footer {{ background: #f8f9fa; padding: 20px; text-align: center; color: #666; }}
+            .button {{ 
+                display: inline-block; 
+                padding: 12px 24px; 
+                background: #667eea; 
+                color: white; 
+                text-decoration: none; 
+                border-radius: 6px; 
+                margin: 20px 0;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class='header'>
+            <h1>Thank You!</h1>
+            <p>Your Creative Brief Has Been Received</p>
+        </div>
+        
+        <div class='content'>
+            <p>Dear {form_data.get('fullName', 'Valued Client')},</p>
+            
+            <p>Thank you for submitting your creative brief for <strong>"{form_data.get('projectTitle', 'your project')}"</strong>.</p>
+            
+            <div class='highlight'>
+                <h3>What happens next?</h3>
+                <ul>
+                    <li>Our team will review your detailed requirements within 24-48 hours</li>
+                    <li>We'll prepare a customized proposal based on your specifications</li>
+                    <li>You'll receive a follow-up email with project timeline and next steps</li>
+                </ul>
+            </div>
+            
+            <p>We're excited to work with you on this project and bring your vision to life!</p>
+            
+            <p>If you have any urgent questions or need to add additional information, please don't hesitate to contact us:</p>
+            
+            <ul>
+                <li><strong>Email:</strong> {TO_EMAIL}</li>
+                <li><strong>Website:</strong> <a href="{WEBSITE_URL}">{WEBSITE_URL}</a></li>
+            </ul>
+            
+            <a href="{WEBSITE_URL}" class="button">Visit Our Website</a>
+            
+            <p>Best regards,<br>
+            <strong>The ChronicleChraft Team</strong><br>
+            Creative Solutions</p>
+        </div>
+        
+        <div class='footer'>
+            <p>This email was sent in response to your creative brief submission on {sent_on.strftime('%B %d, %Y')}</p>
+            <p>ChronicleChraft Creative Solutions | {WEBSITE_URL}</p>
+        </div>
+    </body>
+    </html>
+    """
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=5000, help='renders per timing run')
+    args = parser.parse_args()
+
+    now = datetime(2026, 10, 18, 14, 30)
+    remote_addr = '203.0.113.7'
+
+    new_admin = email_templates.render_admin_email(SAMPLE_FORM, now, remote_addr, WEBSITE_URL)
+    new_client = email_templates.render_client_email(SAMPLE_FORM, now, TO_EMAIL, WEBSITE_URL)
+    assert new_admin == legacy_admin_email_body(SAMPLE_FORM, now, remote_addr), 'admin output differs'
+    assert new_client == legacy_client_confirmation_email(SAMPLE_FORM, now), 'client output differs'
+
+    cases = [
+        ('admin  legacy', lambda: legacy_admin_email_body(SAMPLE_FORM, now, remote_addr)),
+        ('admin  compiled', lambda: email_templates.render_admin_email(SAMPLE_FORM, now, remote_addr, WEBSITE_URL)),
+        ('client legacy', lambda: legacy_client_confirmation_email(SAMPLE_FORM, now)),
+        ('client compiled', lambda: email_templates.render_client_email(SAMPLE_FORM, now, TO_EMAIL, WEBSITE_URL)),
+    ]
+    for name, func in cases:
+        best = min(timeit.repeat(func, number=args.number, repeat=5))
+        print(f"{name:<16} {best / args.number * 1e6:8.2f} us/render")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Cold-start benchmark: ``python -X importtime -c 'import app_production'``.
+
+Importing ``app_production`` is what Passenger, Vercel and Railway pay for on
+a cold start: the imports plus building the app. Each run is a fresh
+interpreter. The report splits the median time into the web framework
+(Flask and its dependencies, fixed cost) and the rest, which is the part this
+repository controls, and lists the slowest of those modules.
+
+    python benchmarks/bench_import_time.py [--runs N] [--budget-ms MS]
+
+Exits 1 when the median non-framework time is over the budget, or when a
+module that should load lazily (smtplib, the MIME classes, asyncio, cProfile,
+email_validator, and python-dotenv while there is no .env file) is imported
+at startup. Compare runs on one machine to spot smaller regressions.
+tests/test_startup.py checks the lazy modules and the whole import time on
+every test run.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+# Packages that come with Flask; their import time is the same for any Flask app
+FRAMEWORK = {'flask', 'werkzeug', 'jinja2', 'click', 'itsdangerous', 'markupsafe', 'blinker'}
+
+# Loaded on first use, never by importing the app
+LAZY_MODULES = ('smtplib', 'email.mime.multipart', 'email.mime.text', 'asyncio', 'cProfile', 'email_validator',
+                'creative_brief.smtp_pool', 'creative_brief.async_smtp')
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def run_once():
+    """``[(name, self_us, cumulative_us, depth), ...]`` of one cold import, in import order"""
+    env = dict(os.environ, METRICS_DIR='')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app_production'],
+        cwd=REPO_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    if result.returncode != 0:
+        sys.exit(f"import app_production failed:\n{result.stderr[-2000:]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            entries.append((match.group(4), int(match.group(1)), int(match.group(2)), len(match.group(3))))
+    return entries
+
+
+def split(entries):
+    """``(total_us, framework_us, own self times by module)`` of one run"""
+    total = next(cumulative for name, _, cumulative, depth in entries if name == 'app_production' and depth == 0)
+    framework = 0
+    own = {}
+    # Parents are printed after their children; walk backwards to see each module's ancestors first
+    ancestors = []
+    for name, self_us, cumulative, depth in reversed(entries):
+        while ancestors and ancestors[-1][0] >= depth:
+            ancestors.pop()
+        in_framework = any(root in FRAMEWORK for _, root in ancestors)
+        in_app = name == 'app_production' or any(root == 'app_production' for _, root in ancestors)
+        root = name.split('.')[0]
+        if root in FRAMEWORK and in_app and not in_framework:
+            framework += cumulative
+        elif in_app and not in_framework and root not in FRAMEWORK:
+            own[name] = self_us
+        ancestors.append((depth, root))
+    return total, framework, own
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7, help='cold imports to take the median of')
+    parser.add_argument('--budget-ms', type=float, default=80.0,
+                        help='limit for the median time outside the framework, app construction included')
+    parser.add_argument('--top', type=int, default=12, help='slowest non-framework modules to list')
+    args = parser.parse_args()
+
+    # The first run also writes any stale .pyc files
+    run_once()
+    runs = []
+    imported = set()
+    for _ in range(args.runs):
+        entries = run_once()
+        imported.update(name for name, _, _, _ in entries)
+        runs.append(split(entries))
+
+    total = statistics.median(run[0] for run in runs) / 1000
+    framework = statistics.median(run[1] for run in runs) / 1000
+    own = statistics.median(run[0] - run[1] for run in runs) / 1000
+    print(f"import app_production: {total:.1f}ms median of {args.runs} "
+          f"(framework {framework:.1f}ms, rest {own:.1f}ms, budget {args.budget_ms:.0f}ms)")
+
+    modules = {}
+    for _, _, self_times in runs:
+        for name, self_us in self_times.items():
+            modules.setdefault(name, []).append(self_us)
+    print("\nSlowest non-framework modules (self time, median):")
+    slowest = sorted(modules.items(), key=lambda item: -statistics.median(item[1]))[:args.top]
+    for name, times in slowest:
+        print(f"  {statistics.median(times) / 1000:7.2f}ms  {name}")
+
+    lazy = list(LAZY_MODULES)
+    if not os.path.exists(os.getenv('ENV_FILE') or os.path.join(REPO_DIR, '.env')):
+        lazy.append('dotenv')
+    eager = [name for name in lazy if name in imported]
+
+    failed = False
+    if eager:
+        print(f"\nFAIL: imported at startup: {', '.join(eager)}")
+        failed = True
+    if own > args.budget_ms:
+        print(f"\nFAIL: {own:.1f}ms outside the framework is over the {args.budget_ms:.0f}ms budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
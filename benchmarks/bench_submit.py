@@ -0,0 +1,335 @@
+"""Load test for the /submit pipeline.
+
+Generates realistic briefs covering every form field (including large
+textareas) and drives the app either in-process through the Flask test client
+or over HTTP against a real gunicorn, using a local SMTP sink. Reports
+throughput, end-to-end latency percentiles, and p50/p95/p99 per
+`submit_form` stage, estimated from the app's own /metrics histograms.
+
+    python benchmarks/bench_submit.py --mode client --requests 500
+    python benchmarks/bench_submit.py --mode gunicorn --workers 4 --concurrency 32
+    python benchmarks/bench_submit.py --save-baseline     # record benchmarks/baseline.json
+    python benchmarks/bench_submit.py --compare           # exit 1 on a regression
+"""
+import argparse
+import atexit
+import http.client
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from smtp_sink import SMTPSink  # noqa: E402
+
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+WORDS = ('brand launch audience campaign story video social product design bold modern color '
+         'message growth community digital print layout motion clarity trust').split()
+PROJECT_TYPES = ('Branding', 'Website', 'Video', 'Campaign', 'Logo Design', 'Social Media', 'Print Design', 'Other')
+BUDGETS = ('Under $1,000', '$1,000 - $5,000', '$5,000 - $10,000', '$10,000 - $25,000', '$25,000+', 'To be discussed')
+METHODS = ('Email', 'Phone', 'WhatsApp', 'Slack', 'Teams')
+
+
+def _text(rng, words, lines=1):
+    # Textareas accept at most 1000 characters
+    return '\n'.join(' '.join(rng.choice(WORDS) for _ in range(words)) for _ in range(lines))[:1000].strip()
+
+
+def make_payload(rng, index, large=False):
+    """A complete brief; `large` fills the free-text fields close to the 1000-char UI limit"""
+    long_lines = 12 if large else 2
+    return {
+        'fullName': f"Client {index}",
+        'companyName': f"Company {index % 97}",
+        'jobTitle': 'Marketing Lead',
+        'email': f"client{index}@example.com",
+        'phone': f"+1 555 {index % 10000:04d}",
+        'website': f"https://client{index}.example.com",
+        'projectTitle': f"Project {index}: {_text(rng, 3)}",
+        'projectType': rng.choice(PROJECT_TYPES),
+        'projectDescription': _text(rng, 12, long_lines),
+        'keyObjectives': _text(rng, 10, long_lines),
+        'targetAudience': _text(rng, 10),
+        'preferredStyle': 'Modern, Bold',
+        'designElements': _text(rng, 8),
+        'avoidElements': _text(rng, 6),
+        'inspirations': _text(rng, 12, long_lines),
+        'mainMessage': _text(rng, 10, long_lines),
+        'contentProvided': _text(rng, 12, long_lines),
+        'deliverables': 'Landing page, 12 social posts, 30s video',
+        'fileFormats': 'PNG, MP4, PDF',
+        'startDate': '2026-11-01',
+        'deadline': '2026-12-15',
+        'budget': rng.choice(BUDGETS),
+        'primaryContact': f"Client {index}",
+        'communicationMethod': rng.choice(METHODS),
+        'secondaryContact': 'Sam Lee',
+        'additionalNotes': _text(rng, 12, long_lines),
+        'acknowledgement': 'on',
+    }
+
+
+def make_payloads(count, seed=1234, large_ratio=0.25):
+    rng = random.Random(seed)
+    return [make_payload(rng, i, large=rng.random() < large_ratio) for i in range(count)]
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def parse_histograms(text, metric):
+    """{label: [(upper_bound, cumulative_count), ...]} for one histogram in Prometheus text"""
+    pattern = re.compile(rf'^{metric}_bucket{{(\w+)="([^"]*)",le="([^"]+)"}} (\S+)$', re.M)
+    histograms = {}
+    for _, label, bound, count in pattern.findall(text):
+        histograms.setdefault(label, []).append((float(bound), float(count)))
+    return histograms
+
+
+def histogram_quantile(buckets, q):
+    """Linear interpolation inside the bucket holding quantile `q`, as Prometheus does"""
+    if not buckets or buckets[-1][1] == 0:
+        return 0.0
+    rank = q * buckets[-1][1]
+    lower_bound, lower_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float('inf'):
+                return lower_bound
+            if count == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+        lower_bound, lower_count = bound, count
+    return lower_bound
+
+
+def stage_report(before, after):
+    """Per-stage percentiles from the difference of two /metrics scrapes"""
+    report = {}
+    start = parse_histograms(before, 'submit_stage_duration_seconds')
+    end = parse_histograms(after, 'submit_stage_duration_seconds')
+    for stage, buckets in end.items():
+        previous = dict(start.get(stage, []))
+        delta = [(bound, count - previous.get(bound, 0.0)) for bound, count in buckets]
+        report[stage] = {
+            'count': int(delta[-1][1]),
+            'p50_ms': histogram_quantile(delta, 0.50) * 1000,
+            'p95_ms': histogram_quantile(delta, 0.95) * 1000,
+            'p99_ms': histogram_quantile(delta, 0.99) * 1000,
+        }
+    return report
+
+
+def bench_env(sink_port, workdir):
+    return {
+        'SMTP_SERVER': '127.0.0.1',
+        'SMTP_PORT': str(sink_port),
+        'SMTP_USERNAME': 'bench',
+        'SMTP_PASSWORD': 'bench',
+        'SMTP_USE_TLS': 'False',
+        'SUBMISSIONS_DB': os.path.join(workdir, 'submissions.db'),
+        'METRICS_DIR': os.path.join(workdir, 'metrics'),
+        'RATE_LIMIT_ENABLED': 'False',
+        'DEDUP_WINDOW': '0',
+        'PROXY_COUNT': '0',
+    }
+
+
+def run_test_client(payloads, concurrency, env):
+    os.environ.update(env)
+    import logging
+    logging.disable(logging.INFO)
+    import app_production
+
+    app = app_production.app
+    before = app.test_client().get('/metrics').get_data(as_text=True)
+
+    def submit(payload):
+        client = app.test_client()
+        start = time.perf_counter()
+        response = client.post('/submit', data=payload)
+        return time.perf_counter() - start, response.status_code == 200 and response.get_json()['success']
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(submit, payloads))
+    elapsed = time.perf_counter() - started
+    app.extensions['creative_brief'].mail_queue.stop()
+    after = app.test_client().get('/metrics').get_data(as_text=True)
+    return results, elapsed, before, after
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _http(port, method, path, body=None, headers=None, connection=None):
+    conn = connection or http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    data = response.read()
+    return conn, response.status, data
+
+
+def run_gunicorn(payloads, concurrency, env, workers, threads):
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app_production:app', '--bind', f"127.0.0.1:{port}",
+         '--workers', str(workers), '--threads', str(threads), '--log-level', 'warning'],
+        cwd=REPO_DIR, env=dict(os.environ, **env),
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                _http(port, 'GET', '/health')
+                break
+            except OSError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError('gunicorn did not start')
+                time.sleep(0.2)
+
+        _, _, before = _http(port, 'GET', '/metrics')
+        local = threading.local()
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+        def submit(payload):
+            body = urllib.parse.urlencode(payload)
+            start = time.perf_counter()
+            try:
+                local.conn, status, data = _http(port, 'POST', '/submit', body, headers, getattr(local, 'conn', None))
+            except (OSError, http.client.HTTPException):
+                local.conn = None
+                return time.perf_counter() - start, False
+            return time.perf_counter() - start, status == 200 and json.loads(data)['success']
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(submit, payloads))
+        elapsed = time.perf_counter() - started
+        time.sleep(6)  # let workers drain mail and write their metric snapshots
+        _, _, after = _http(port, 'GET', '/metrics')
+        return results, elapsed, before.decode(), after.decode()
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def summarize(results, elapsed, before, after, sink):
+    latencies = [latency for latency, _ in results]
+    return {
+        'requests': len(results),
+        'errors': sum(1 for _, ok in results if not ok),
+        'throughput_rps': len(results) / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'p50': percentile(latencies, 0.50) * 1000,
+            'p95': percentile(latencies, 0.95) * 1000,
+            'p99': percentile(latencies, 0.99) * 1000,
+        },
+        'stages': stage_report(before, after),
+        'emails_delivered': sink.messages,
+    }
+
+
+def print_report(report, baseline=None):
+    def delta(current, previous):
+        if not previous:
+            return ''
+        return f" ({(current - previous) / previous * 100:+.1f}%)"
+
+    base = baseline or {}
+    print(f"requests    {report['requests']} ({report['errors']} errors), "
+          f"{report['emails_delivered']} emails delivered")
+    print(f"throughput  {report['throughput_rps']:.1f} req/s{delta(report['throughput_rps'], base.get('throughput_rps'))}")
+    for q in ('p50', 'p95', 'p99'):
+        value = report['latency_ms'][q]
+        print(f"latency {q} {value:8.2f} ms{delta(value, base.get('latency_ms', {}).get(q))}")
+    print(f"\n{'stage':<14}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, row in sorted(report['stages'].items()):
+        previous = base.get('stages', {}).get(stage, {})
+        print(f"{stage:<14}{row['count']:>7}{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}"
+              f"{delta(row['p95_ms'], previous.get('p95_ms'))}")
+
+
+def regressions(report, baseline, tolerance):
+    found = []
+    if report['throughput_rps'] < baseline['throughput_rps'] * (1 - tolerance):
+        found.append('throughput')
+    for q in ('p50', 'p95', 'p99'):
+        if report['latency_ms'][q] > baseline['latency_ms'][q] * (1 + tolerance):
+            found.append(f"latency {q}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the /submit pipeline')
+    parser.add_argument('--mode', choices=('client', 'gunicorn'), default='client')
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--smtp-delay', type=float, default=0.0, help='simulated SMTP latency per message (s)')
+    parser.add_argument('--save-baseline', action='store_true', help=f"write results to {BASELINE_PATH}")
+    parser.add_argument('--compare', action='store_true', help='compare with the baseline; exit 1 on regression')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before --compare fails')
+    args = parser.parse_args()
+
+    sink = SMTPSink(delay=args.smtp_delay).start()
+    payloads = make_payloads(args.requests)
+    workdir = tempfile.mkdtemp(prefix='bench-submit-')
+    # Registered before the app is imported, so it runs after the app's own exit hooks
+    atexit.register(shutil.rmtree, workdir, True)
+    env = bench_env(sink.port, workdir)
+    if args.mode == 'client':
+        results, elapsed, before, after = run_test_client(payloads, args.concurrency, env)
+    else:
+        results, elapsed, before, after = run_gunicorn(payloads, args.concurrency, env, args.workers, args.threads)
+    report = summarize(results, elapsed, before, after, sink)
+    report['mode'] = args.mode
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baselines = json.load(f)
+    baseline = baselines.get(args.mode)
+    print_report(report, baseline if args.compare else None)
+
+    if args.save_baseline:
+        baselines[args.mode] = report
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nBaseline for '{args.mode}' saved to {BASELINE_PATH}")
+
+    if args.compare:
+        if baseline is None:
+            print(f"\nNo '{args.mode}' baseline in {BASELINE_PATH}")
+            sys.exit(1)
+        found = regressions(report, baseline, args.tolerance)
+        if found:
+            print(f"\nRegression beyond {args.tolerance:.0%}: {', '.join(found)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Local SMTP sink for benchmarks.
+
+Accepts EHLO, AUTH, MAIL, RCPT and DATA without TLS and throws the messages
+away, counting them. Point the app at it with SMTP_SERVER=127.0.0.1,
+SMTP_PORT=<port> and SMTP_USE_TLS=False. The test suite uses it with
+``keep=True`` to look at what arrived.
+
+    python benchmarks/smtp_sink.py --port 2525 [--delay 0.05]
+"""
+import argparse
+import asyncio
+import threading
+
+
+class SMTPSink:
+    """asyncio SMTP server running on a background thread.
+
+    With `keep`, the DATA of every message is appended to `received` with
+    the dot-stuffing undone.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, delay=0.0, keep=False):
+        self.host = host
+        self.port = port
+        self.delay = delay
+        self.keep = keep
+        self.messages = 0
+        self.connections = 0
+        self.logins = 0
+        self.noops = 0
+        self.received = []
+        self._writers = set()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._serve, name='smtp-sink', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+            self._thread.join(5)
+
+    def drop_connections(self):
+        """Hang up on every client, like a server timing out idle sessions"""
+        async def drop():
+            for writer in list(self._writers):
+                writer.transport.abort()
+        asyncio.run_coroutine_threadsafe(drop(), self._loop).result()
+
+    def _serve(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self._loop.run_until_complete(self._server.serve_forever())
+        except asyncio.CancelledError:
+            # `stop` closed the server
+            pass
+        finally:
+            for writer in list(self._writers):
+                writer.transport.abort()
+            pending = asyncio.all_tasks(self._loop)
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.close()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            await self._converse(reader, writer)
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _converse(self, reader, writer):
+        writer.write(b'220 smtp-sink ready\r\n')
+        data = None
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if data is not None:
+                if line in (b'.\r\n', b'.\n'):
+                    if self.delay:
+                        await asyncio.sleep(self.delay)
+                    if self.keep:
+                        self.received.append(b''.join(data))
+                    data = None
+                    self.messages += 1
+                    writer.write(b'250 OK\r\n')
+                elif self.keep:
+                    # Undo the dot-stuffing
+                    data.append(line[1:] if line.startswith(b'.') else line)
+                continue
+            command = line[:4].upper()
+            if command == b'EHLO':
+                writer.write(b'250-smtp-sink\r\n250 AUTH PLAIN LOGIN\r\n')
+            elif command == b'AUTH':
+                self.logins += 1
+                writer.write(b'235 Authentication successful\r\n')
+            elif command == b'NOOP':
+                self.noops += 1
+                writer.write(b'250 OK\r\n')
+            elif command == b'DATA':
+                data = []
+                writer.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+            elif command == b'QUIT':
+                writer.write(b'221 Bye\r\n')
+                break
+            else:
+                writer.write(b'250 OK\r\n')
+            await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Discarding SMTP server for benchmarks')
+    parser.add_argument('--port', type=int, default=2525)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds to wait before accepting each message')
+    args = parser.parse_args()
+    sink = SMTPSink(port=args.port, delay=args.delay).start()
+    print(f"SMTP sink listening on 127.0.0.1:{sink.port}")
+    threading.Event().wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -12,6 +12,7 @@ New-Item -ItemType Directory -Name $deployDir
 $filesToCopy = @(
     "passenger_wsgi.py",
     "app_production.py", 
+    "creative_brief",
     "index.html",
     "styles.css",
     "script.js",
@@ -25,7 +26,7 @@ $filesToCopy = @(
 Write-Host "📁 Copying files..." -ForegroundColor Yellow
 foreach ($file in $filesToCopy) {
     if (Test-Path $file) {
-        Copy-Item $file -Destination $deployDir
+        Copy-Item $file -Destination $deployDir -Recurse
         Write-Host "  ✅ $file" -ForegroundColor Green
     } else {
         Write-Host "  ⚠️ $file (not found, skipping)" -ForegroundColor Yellow
@@ -0,0 +1,50 @@
+"""Creative brief form: Flask app factory and shared core.
+
+The entry points (``app_production.py``, ``passenger_wsgi.py``, ``asgi.py``,
+``app.py`` and ``main.py``) only differ in how they call `create_app`:
+
+    from creative_brief import Config, create_app
+    app = create_app(Config.from_env(mail_backend='log'))
+"""
+from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from .admin_api import admin_bp
+from .config import Config
+from .limits import LimitedRequest
+from .routes import bp
+from .services import EXTENSION, BriefService
+
+__all__ = ['Config', 'create_app']
+
+
+def create_app(config=None, delivery=None):
+    """Build the app from `config` (default: `Config.from_env()`).
+
+    `delivery` replaces the backend chosen by ``config.mail_backend`` with any
+    object that has the `MailQueue` interface.
+    """
+    config = config or Config.from_env()
+    app = Flask(__name__)
+    app.secret_key = config.secret_key
+
+    # Oversized bodies and fields are refused with 413 while the body is read
+    app.request_class = LimitedRequest
+    app.config.update(
+        MAX_CONTENT_LENGTH=config.max_content_length,
+        MAX_FIELD_SIZE=config.max_field_size,
+        MAX_FORM_PARTS=config.max_form_parts,
+    )
+
+    # Trust X-Forwarded-For from the platform's proxy so remote_addr is the client
+    if config.proxy_count:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=config.proxy_count)
+
+    service = BriefService(config, delivery)
+    app.extensions[EXTENSION] = service
+    app.register_blueprint(bp)
+    app.register_blueprint(admin_bp)
+
+    # Retries and health checks run from the start, not from the first email or probe
+    service.start_background_tasks()
+    return app
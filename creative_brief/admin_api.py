@@ -0,0 +1,153 @@
+"""Read-only admin API over stored submissions.
+
+Every endpoint needs ``Authorization: Bearer <ADMIN_TOKEN>``; while
+ADMIN_TOKEN is unset the whole API answers 404. Listing is newest first with
+keyset pagination: a page ends with ``next_cursor``, the id to pass back as
+``cursor`` to get the following page, so deep pages cost the same as the
+first one.
+
+    GET /admin/submissions?projectType=Video&from=2026-01-01&q=launch&limit=50
+    GET /admin/submissions/<id>
+    GET /admin/export?format=csv&cursor=<id>&since=2026-01-01T00:00
+"""
+import hmac
+import logging
+from datetime import datetime, timedelta
+
+from flask import Blueprint, Response, abort, jsonify, request
+
+from .export import FORMATS, export_records, parse_since, render
+from .schema import FILTER_FIELDS
+from .services import get_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+admin_bp = Blueprint('admin_api', __name__, url_prefix='/admin')
+
+
+class BadQuery(ValueError):
+    pass
+
+
+@admin_bp.before_request
+def require_admin_token():
+    token = get_service().config.admin_token
+    if not token:
+        abort(404)
+    scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(supplied.strip().encode(), token.encode()):
+        logger.warning(f"Unauthorized admin API request from {request.remote_addr}")
+        response = jsonify({'error': 'Unauthorized'})
+        response.headers['WWW-Authenticate'] = 'Bearer'
+        return response, 401
+
+
+@admin_bp.errorhandler(BadQuery)
+def bad_query(error):
+    return jsonify({'error': str(error)}), 400
+
+
+@admin_bp.route('/submissions')
+def list_submissions():
+    """One page of submissions matching the query parameters"""
+    args = request.args
+    limit = _int_arg('limit', DEFAULT_PAGE_SIZE)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise BadQuery(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    created_from = _date_arg('from')
+    created_to = _date_arg('to')
+    if created_to is not None:
+        # `to` names the last day included
+        created_to += timedelta(days=1).total_seconds()
+
+    # One row more than asked tells whether there is another page
+    rows = get_service().submission_store.search(
+        filters={name: args[name] for name in FILTER_FIELDS if args.get(name)},
+        text=args.get('q'),
+        created_from=created_from,
+        created_to=created_to,
+        before_id=_int_arg('cursor', None),
+        limit=limit + 1,
+    )
+    page = rows[:limit]
+    return jsonify({
+        'submissions': [_summary(row) for row in page],
+        'next_cursor': page[-1]['id'] if len(rows) > limit else None,
+    })
+
+
+@admin_bp.route('/submissions/<int:submission_id>')
+def get_submission(submission_id):
+    """A stored submission with every field and its attachments"""
+    service = get_service()
+    row = service.submission_store.get(submission_id)
+    if row is None:
+        abort(404)
+    record = _summary(row)
+    record['remote_addr'] = row['remote_addr']
+    record['data'] = row['data']
+    record['attachments'] = [
+        dict(attachment, url=service.attachment_link(submission_id, attachment['sha256']))
+        for attachment in service.submission_store.attachments(submission_id)
+    ]
+    return jsonify(record)
+
+
+@admin_bp.route('/export')
+def export_submissions():
+    """Every submission after `cursor` (and from `since`), streamed as CSV or JSON Lines.
+
+    The X-Export-Cursor header holds the cursor for the next incremental export.
+    """
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        raise BadQuery(f"format must be one of {', '.join(FORMATS)}")
+    since = request.args.get('since')
+    try:
+        created_from = parse_since(since) if since else None
+    except ValueError:
+        raise BadQuery("since must be an ISO date or date and time")
+
+    cursor, records = export_records(get_service().submission_store, _int_arg('cursor', 0), created_from)
+    logger.info(f"Exporting submissions up to {cursor} as {fmt} for {request.remote_addr}")
+    response = Response(render(records, fmt), content_type=FORMATS[fmt])
+    response.headers['Content-Disposition'] = f"attachment; filename=submissions-{cursor}.{fmt}"
+    response.headers['X-Export-Cursor'] = str(cursor)
+    return response
+
+
+def _summary(row):
+    data = row['data']
+    summary = {
+        'id': row['id'],
+        'submitted_at': datetime.fromtimestamp(row['created_at']).isoformat(),
+        'admin_sent': row['admin_sent_at'] is not None,
+        'client_sent': row['client_sent_at'] is not None,
+    }
+    for name in ('fullName', 'email', 'companyName', 'projectTitle') + FILTER_FIELDS:
+        summary[name] = data.get(name)
+    return summary
+
+
+def _int_arg(name, default):
+    value = request.args.get(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise BadQuery(f"{name} must be an integer")
+
+
+def _date_arg(name):
+    """Local midnight of a YYYY-MM-DD parameter as epoch seconds"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').timestamp()
+    except ValueError:
+        raise BadQuery(f"{name} must be a date (YYYY-MM-DD)")
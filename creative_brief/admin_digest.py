@@ -0,0 +1,96 @@
+"""Batched admin notifications for high-volume periods.
+
+Instead of one admin email per submission, `AdminDigest` buffers the
+notifications and hands them to `flush_func` as a single batch every
+`interval` seconds or once `max_items` have accumulated, whichever comes
+first. Submissions matching the `is_urgent` predicate skip the buffer.
+Client confirmations are not affected.
+"""
+import atexit
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AdminDigest:
+    """Buffer of admin notifications flushed by size or by time"""
+
+    def __init__(self, flush_func, interval=900.0, max_items=25, is_urgent=None):
+        self.flush_func = flush_func
+        self.interval = interval
+        self.max_items = max_items
+        self.is_urgent = is_urgent or (lambda form_data: False)
+        self._entries = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def add(self, submission_id, form_data, submitted_at, remote_addr):
+        """Buffer a notification; returns False if it is urgent and must be sent now"""
+        if self.is_urgent(form_data):
+            return False
+        self._start()
+        with self._lock:
+            self._entries.append((submission_id, form_data, submitted_at, remote_addr))
+            full = len(self._entries) >= self.max_items
+        if full:
+            self.flush()
+        return True
+
+    def pending(self):
+        """Number of buffered notifications"""
+        return len(self._entries)
+
+    def flush(self):
+        """Send everything buffered so far as one batch"""
+        with self._lock:
+            entries, self._entries = self._entries, []
+        if not entries:
+            return
+        try:
+            self.flush_func(entries)
+        except Exception as e:
+            # The submissions stay unsent in the store and can be replayed
+            logger.error(f"Failed to flush admin digest of {len(entries)} submissions: {str(e)}")
+
+    def _start(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='admin-digest', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+def budget_floor(budget):
+    """Lower bound in dollars of a budget range such as '$5,000 - $10,000'"""
+    match = re.search(r'\$([\d,]+)', budget or '')
+    if not match or budget.lower().startswith('under'):
+        return 0
+    return int(match.group(1).replace(',', ''))
+
+
+def create_admin_digest(flush_func):
+    """Build the digest from ADMIN_DIGEST_* settings, or return None when disabled"""
+    if os.getenv('ADMIN_DIGEST_ENABLED', 'False').lower() != 'true':
+        return None
+    urgent_budget = int(os.getenv('ADMIN_DIGEST_URGENT_BUDGET', 10000))
+    digest = AdminDigest(
+        flush_func,
+        interval=float(os.getenv('ADMIN_DIGEST_INTERVAL', 15)) * 60,
+        max_items=int(os.getenv('ADMIN_DIGEST_MAX_ITEMS', 25)),
+        is_urgent=lambda form_data: budget_floor(form_data.get('budget')) >= urgent_budget,
+    )
+    atexit.register(digest.flush)
+    return digest
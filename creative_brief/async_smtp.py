@@ -0,0 +1,243 @@
+"""Minimal asyncio SMTP client and session pool.
+
+Used by the ASGI entry point so that slow SMTP exchanges wait on the event
+loop instead of holding a thread. It speaks just what outbound submission
+mail needs: EHLO, STARTTLS, AUTH PLAIN/LOGIN, MAIL/RCPT/DATA, NOOP and QUIT.
+Pooling mirrors `smtp_pool.SMTPConnectionPool`.
+"""
+import asyncio
+import base64
+import email.policy
+import logging
+import os
+import re
+import socket
+import ssl
+import time
+from email.utils import getaddresses
+
+from .delivery import StreamingMessage
+from .metrics import SMTP_FAILURES, SMTP_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSMTPError(Exception):
+    """The server answered with an unexpected reply code"""
+
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+        self.message = message
+
+
+class AsyncSMTPConnection:
+    """One SMTP session on an asyncio stream"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.extensions = {}
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages = 0
+
+    @classmethod
+    async def open(cls, host, port, timeout=30.0, username=None, password=None, use_tls=True, ssl_context=None):
+        """Connect, optionally STARTTLS, and log in"""
+        with SMTP_LATENCY.time('connect'):
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        conn = cls(reader, writer)
+        try:
+            with SMTP_LATENCY.time('login'):
+                # Bounded too: a server that accepts but never greets would hang the send
+                await asyncio.wait_for(conn._handshake(host, username, password, use_tls, ssl_context), timeout)
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    async def _handshake(self, host, username, password, use_tls, ssl_context):
+        await self._expect(220)
+        await self.ehlo()
+        if use_tls:
+            await self.command('STARTTLS', 220)
+            await self.writer.start_tls(ssl_context or ssl.create_default_context(), server_hostname=host)
+            await self.ehlo()
+        if username:
+            await self.login(username, password)
+
+    async def ehlo(self):
+        lines = await self.command(f"EHLO {socket.gethostname()}", 250)
+        self.extensions = {}
+        for line in lines[1:]:
+            keyword, _, params = line.partition(' ')
+            self.extensions[keyword.upper()] = params
+
+    async def login(self, username, password):
+        methods = self.extensions.get('AUTH', '').upper().split()
+        if 'PLAIN' in methods or not methods:
+            token = base64.b64encode(f"\0{username}\0{password}".encode()).decode()
+            await self.command(f"AUTH PLAIN {token}", 235)
+        else:
+            await self.command('AUTH LOGIN', 334)
+            await self.command(base64.b64encode(username.encode()).decode(), 334)
+            await self.command(base64.b64encode(password.encode()).decode(), 235)
+
+    async def send_message(self, msg):
+        """Send an `email.message.Message` or a `StreamingMessage`, like `smtplib.SMTP.send_message`"""
+        if isinstance(msg, StreamingMessage):
+            sender, recipients = msg.envelope()
+            chunks = msg.smtp_data()
+        else:
+            sender = getaddresses([msg['From']])[0][1]
+            recipients = [address for _, address in getaddresses(msg.get_all('To', []) + msg.get_all('Cc', []))]
+            data = msg.as_bytes(policy=email.policy.SMTP)
+            data = re.sub(rb'(?m)^\.', b'..', data)
+            if not data.endswith(b'\r\n'):
+                data += b'\r\n'
+            chunks = (data,)
+
+        await self.command(f"MAIL FROM:<{sender}>", 250)
+        for recipient in recipients:
+            await self.command(f"RCPT TO:<{recipient}>", (250, 251))
+        await self.command('DATA', 354)
+        for chunk in chunks:
+            self.writer.write(chunk)
+            # Wait for the socket buffer so large attachments are not queued in memory
+            await self.writer.drain()
+        self.writer.write(b'.\r\n')
+        await self._expect(250)
+        self.messages += 1
+
+    async def noop(self):
+        await self.command('NOOP', 250)
+
+    async def quit(self):
+        try:
+            await asyncio.wait_for(self.command('QUIT', 221), 5)
+        except (AsyncSMTPError, OSError, asyncio.TimeoutError):
+            pass
+        self.close()
+
+    def close(self):
+        self.writer.close()
+
+    async def command(self, line, expected):
+        self.writer.write(line.encode() + b'\r\n')
+        return await self._expect(expected)
+
+    async def _expect(self, expected):
+        await self.writer.drain()
+        lines = []
+        while True:
+            raw = await self.reader.readline()
+            if not raw:
+                raise ConnectionResetError('SMTP server closed the connection')
+            line = raw.decode('utf-8', 'replace').rstrip('\r\n')
+            lines.append(line[4:])
+            if line[3:4] != '-':
+                break
+        code = int(line[:3])
+        if code not in (expected if isinstance(expected, tuple) else (expected,)):
+            raise AsyncSMTPError(code, ' '.join(lines))
+        return lines
+
+
+class AsyncSMTPPool:
+    """Pool of logged-in `AsyncSMTPConnection` sessions for one event loop"""
+
+    def __init__(self, host, port, username=None, password=None, max_size=2, max_messages=100,
+                 idle_timeout=60.0, noop_after=5.0, timeout=30.0, use_tls=True, ssl_context=None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_size = max_size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self.timeout = timeout
+        self.use_tls = use_tls
+        self.ssl_context = ssl_context
+        self._idle = []
+
+    async def send_message(self, msg):
+        """Send `msg` over a pooled session, reconnecting once if it was dropped"""
+        conn = await self._acquire()
+        try:
+            await self._send(conn, msg)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            conn.close()
+            if not conn.messages:
+                raise
+            logger.info(f"SMTP session dropped ({str(e)}), reconnecting")
+            conn = await self._connect()
+            try:
+                await self._send(conn, msg)
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+        self._release(conn)
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await conn.quit()
+
+    async def _send(self, conn, msg):
+        try:
+            with SMTP_LATENCY.time('send'):
+                await asyncio.wait_for(conn.send_message(msg), self.timeout)
+        except Exception:
+            SMTP_FAILURES.inc('send')
+            raise
+
+    async def _acquire(self):
+        while self._idle:
+            conn = self._idle.pop()
+            idle_for = time.monotonic() - conn.last_used
+            if idle_for > self.idle_timeout:
+                await conn.quit()
+                continue
+            if idle_for > self.noop_after:
+                try:
+                    await asyncio.wait_for(conn.noop(), self.timeout)
+                except (AsyncSMTPError, OSError, asyncio.TimeoutError):
+                    conn.close()
+                    continue
+            return conn
+        return await self._connect()
+
+    def _release(self, conn):
+        conn.last_used = time.monotonic()
+        if conn.messages >= self.max_messages or len(self._idle) >= self.max_size:
+            asyncio.ensure_future(conn.quit())
+        else:
+            self._idle.append(conn)
+
+    async def _connect(self):
+        try:
+            return await AsyncSMTPConnection.open(
+                self.host, self.port, self.timeout, self.username, self.password, self.use_tls, self.ssl_context)
+        except Exception:
+            SMTP_FAILURES.inc('connect')
+            raise
+
+
+def create_async_smtp_pool(host, port, username, password):
+    """Build an `AsyncSMTPPool` from the same SMTP_* settings as the threaded pool"""
+    return AsyncSMTPPool(
+        host,
+        port,
+        username,
+        password,
+        max_size=int(os.getenv('SMTP_POOL_SIZE', 2)),
+        max_messages=int(os.getenv('SMTP_MAX_MESSAGES', 100)),
+        idle_timeout=float(os.getenv('SMTP_IDLE_TIMEOUT', 60)),
+        timeout=float(os.getenv('SMTP_TIMEOUT', 30)),
+        use_tls=os.getenv('SMTP_USE_TLS', 'True').lower() == 'true',
+    )
@@ -0,0 +1,103 @@
+"""Content-addressed storage for files uploaded with a brief.
+
+Uploads never sit in memory: `LimitedRequest` hands the multipart parser a
+`SpooledUpload` for every file part, which writes each chunk straight to a
+``.part`` file in the spool directory while it computes the SHA-256 and
+enforces the size cap. `AttachmentStore.save` then moves the file to
+``<directory>/<sha256[:2]>/<sha256>``; a file whose content is already stored
+is not kept twice.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import time
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+logger = logging.getLogger(__name__)
+
+# .part files older than this are left over from a crashed worker
+STALE_AFTER = 3600
+
+
+class SpooledUpload:
+    """Write-through file for one uploaded file part, hashed as it is written"""
+
+    def __init__(self, directory, max_size=None):
+        self.max_size = max_size
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+        fd, self.name = tempfile.mkstemp(suffix='.part', dir=directory)
+        self._file = os.fdopen(fd, 'w+b')
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise RequestEntityTooLarge()
+        self.sha256.update(data)
+        return self._file.write(data)
+
+    def close(self):
+        """Close the file and remove it unless it was saved to the store"""
+        self._file.close()
+        try:
+            os.unlink(self.name)
+        except FileNotFoundError:
+            pass
+
+    def __getattr__(self, name):
+        # read/seek/tell for FileStorage
+        return getattr(self._file, name)
+
+
+class AttachmentStore:
+    """Directory of uploaded files named by their SHA-256"""
+
+    def __init__(self, directory, max_size=None):
+        self.directory = directory
+        self.max_size = max_size
+        self.spool_dir = os.path.join(directory, 'tmp')
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._sweep()
+
+    def spool(self):
+        """A new `SpooledUpload` in the spool directory"""
+        return SpooledUpload(self.spool_dir, self.max_size)
+
+    def save(self, upload, filename, content_type):
+        """Move a finished upload into the store and return its metadata"""
+        digest = upload.sha256.hexdigest()
+        path = self.path(digest)
+        upload.flush()
+        if os.path.exists(path):
+            logger.info(f"Attachment {digest} already stored, not keeping a second copy")
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(upload.name, path)
+        upload.close()
+        return {
+            'sha256': digest,
+            'filename': _clean_filename(filename),
+            'content_type': content_type or 'application/octet-stream',
+            'size': upload.size,
+        }
+
+    def path(self, sha256):
+        return os.path.join(self.directory, sha256[:2], sha256)
+
+    def _sweep(self):
+        cutoff = time.time() - STALE_AFTER
+        for entry in os.scandir(self.spool_dir):
+            try:
+                if entry.name.endswith('.part') and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except OSError as e:
+                logger.warning(f"Could not remove stale upload {entry.path}: {str(e)}")
+
+
+def _clean_filename(filename):
+    """Drop any directory part a browser may send and cap the length"""
+    name = (filename or '').replace('\\', '/').rsplit('/', 1)[-1].strip()
+    return name[-200:] or 'attachment'
+
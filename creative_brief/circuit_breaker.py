@@ -0,0 +1,163 @@
+"""Circuit breaker for the SMTP provider.
+
+When the mail server is down or crawling, every send used to wait out the
+SMTP timeout, so an outage tied up request threads and mail workers alike.
+`CircuitBreaker` watches the outcome and duration of recent sends. Once
+`failure_rate` of the last `window` calls failed or took longer than
+`slow_call` seconds, the circuit opens and sends fail immediately; the
+caller hands the message to the retry store instead, and the retry
+scheduler holds off until a probe would be let through, then resends one
+message at a time until the circuit has closed. After `open_timeout`
+seconds one probe is let through (half-open): if it succeeds the circuit
+closes, otherwise it stays open for another `open_timeout`.
+
+The state is per process; each gunicorn worker finds out about an outage on
+its own after a few failed sends.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Thread-safe closed/open/half-open breaker over a rolling window of calls"""
+
+    def __init__(self, name, failure_rate=0.5, min_calls=4, window=20, slow_call=15.0, open_timeout=30.0):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.slow_call = slow_call
+        self.open_timeout = open_timeout
+        self._outcomes = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        return self._state
+
+    def available(self):
+        """Whether a call would be let through right now (without taking the probe slot)"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                return time.monotonic() - self._opened_at >= self.open_timeout
+            return not self._probing
+
+    def permits(self):
+        """How many calls may start now: None (no limit) while closed, else 1 if a probe may go out, or 0.
+
+        For callers that hand out work in batches: a half-open breaker lets
+        one call through, so a batch sent to it would mostly be rejected.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return None
+            if self._state == OPEN:
+                return 1 if time.monotonic() - self._opened_at >= self.open_timeout else 0
+            return 0 if self._probing else 1
+
+    def allow(self):
+        """Take permission for one call; False means fail fast"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_timeout:
+                logger.info(f"{self.name} circuit half-open, sending a probe")
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        return False
+
+    def record(self, failed, duration=0.0):
+        """Report the outcome of a call that `allow` let through"""
+        slow = self.slow_call is not None and duration > self.slow_call
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probing = False
+                if failed:
+                    self._open("probe failed")
+                else:
+                    logger.info(f"{self.name} circuit closed, probe succeeded in {duration:.1f}s")
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+            if self._state == OPEN:
+                # A call let through before the circuit opened
+                return
+            self._outcomes.append(failed or slow)
+            calls = len(self._outcomes)
+            failures = sum(self._outcomes)
+            if calls >= self.min_calls and failures / calls >= self.failure_rate:
+                self._open(f"{failures} of the last {calls} calls failed or were slow")
+
+    @contextmanager
+    def guard(self, is_failure=None):
+        """Run the ``with`` block as one call, raising `CircuitOpenError` if it may not run.
+
+        Exceptions for which `is_failure` returns False (e.g. a refused
+        recipient) propagate without counting against the provider.
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        start = time.monotonic()
+        # Anything that is not a clean exit (including cancellation) counts,
+        # so a half-open probe always reports back
+        failed = True
+        try:
+            yield
+            failed = False
+        except Exception as e:
+            failed = is_failure is None or is_failure(e)
+            raise
+        finally:
+            self.record(failed, time.monotonic() - start)
+
+    def snapshot(self):
+        """State for /health"""
+        with self._lock:
+            snapshot = {
+                'state': self._state,
+                'recent_calls': len(self._outcomes),
+                'recent_failures': sum(self._outcomes),
+            }
+            if self._state == OPEN:
+                snapshot['retry_in'] = round(max(0.0, self._opened_at + self.open_timeout - time.monotonic()), 1)
+            return snapshot
+
+    def _open(self, reason):
+        logger.error(f"{self.name} circuit open for {self.open_timeout:.0f}s: {reason}")
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+
+
+def create_smtp_breaker():
+    """Build the SMTP `CircuitBreaker` from the SMTP_BREAKER_* settings, or return None when disabled"""
+    if os.getenv('SMTP_BREAKER_ENABLED', 'True').lower() != 'true':
+        return None
+    return CircuitBreaker(
+        'SMTP',
+        failure_rate=float(os.getenv('SMTP_BREAKER_FAILURE_RATE', 0.5)),
+        min_calls=int(os.getenv('SMTP_BREAKER_MIN_CALLS', 4)),
+        window=int(os.getenv('SMTP_BREAKER_WINDOW', 20)),
+        slow_call=float(os.getenv('SMTP_BREAKER_SLOW_CALL', 15)),
+        open_timeout=float(os.getenv('SMTP_BREAKER_OPEN_TIMEOUT', 30)),
+    )
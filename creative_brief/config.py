@@ -0,0 +1,109 @@
+"""Application settings.
+
+`Config.from_env()` reads every setting the app itself needs once, at
+startup, instead of each module calling `os.getenv` as it goes. The result is
+read-only; `Config.replace` makes a changed copy. Helpers with their own
+tuning knobs (SMTP pool, mail queue, rate limiter, digest) still read those
+from the environment in their `create_*` functions.
+"""
+import os
+
+# Repository root, where index.html and the static assets live
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_env_file(path=None):
+    """Load `path` (default: ENV_FILE, or ``.env`` in BASE_DIR) into the environment, without overriding it.
+
+    python-dotenv is only imported when the file exists, so platforms that
+    set the environment themselves (Vercel, Railway) never load it.
+    """
+    path = path or os.getenv('ENV_FILE') or os.path.join(BASE_DIR, '.env')
+    if not os.path.isfile(path):
+        return False
+    from dotenv import load_dotenv
+
+    return load_dotenv(path)
+
+
+def _bool(value):
+    return str(value).lower() == 'true'
+
+
+# attribute, environment variable, default, parser
+SETTINGS = (
+    ('secret_key', 'SECRET_KEY', 'fallback-secret-key-change-in-production', str),
+    ('debug', 'DEBUG', False, _bool),
+    # Trust X-Forwarded-For from this many proxies so remote_addr is the client
+    ('proxy_count', 'PROXY_COUNT', 1, int),
+    ('smtp_server', 'SMTP_SERVER', 'smtp.gmail.com', str),
+    ('smtp_port', 'SMTP_PORT', 587, int),
+    ('smtp_username', 'SMTP_USERNAME', None, str),
+    ('smtp_password', 'SMTP_PASSWORD', None, str),
+    ('from_email', 'FROM_EMAIL', 'noreply@chroniclecraft.tech', str),
+    ('to_email', 'TO_EMAIL', 'irfan@chroniclecraft.tech', str),
+    ('website_url', 'WEBSITE_URL', 'https://chroniclecraft.tech', str),
+    # log, smtp, queue or spool, see creative_brief.delivery
+    ('mail_backend', 'MAIL_BACKEND', 'queue', str),
+    ('static_max_age', 'STATIC_MAX_AGE', 3600, int),
+    ('static_auto_reload', 'STATIC_AUTO_RELOAD', False, _bool),
+    ('dedup_window', 'DEDUP_WINDOW', 600.0, float),
+    # Defaults to data/metrics under base_dir; empty disables multi-process collection
+    ('metrics_dir', 'METRICS_DIR', None, str),
+    # Request body limits in bytes, see creative_brief.limits; the body limit
+    # leaves room for max_attachments files of max_attachment_size each
+    ('max_content_length', 'MAX_CONTENT_LENGTH', 52 * 1024 * 1024, int),
+    ('max_field_size', 'MAX_FIELD_SIZE', 16 * 1024, int),
+    ('max_form_parts', 'MAX_FORM_PARTS', 100, int),
+    # Uploaded reference files, see creative_brief.attachments. Files up to
+    # attachment_inline_limit bytes are attached to the admin email, larger ones linked
+    ('upload_dir', 'UPLOAD_DIR', None, str),
+    ('max_attachments', 'MAX_ATTACHMENTS', 5, int),
+    ('max_attachment_size', 'MAX_ATTACHMENT_SIZE', 10 * 1024 * 1024, int),
+    ('attachment_inline_limit', 'ATTACHMENT_INLINE_LIMIT', 2 * 1024 * 1024, int),
+    # Bearer token for the /admin API, see creative_brief.admin_api; unset disables it
+    ('admin_token', 'ADMIN_TOKEN', None, str),
+)
+
+
+class Config:
+    """Settings for `create_app`, read-only once built"""
+
+    def __init__(self, base_dir=BASE_DIR, **values):
+        settings = {'base_dir': base_dir}
+        for name, _, default, _ in SETTINGS:
+            settings[name] = values.pop(name, default)
+        if values:
+            raise TypeError(f"Unknown settings: {', '.join(sorted(values))}")
+        if settings['metrics_dir'] is None:
+            settings['metrics_dir'] = os.path.join(base_dir, 'data', 'metrics')
+        if settings['upload_dir'] is None:
+            settings['upload_dir'] = os.path.join(base_dir, 'data', 'uploads')
+        self.__dict__.update(settings)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Config is read-only, use config.replace({name}=...) for a changed copy")
+
+    def __delattr__(self, name):
+        raise AttributeError("Config is read-only")
+
+    def replace(self, **changes):
+        """A copy of these settings with `changes` applied"""
+        values = {name: getattr(self, name) for name, _, _, _ in SETTINGS}
+        base_dir = changes.pop('base_dir', self.base_dir)
+        values.update(changes)
+        return type(self)(base_dir, **values)
+
+    @classmethod
+    def from_env(cls, **defaults):
+        """Settings from the environment, falling back to `defaults`, then the built-in defaults"""
+        values = dict(defaults)
+        for name, env_name, _, parse in SETTINGS:
+            raw = os.getenv(env_name)
+            if raw is not None:
+                values[name] = parse(raw)
+        return cls(**values)
+
+    @property
+    def smtp_configured(self):
+        return bool(self.smtp_username and self.smtp_password)
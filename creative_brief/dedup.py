@@ -0,0 +1,93 @@
+"""Duplicate-submission detection.
+
+A double-clicked submit button or a retry after a network hiccup sends the
+same brief again. Every submission is reduced to a stable fingerprint of its
+normalized fields; fingerprints (and client-supplied Idempotency-Key values)
+are kept in a bounded, time-windowed index together with the response that
+was returned. A repeat inside the window gets that response back instead of
+being stored and mailed again.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def fingerprint(form_data):
+    """Stable hash of a submission, ignoring case and whitespace differences"""
+    normalized = {key: ' '.join(str(value).split()).casefold() for key, value in form_data.items()}
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class _Pending:
+    __slots__ = ('event', 'result')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+class DuplicateIndex:
+    """Bounded map of recent submission keys to the result they produced"""
+
+    def __init__(self, window=600.0, max_entries=10000, wait_timeout=10.0):
+        self.window = window
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def begin(self, keys):
+        """Claim `keys` for a new submission.
+
+        Returns ``(result, None)`` when one of the keys was already seen, or
+        ``(None, claim)`` when the caller should process the submission and
+        then pass `claim` to `complete` or `abandon`. If an identical
+        submission is still being processed, waits for its result.
+        """
+        keys = [key for key in keys if key]
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    pending = entry[1]
+                    break
+            else:
+                pending = _Pending()
+                for key in keys:
+                    self._entries[key] = (now + self.window, pending)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                return None, (keys, pending)
+
+        if pending.event.wait(self.wait_timeout) and pending.result is not None:
+            return pending.result, None
+        # The first attempt failed or is stuck: let this one proceed on its own
+        return None, ([], _Pending())
+
+    def complete(self, claim, result):
+        """Record the result for a claimed submission"""
+        _, pending = claim
+        pending.result = result
+        pending.event.set()
+
+    def abandon(self, claim):
+        """Release the keys of a submission that failed, so a retry is processed"""
+        keys, pending = claim
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] is pending:
+                    del self._entries[key]
+        pending.event.set()
+
+    def _expire(self, now):
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[key]
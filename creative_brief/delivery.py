@@ -0,0 +1,205 @@
+"""Pluggable mail delivery backends.
+
+Every backend is a `MailQueue` (``enqueue``, ``status``, ``depth``, ``stop``),
+so the rest of the app does not care where a message goes:
+
+- ``log``: write the message to the log instead of sending it (local development)
+- ``smtp``: send over a pooled SMTP session inside the request
+- ``queue``: send over SMTP from background worker threads (the default)
+- ``spool``: write to a spool directory for the delivery daemon
+  (``python -m creative_brief.delivery_daemon``) to send
+
+The SMTP and MIME modules are only imported once the first message is sent.
+"""
+import base64
+import logging
+import re
+import threading
+import uuid
+from contextlib import nullcontext
+
+from .circuit_breaker import CircuitOpenError
+from .mail_queue import MailQueue, create_mail_queue
+from .metrics import MAIL_SEND_FAILURES, SMTP_CIRCUIT_REJECTIONS
+from .profiling import stage
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('log', 'smtp', 'queue', 'spool')
+
+# Permanent rejections of one message's addresses; the server itself is fine
+ADDRESS_REJECTIONS = (550, 551, 552, 553)
+
+
+def build_message(from_email, to_email, subject, html_body, attachments=()):
+    """Build the MIME message for an outgoing HTML email.
+
+    `attachments` is a list of ``(path, filename, content_type)``; with any
+    attachments the result is a `StreamingMessage`.
+    """
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    msg = MIMEMultipart('alternative')
+
+    # Create HTML part
+    html_part = MIMEText(html_body, 'html')
+    msg.attach(html_part)
+
+    if attachments:
+        body, msg = msg, MIMEMultipart('mixed', boundary=f"==={uuid.uuid4().hex}")
+        msg.attach(body)
+    msg['Subject'] = subject
+    msg['From'] = from_email
+    msg['To'] = to_email
+    return StreamingMessage(msg, attachments) if attachments else msg
+
+
+class StreamingMessage:
+    """Email whose file attachments are read from disk while it is sent.
+
+    `msg` is a ``multipart/mixed`` message holding the headers and the HTML
+    part. `smtp_data` produces the DATA section for SMTP with each file
+    base64-encoded piece by piece, so a message is never held in memory whole.
+    """
+
+    # 57 input bytes make one 76 character base64 line
+    CHUNK_SIZE = 57 * 1024
+
+    def __init__(self, msg, attachments):
+        self.msg = msg
+        self.attachments = attachments
+
+    def __getitem__(self, name):
+        return self.msg[name]
+
+    def get_all(self, name, failobj=None):
+        return self.msg.get_all(name, failobj)
+
+    def envelope(self):
+        """``(sender, recipients)`` from the From/To/Cc headers"""
+        from email.utils import getaddresses
+
+        sender = getaddresses([self.msg['From']])[0][1]
+        recipients = [address for _, address in getaddresses(self.get_all('To', []) + self.get_all('Cc', []))]
+        return sender, recipients
+
+    def smtp_data(self):
+        """Yield the dot-stuffed message in CRLF-terminated chunks, without the final '.' line"""
+        import email.policy
+        from email.message import Message
+
+        boundary = self.msg.get_boundary()
+        closing = f"--{boundary}--".encode('ascii')
+        head = self.msg.as_bytes(policy=email.policy.SMTP)
+        yield re.sub(rb'(?m)^\.', b'..', head[:head.rindex(closing)])
+
+        for path, filename, content_type in self.attachments:
+            part = Message()
+            part['Content-Type'] = content_type if '/' in content_type else 'application/octet-stream'
+            part['Content-Transfer-Encoding'] = 'base64'
+            part.add_header('Content-Disposition', 'attachment',
+                            filename=filename if filename.isascii() else ('utf-8', '', filename))
+            yield f"--{boundary}\r\n".encode('ascii') + part.as_bytes(policy=email.policy.SMTP)
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = f.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    # base64 lines never start with '.', so no dot-stuffing is needed
+                    yield base64.encodebytes(chunk).replace(b'\n', b'\r\n')
+        yield closing + b'\r\n'
+
+
+def log_email(to_email, subject, html_body, is_client_email=False, attachments=()):
+    """Log an email instead of sending it"""
+    logger.info(f"Email to {to_email} not sent (MAIL_BACKEND=log): {subject}"
+                + (f" with {len(attachments)} attachment(s)" if attachments else ""))
+    logger.debug(html_body)
+    return True
+
+
+def provider_fault(exc):
+    """Whether a send failure says something about the SMTP server (for the circuit breaker)"""
+    return not address_rejected(exc)
+
+
+def address_rejected(exc):
+    """Whether the server permanently refused this message's addresses, so resending cannot help"""
+    if getattr(exc, 'recipients', None):
+        # smtplib.SMTPRecipientsRefused
+        return True
+    return getattr(exc, 'smtp_code', getattr(exc, 'code', None)) in ADDRESS_REJECTIONS
+
+
+def guarded(breaker):
+    """``breaker.guard`` counting only provider faults, or a no-op without a breaker"""
+    return breaker.guard(provider_fault) if breaker is not None else nullcontext()
+
+
+class SMTPSender:
+    """Sends HTML email over pooled SMTP sessions, failing fast while `breaker` is open"""
+
+    def __init__(self, config, pool=None, breaker=None):
+        self.config = config
+        self.breaker = breaker
+        self._pool = pool
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        """The `SMTPConnectionPool`, built on first use so that startup does not import smtplib"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    from .smtp_pool import create_smtp_pool
+
+                    config = self.config
+                    self._pool = create_smtp_pool(config.smtp_server, config.smtp_port, config.smtp_username,
+                                                  config.smtp_password)
+        return self._pool
+
+    def send(self, to_email, subject, html_body, is_client_email=False, attachments=()):
+        """Send email using SMTP configuration; a failed send raises (`CircuitOpenError` while the circuit is open)"""
+        if not self.config.smtp_configured:
+            logger.warning("SMTP credentials not configured. Email not sent.")
+            return False
+
+        try:
+            msg = build_message(self.config.from_email, to_email, subject, html_body, attachments)
+
+            # Send over a pooled SMTP session
+            with guarded(self.breaker), stage('send_client' if is_client_email else 'send_admin'):
+                self.pool.send_message(msg)
+
+            logger.info(f"Email sent successfully to {to_email}", extra={'sample': True})
+            return True
+
+        except CircuitOpenError:
+            SMTP_CIRCUIT_REJECTIONS.inc()
+            logger.warning(f"SMTP circuit open, email to {to_email} not attempted")
+            # Not a failed attempt: the queue passes it on so the message keeps its retry budget
+            raise
+        except Exception:
+            MAIL_SEND_FAILURES.inc('client' if is_client_email else 'admin')
+            # Logged by the queue, whose `on_failed` decides from the error whether to retry
+            raise
+
+
+def create_delivery(config, breaker=None):
+    """Build the delivery backend named by ``config.mail_backend``; SMTP sends go through `breaker`"""
+    backend = config.mail_backend.lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown MAIL_BACKEND {config.mail_backend!r}, expected one of: {', '.join(BACKENDS)}")
+    if backend == 'log':
+        return MailQueue(log_email, workers=0)
+    if backend == 'spool':
+        from .mail_spool import SpoolQueue, create_mail_spool
+
+        return SpoolQueue(create_mail_spool(config.base_dir))
+
+    sender = SMTPSender(config, breaker=breaker)
+    if backend == 'smtp':
+        return MailQueue(sender.send, workers=0)
+    # Background delivery so /submit does not wait on the SMTP server
+    return create_mail_queue(sender.send)
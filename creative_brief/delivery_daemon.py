@@ -0,0 +1,187 @@
+"""Standalone mail delivery daemon: ``python -m creative_brief.delivery_daemon``.
+
+Runs as its own Procfile process type (``mailer``) next to ``web`` when the
+web workers use ``MAIL_BACKEND=spool``. A supervisor starts
+MAIL_DAEMON_PROCESSES worker processes and restarts any that die. Each
+worker claims messages from the spool and sends them on its own threaded
+`MailQueue` (MAIL_WORKERS threads over pooled SMTP sessions, behind the
+SMTP circuit breaker), so mail throughput scales with the daemon and not with
+the HTTP workers.
+
+A delivered message has its receipts recorded in the submission store. A
+failed one goes to the retry store, which the workers also poll, just like
+mail sent from the web process. See `creative_brief.mail_spool` for how
+claims and checkpoints survive a crash.
+"""
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+from .circuit_breaker import CircuitOpenError
+from .config import Config, load_env_file
+from .log_pipeline import bound_request_id, configure_logging
+from .mail_spool import create_mail_spool
+from .services import BriefService
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryWorker:
+    """Feeds spooled messages to one process's mail queue"""
+
+    def __init__(self, service, spool, poll_interval=1.0, lease=300.0, batch_size=None):
+        self.service = service
+        self.spool = spool
+        self.poll_interval = poll_interval
+        self.lease = lease
+        # Claim only what the mail threads can start on soon, so other processes get the rest
+        self.batch_size = batch_size or max(1, 2 * service.mail_queue.workers)
+        self._stop = threading.Event()
+        # Set when a send finishes or on stop, to claim again without waiting out the poll interval
+        self._wake = threading.Event()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def run(self):
+        """Claim and send until `stop` is called, then let the queue drain"""
+        if self.service.mail_retry is not None:
+            self.service.mail_retry.start()
+        next_recovery = 0.0
+        while not self._stop.is_set():
+            if time.monotonic() >= next_recovery:
+                self.recover()
+                next_recovery = time.monotonic() + min(self.lease, 60.0)
+            self._wake.clear()
+            if not self.run_once():
+                self._wake.wait(self.poll_interval)
+        self.service.mail_queue.stop()
+        if self.service.mail_retry is not None:
+            self.service.mail_retry.stop()
+
+    def run_once(self):
+        """Claim a batch if there is room; returns how many messages were claimed"""
+        breaker = self.service.smtp_breaker
+        limit = breaker.permits() if breaker is not None else None
+        with self._lock:
+            room = self.batch_size - self._in_flight
+            if limit is not None:
+                # Circuit not closed: nothing, or the one probe once nothing else is in flight
+                room = min(room, limit) if self._in_flight == 0 else 0
+        if room <= 0:
+            return 0
+        claimed = self.spool.claim(room)
+        for path, message in claimed:
+            self._send(path, message)
+        return len(claimed)
+
+    def recover(self):
+        """Requeue expired claims and finish messages sent before a crash"""
+        for path, message in self.spool.recover(self.lease):
+            self._record_sent(path, message)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _send(self, path, message):
+        receipts = [tuple(receipt) for receipt in message['receipts']]
+        with self._lock:
+            self._in_flight += 1
+
+        def on_sent():
+            self._done()
+            self._record_sent(self.spool.checkpoint(path), message)
+
+        def on_failed(error=None):
+            self._done()
+            if isinstance(error, CircuitOpenError):
+                # Never attempted; back in the spool for when the circuit lets mail through
+                self.spool.release(path)
+                return
+            retry = self.service.mail_retry
+            if retry is not None:
+                retry.schedule(message['to'], message['subject'], message['html_body'], receipts,
+                               message['options'], error)
+            else:
+                logger.error(f"Email to {message['to']} failed and MAIL_RETRY_ENABLED is false, dropping it")
+            self.spool.finish(path)
+
+        # Logged under the id of the request that spooled the message
+        with bound_request_id(message.get('request_id')):
+            self.service.mail_queue.enqueue(message['to'], message['subject'], message['html_body'],
+                                            on_sent=on_sent, on_failed=on_failed, **message['options'])
+
+    def _record_sent(self, path, message):
+        self.service.mark_sent([tuple(receipt) for receipt in message['receipts']])
+        self.spool.finish(path)
+
+    def _done(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._wake.set()
+
+
+def run_worker():
+    """Body of one daemon process"""
+    # This process is the one that sends
+    config = Config.from_env().replace(mail_backend='queue')
+    service = BriefService(config)
+    service.metrics_collector.start()
+    worker = DeliveryWorker(
+        service,
+        create_mail_spool(config.base_dir),
+        poll_interval=float(os.getenv('MAIL_DAEMON_POLL_INTERVAL', 1)),
+        lease=float(os.getenv('MAIL_DAEMON_LEASE', 300)),
+    )
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+    logger.info(f"Delivery worker {os.getpid()} started with {service.mail_queue.workers} mail threads")
+    try:
+        worker.run()
+        logger.info(f"Delivery worker {os.getpid()} stopped")
+    finally:
+        # multiprocessing children leave through os._exit, which skips the atexit hooks
+        # that write the last metrics snapshot and drain the log queue
+        service.metrics_collector.write()
+        logging.shutdown()
+
+
+def main():
+    """Start MAIL_DAEMON_PROCESSES workers and keep them running until SIGTERM/SIGINT"""
+    load_env_file()
+    configure_logging()
+    processes = int(os.getenv('MAIL_DAEMON_PROCESSES', 2))
+    stopping = threading.Event()
+
+    def shutdown(signum, frame):
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    workers = {}
+    while not stopping.is_set():
+        for slot in range(processes):
+            process = workers.get(slot)
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                logger.error(f"Delivery worker {process.pid} exited with {process.exitcode}, restarting")
+            process = multiprocessing.Process(target=run_worker, name=f"mailer-{slot}", daemon=False)
+            process.start()
+            workers[slot] = process
+        stopping.wait(1.0)
+
+    logger.info("Stopping delivery workers")
+    for process in workers.values():
+        if process.is_alive():
+            process.terminate()
+    for process in workers.values():
+        process.join(30)
+
+
+if __name__ == '__main__':
+    main()
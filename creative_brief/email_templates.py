@@ -0,0 +1,347 @@
+"""Precompiled HTML email templates.
+
+Template sources are parsed once at import into literal fragments and
+placeholder names. The admin email's section/field layout is turned into a
+render plan by filling in every label and CSS class up front, so rendering a
+message is a single ``''.join`` over ready-made fragments and the submitted
+values.
+"""
+import html
+from functools import lru_cache
+from string import Formatter
+
+from .schema import SECTIONS
+
+
+class Template:
+    """A ``str.format``-style template split into fragments at construction"""
+
+    def __init__(self, source):
+        self.fragments = ['']
+        self.names = []
+        for literal, name, _, _ in Formatter().parse(source):
+            self.fragments[-1] += literal
+            if name is not None:
+                self.names.append(name)
+                self.fragments.append('')
+
+    def partial(self, **values):
+        """Return a new template with some placeholders already filled in"""
+        compiled = Template.__new__(Template)
+        compiled.fragments = [self.fragments[0]]
+        compiled.names = []
+        for name, literal in zip(self.names, self.fragments[1:]):
+            if name in values:
+                compiled.fragments[-1] += str(values[name]) + literal
+            else:
+                compiled.names.append(name)
+                compiled.fragments.append(literal)
+        return compiled
+
+    def render_into(self, parts, values):
+        """Append the rendered fragments to the list `parts`"""
+        chunk = [None] * (2 * len(self.names) + 1)
+        chunk[::2] = self.fragments
+        chunk[1::2] = [values[name] for name in self.names]
+        parts += chunk
+
+    def render(self, **values):
+        chunk = [None] * (2 * len(self.names) + 1)
+        chunk[::2] = self.fragments
+        chunk[1::2] = [values[name] for name in self.names]
+        return ''.join(chunk)
+
+
+ADMIN_SECTIONS = tuple(
+    (section_name, tuple((field.name, field.label) for field in fields))
+    for section_name, fields in SECTIONS
+)
+
+HIGHLIGHT_FIELDS = ('projectTitle', 'email', 'deliverables')
+
+ADMIN_HEAD = Template("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset='UTF-8'>
+        <style>
+            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }}
+            .header {{ background: linear-gradient(135deg, #2c3e50 0%, #34495e 100%); color: white; padding: 30px; text-align: center; }}
+            .header h1 {{ margin: 0; font-size: 28px; }}
+            .header p {{ margin: 10px 0 0 0; opacity: 0.9; }}
+            .content {{ padding: 30px; max-width: 800px; margin: 0 auto; }}
+            .section {{ margin-bottom: 30px; }}
+            .section h3 {{ color: #2c3e50; border-bottom: 2px solid #667eea; padding-bottom: 8px; margin-bottom: 15px; }}
+            .field {{ margin-bottom: 15px; }}
+            .field-label {{ font-weight: bold; color: #555; margin-bottom: 5px; }}
+            .field-value {{ 
+                padding: 12px; 
+                background: #f8f9fa; 
+                border-left: 4px solid #667eea; 
+                border-radius: 0 4px 4px 0;
+                word-wrap: break-word;
+            }}
+            .footer {{ 
+                background: #f1f1f1; 
+                padding: 20px; 
+                text-align: center; 
+                font-size: 14px; 
+                color: #666; 
+                margin-top: 30px;
+            }}
+            .priority {{ background: #fff3cd; border-left-color: #ffc107; }}
+            .highlight {{ background: #e8f4fd; border-left-color: #2196f3; }}
+        </style>
+    </head>
+    <body>
+        <div class='header'>
+            <h1>{title}</h1>
+            <p>ChronicleChraft Creative Solutions</p>
+        </div>
+        
+        <div class='content'>
+    """)
+
+ADMIN_SECTION = Template("""
+            <div class='section'>
+                <h3>{section_name}</h3>
+        """)
+
+ADMIN_FIELD = Template("""
+                    <div class='field'>
+                        <div class='field-label'>{field_label}:</div>
+                        <div class='field-value {css_class}'>{value}</div>
+                    </div>
+                """)
+
+ADMIN_NOTES = Template("""
+            <div class='section'>
+                <h3>Additional Notes</h3>
+                <div class='field'>
+                    <div class='field-value priority'>{notes}</div>
+                </div>
+            </div>
+        """)
+
+ADMIN_ATTACHMENT = Template("""
+                <div class='field'>
+                    <div class='field-value'>{filename} ({size}) - {delivery}</div>
+                </div>
+        """)
+
+ADMIN_FOOTER = Template("""
+        </div>
+        
+        <div class='footer'>
+            <p><strong>Submission Details:</strong></p>
+            <p>Submitted on {submitted_at}</p>
+            <p>From IP: {remote_addr}</p>
+            <p>ChronicleChraft Creative Solutions | {website_url}</p>
+        </div>
+    </body>
+    </html>
+    """)
+
+DIGEST_ENTRY = Template("""
+            <div class='section'>
+                <h3>Submission #{submission_id}: {project_title}</h3>
+                <div class='field'>
+                    <div class='field-value highlight'>Submitted on {submitted_at} from {remote_addr}</div>
+                </div>
+            </div>
+        """)
+
+DIGEST_FOOTER = Template("""
+        </div>
+        
+        <div class='footer'>
+            <p><strong>Digest of {count} submissions</strong></p>
+            <p>Sent on {sent_at}</p>
+            <p>ChronicleChraft Creative Solutions | {website_url}</p>
+        </div>
+    </body>
+    </html>
+    """)
+
+CLIENT_EMAIL = Template("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset='UTF-8'>
+        <style>
+            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; margin: 0; padding: 0; }}
+            .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; }}
+            .content {{ padding: 30px; max-width: 600px; margin: 0 auto; }}
+            .highlight {{ background: #f0f8ff; padding: 15px; border-radius: 8px; border-left: 4px solid #667eea; }}
+            .footer {{ background: #f8f9fa; padding: 20px; text-align: center; color: #666; }}
+            .button {{ 
+                display: inline-block; 
+                padding: 12px 24px; 
+                background: #667eea; 
+                color: white; 
+                text-decoration: none; 
+                border-radius: 6px; 
+                margin: 20px 0;
+            }}
+        </style>
+    </head>
+    <body>
+        <div class='header'>
+            <h1>Thank You!</h1>
+            <p>Your Creative Brief Has Been Received</p>
+        </div>
+        
+        <div class='content'>
+            <p>Dear {full_name},</p>
+            
+            <p>Thank you for submitting your creative brief for <strong>"{project_title}"</strong>.</p>
+            
+            <div class='highlight'>
+                <h3>What happens next?</h3>
+                <ul>
+                    <li>Our team will review your detailed requirements within 24-48 hours</li>
+                    <li>We'll prepare a customized proposal based on your specifications</li>
+                    <li>You'll receive a follow-up email with project timeline and next steps</li>
+                </ul>
+            </div>
+            
+            <p>We're excited to work with you on this project and bring your vision to life!</p>
+            
+            <p>If you have any urgent questions or need to add additional information, please don't hesitate to contact us:</p>
+            
+            <ul>
+                <li><strong>Email:</strong> {to_email}</li>
+                <li><strong>Website:</strong> <a href="{website_url}">{website_url}</a></li>
+            </ul>
+            
+            <a href="{website_url}" class="button">Visit Our Website</a>
+            
+            <p>Best regards,<br>
+            <strong>The ChronicleChraft Team</strong><br>
+            Creative Solutions</p>
+        </div>
+        
+        <div class='footer'>
+            <p>This email was sent in response to your creative brief submission on {sent_on}</p>
+            <p>ChronicleChraft Creative Solutions | {website_url}</p>
+        </div>
+    </body>
+    </html>
+    """)
+
+
+@lru_cache(maxsize=64)
+def _format_timestamp(timestamp, fmt):
+    return timestamp.strftime(fmt)
+
+
+def _compile_admin_plan():
+    """Pre-render every section header and field wrapper of the admin email"""
+    plan = []
+    for section_name, fields in ADMIN_SECTIONS:
+        section_open = ADMIN_SECTION.render(section_name=section_name)
+        field_plan = []
+        for field_key, field_label in fields:
+            css_class = 'highlight' if field_key in HIGHLIGHT_FIELDS else ''
+            field = ADMIN_FIELD.partial(field_label=field_label, css_class=css_class)
+            field_plan.append((field_key, field.fragments[0], field.fragments[1]))
+        plan.append((section_open, tuple(field_plan)))
+    return tuple(plan)
+
+
+ADMIN_HEAD_HTML = ADMIN_HEAD.render(title='New Creative Brief Submission')
+ADMIN_PLAN = _compile_admin_plan()
+
+ADMIN_TIME_FORMAT = '%B %d, %Y at %I:%M %p'
+
+
+def _render_admin_sections(parts, form_data):
+    for section_open, fields in ADMIN_PLAN:
+        parts.append(section_open)
+        for field_key, before, after in fields:
+            value = form_data.get(field_key)
+            if value:
+                parts.append(before)
+                parts.append(value.replace('\n', '<br>'))
+                parts.append(after)
+        parts.append('</div>')
+
+    if form_data.get('additionalNotes'):
+        ADMIN_NOTES.render_into(parts, {'notes': form_data['additionalNotes'].replace('\n', '<br>')})
+
+
+def _format_size(size):
+    if size < 1024:
+        return f"{size} bytes"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def _render_attachments(parts, attachments):
+    """`attachments` are dicts with filename, size and the download url (None if attached to the email)"""
+    parts.append(ADMIN_SECTION.render(section_name='Attachments'))
+    for attachment in attachments:
+        url = attachment['url']
+        ADMIN_ATTACHMENT.render_into(parts, {
+            'filename': html.escape(attachment['filename']),
+            'size': _format_size(attachment['size']),
+            'delivery': f"<a href='{html.escape(url)}'>download</a>" if url else 'attached to this email',
+        })
+    parts.append('</div>')
+
+
+def _format_admin_time(timestamp):
+    return _format_timestamp(timestamp.replace(second=0, microsecond=0), ADMIN_TIME_FORMAT)
+
+
+def render_admin_email(form_data, submitted_at, remote_addr, website_url, attachments=()):
+    """Render the admin notification for `form_data`"""
+    parts = [ADMIN_HEAD_HTML]
+    _render_admin_sections(parts, form_data)
+    if attachments:
+        _render_attachments(parts, attachments)
+    ADMIN_FOOTER.render_into(parts, {
+        'submitted_at': _format_admin_time(submitted_at),
+        'remote_addr': remote_addr,
+        'website_url': website_url,
+    })
+    return ''.join(parts)
+
+
+def render_admin_digest(entries, sent_at, website_url):
+    """Render one admin email covering several submissions.
+
+    `entries` is a list of ``(submission_id, form_data, submitted_at, remote_addr)``.
+    """
+    count = len(entries)
+    parts = []
+    ADMIN_HEAD.render_into(parts, {'title': f"{count} New Creative Brief Submissions"})
+    for submission_id, form_data, submitted_at, remote_addr in entries:
+        DIGEST_ENTRY.render_into(parts, {
+            'submission_id': str(submission_id),
+            'project_title': form_data.get('projectTitle', ''),
+            'submitted_at': _format_admin_time(submitted_at),
+            'remote_addr': remote_addr,
+        })
+        _render_admin_sections(parts, form_data)
+    DIGEST_FOOTER.render_into(parts, {
+        'count': str(count),
+        'sent_at': _format_admin_time(sent_at),
+        'website_url': website_url,
+    })
+    return ''.join(parts)
+
+
+@lru_cache(maxsize=8)
+def _client_template(to_email, website_url):
+    return CLIENT_EMAIL.partial(to_email=to_email, website_url=website_url)
+
+
+def render_client_email(form_data, sent_on, to_email, website_url):
+    """Render the confirmation email sent back to the client"""
+    return _client_template(to_email, website_url).render(
+        full_name=form_data.get('fullName', 'Valued Client'),
+        project_title=form_data.get('projectTitle', 'your project'),
+        sent_on=_format_timestamp(sent_on.date(), '%B %d, %Y'),
+    )
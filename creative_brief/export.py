@@ -0,0 +1,93 @@
+"""Bulk export of stored submissions as CSV or JSON Lines.
+
+Exports are generators of text chunks: rows are read from the store in
+batches and written out one by one, so neither the HTTP endpoint nor the
+``flask export-submissions`` command holds more than a batch in memory,
+however many briefs are stored.
+
+An export covers the submissions that existed when it started, up to the
+id it reports as its cursor. Passing that cursor back as ``after_id`` on the
+next run exports only what arrived in between.
+
+CSV cells that a spreadsheet would read as a formula (starting with ``=``,
+``+``, ``-``, ``@``, a tab or a carriage return) are prefixed with ``'``, so a
+brief cannot smuggle a formula into whoever opens the export. JSON Lines are
+written as submitted.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+
+from .schema import FIELD_NAMES
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+METADATA_COLUMNS = ('id', 'submitted_at', 'remote_addr', 'admin_sent_at', 'client_sent_at')
+COLUMNS = METADATA_COLUMNS + FIELD_NAMES
+
+# Rows written to the CSV buffer before it is handed out as one chunk
+ROWS_PER_CHUNK = 100
+
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def export_records(store, after_id=0, created_from=None):
+    """``(cursor, records)``: the id the export runs up to and a generator of flat records"""
+    cursor = store.last_id()
+
+    def records():
+        for row in store.export(after_id, created_from, up_to_id=cursor):
+            record = {
+                'id': row['id'],
+                'submitted_at': _isoformat(row['created_at']),
+                'remote_addr': row['remote_addr'],
+                'admin_sent_at': _isoformat(row['admin_sent_at']),
+                'client_sent_at': _isoformat(row['client_sent_at']),
+            }
+            for name in FIELD_NAMES:
+                record[name] = row['data'].get(name, '')
+            yield record
+
+    return max(cursor, after_id), records()
+
+
+def render(records, fmt):
+    """Text chunks of `records` in `fmt` ('csv' or 'jsonl')"""
+    if fmt == 'csv':
+        return _render_csv(records)
+    if fmt == 'jsonl':
+        return (json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def parse_since(value):
+    """Epoch seconds of an ISO date or date and time (local time)"""
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _render_csv(records):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, COLUMNS, extrasaction='ignore')
+    writer.writeheader()
+    for count, record in enumerate(records, 1):
+        writer.writerow({name: _csv_cell(value) for name, value in record.items()})
+        if count % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _csv_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _isoformat(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
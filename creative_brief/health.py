@@ -0,0 +1,198 @@
+"""Liveness and readiness probes served from cached check results.
+
+``/health/live`` only says the process answers. ``/health/ready`` reports
+what `HealthChecker` last found: a background thread checks that the
+submission database and upload directory are writable, that the mail
+backlog is under HEALTH_MAX_BACKLOG, and, every HEALTH_SMTP_INTERVAL
+seconds, that the SMTP server accepts a connection and login. The probe
+endpoint never runs a check itself; it returns a response body rendered
+when the checks last ran.
+
+The checker starts with the app (and again in each forked worker). Every
+round publishes a verdict as soon as the local checks are done and another
+once the slow SMTP check has finished, so a new worker is ready after a few
+milliseconds, not after an SMTP login; until its first run the SMTP check
+is reported as ``pending``.
+
+Storage and in-process backlog failures make the instance not ready (503).
+An unreachable SMTP server only makes it ``degraded``: submissions are
+still stored and their mail is retried. Results older than `stale_after`
+also count as not ready, so a stuck checker cannot report a stale success.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+LIVE_BODY = json.dumps({'status': 'alive'}).encode()
+
+
+class _Check:
+    __slots__ = ('name', 'func', 'critical', 'interval', 'slow', 'due', 'result')
+
+    def __init__(self, name, func, critical, interval, slow):
+        self.name = name
+        self.func = func
+        self.critical = critical
+        self.interval = interval
+        self.slow = slow
+        self.due = 0.0
+        self.result = None
+
+
+class HealthChecker:
+    """Runs registered checks on a background thread and keeps the verdict as a ready-made response"""
+
+    def __init__(self, interval=10.0, stale_after=None):
+        self.interval = interval
+        self.stale_after = stale_after or max(60.0, 3 * interval)
+        self._checks = []
+        # (body, status, monotonic time of the run); swapped whole, so readers need no lock
+        self._verdict = (self._render('starting', {}), 503, None)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def add(self, name, func, critical=True, interval=None, slow=False):
+        """Register `func`, which returns a dict of details (or None) and raises on failure.
+
+        A failing `critical` check makes the instance not ready; any other
+        failure only marks it degraded. `slow` checks (network round trips)
+        run after the verdict of the others has been published.
+        """
+        self._checks.append(_Check(name, func, critical, interval or self.interval, slow))
+
+    def readiness(self):
+        """``(body, status)`` of the latest verdict; never runs a check"""
+        self.start()
+        body, status, checked_at = self._verdict
+        if checked_at is not None and time.monotonic() - checked_at > self.stale_after:
+            return self._render('stale', {}), 503
+        return body, status
+
+    def run_checks(self, force=False):
+        """Run every check that is due (all of them with `force`), publishing the verdict before and after the slow ones"""
+        self._run_due([check for check in self._checks if not check.slow], force)
+        self._publish()
+        if self._run_due([check for check in self._checks if check.slow], force):
+            self._publish()
+
+    def start(self):
+        """Start checking in the background in this process; again after a fork"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._loop, name='health-checker', daemon=True)
+            self._thread.start()
+
+    def _run_due(self, checks, force):
+        now = time.monotonic()
+        ran = False
+        for check in checks:
+            if force or check.result is None or now >= check.due:
+                check.result = self._run(check)
+                check.due = time.monotonic() + check.interval
+                ran = True
+        return ran
+
+    def _publish(self):
+        done = [check for check in self._checks if check.result is not None]
+        if any(check.critical and not check.result['ok'] for check in done):
+            status, code = 'not_ready', 503
+        elif all(check.result['ok'] for check in done):
+            status, code = 'ready', 200
+        else:
+            status, code = 'degraded', 200
+        results = {check.name: check.result if check.result is not None else {'ok': None, 'pending': True}
+                   for check in self._checks}
+        self._verdict = (self._render(status, results), code, time.monotonic())
+
+    def _run(self, check):
+        previous = check.result
+        start = time.perf_counter()
+        try:
+            result = dict(check.func() or {}, ok=True)
+        except Exception as e:
+            result = {'ok': False, 'error': str(e) or type(e).__name__}
+            if previous is None or previous['ok']:
+                logger.warning(f"Health check {check.name} failing: {result['error']}")
+        else:
+            if previous is not None and not previous['ok']:
+                logger.info(f"Health check {check.name} recovered")
+        result['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        result['checked_at'] = datetime.now().isoformat(timespec='seconds')
+        return result
+
+    @staticmethod
+    def _render(status, checks):
+        return json.dumps({
+            'status': status,
+            'timestamp': datetime.now().isoformat(),
+            'checks': checks,
+        }).encode()
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_checks()
+            except Exception as e:
+                logger.error(f"Health checker failed: {str(e)}")
+            time.sleep(self.interval)
+
+
+def check_directory(path):
+    """Create, sync and remove a file in `path`"""
+    with tempfile.NamedTemporaryFile(dir=path, prefix='.health-') as f:
+        f.write(b'ok')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def create_health_checker(service):
+    """Build the `HealthChecker` for `service` from the HEALTH_* settings"""
+    config = service.config
+    max_backlog = int(os.getenv('HEALTH_MAX_BACKLOG', 500))
+    checker = HealthChecker(interval=float(os.getenv('HEALTH_CHECK_INTERVAL', 10)))
+
+    checker.add('submissions', service.submission_store.check_writable)
+    checker.add('uploads', lambda: check_directory(config.upload_dir))
+    if service.spooled:
+        checker.add('spool', lambda: check_directory(service.mail_queue.spool.directory))
+
+    def backlog():
+        queued = service.mail_queue.depth()
+        details = {'queued': queued}
+        if service.mail_retry is not None:
+            details['retry_waiting'], details['dead_letters'] = service.mail_retry.store.counts()
+        if queued > max_backlog:
+            raise RuntimeError(f"{queued} emails queued, more than {max_backlog}")
+        return details
+
+    # A backlog in this process's own queue clears faster with traffic sent elsewhere;
+    # the spool is drained by the delivery daemon whatever the web workers do
+    checker.add('mail_backlog', backlog, critical=not service.spooled)
+
+    if config.smtp_configured and config.mail_backend.lower() != 'log':
+        pool = None
+
+        def smtp():
+            nonlocal pool
+            if pool is None:
+                # Imported on the checker thread, not at startup
+                from .smtp_pool import create_smtp_pool
+
+                pool = create_smtp_pool(config.smtp_server, config.smtp_port, config.smtp_username,
+                                        config.smtp_password)
+            pool.check()
+            return {'server': f"{config.smtp_server}:{config.smtp_port}"}
+
+        checker.add('smtp', smtp, critical=False, interval=float(os.getenv('HEALTH_SMTP_INTERVAL', 300)), slow=True)
+    return checker
@@ -0,0 +1,152 @@
+"""Request body limits enforced while the body is read.
+
+``MAX_CONTENT_LENGTH`` caps the whole body: Werkzeug answers 413 straight
+from the Content-Length header and cuts off chunked bodies at the same size.
+Werkzeug 2.3 does not limit individual fields, though. A urlencoded body is
+read in one piece, and multipart's ``max_form_memory_size`` only bounds the
+parser's buffer. `LimitedFormDataParser` reads both kinds in chunks and
+raises 413 as soon as one field grows past ``MAX_FIELD_SIZE``, so memory per
+request is bounded by the caps however the form is sent. Uploaded files go
+to disk as they arrive (see `creative_brief.attachments`).
+"""
+from urllib.parse import parse_qsl
+
+from flask import current_app
+from flask.wrappers import Request
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import FormDataParser, MultiPartParser
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+from .services import get_service
+
+CHUNK_SIZE = 16 * 1024
+
+
+class LimitedMultiPartParser(MultiPartParser):
+    """`MultiPartParser` that also limits the size of each non-file field"""
+
+    def __init__(self, *args, max_field_size=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_field_size = max_field_size
+
+    def parse(self, stream, boundary, content_length):
+        parser = MultipartDecoder(boundary, max_form_memory_size=self.max_form_memory_size,
+                                  max_parts=self.max_form_parts)
+        fields = []
+        files = []
+        current_part = container = None
+        size = 0
+
+        try:
+            while True:
+                data = stream.read(self.buffer_size)
+                parser.receive_data(data or None)
+                event = parser.next_event()
+                while not isinstance(event, (Epilogue, NeedData)):
+                    if isinstance(event, Field):
+                        current_part, container, size = event, [], 0
+                    elif isinstance(event, File):
+                        current_part, size = event, 0
+                        container = self.start_file_streaming(event, content_length)
+                    elif isinstance(event, Data):
+                        if isinstance(current_part, Field):
+                            size += len(event.data)
+                            if self.max_field_size is not None and size > self.max_field_size:
+                                raise RequestEntityTooLarge()
+                            container.append(event.data)
+                            if not event.more_data:
+                                value = b''.join(container).decode(self.get_part_charset(current_part.headers), self.errors)
+                                fields.append((current_part.name, value))
+                        else:
+                            container.write(event.data)
+                            if not event.more_data:
+                                container.seek(0)
+                                files.append((current_part.name, FileStorage(
+                                    container, current_part.filename, current_part.name, headers=current_part.headers)))
+                                container = None
+                    event = parser.next_event()
+                if not data:
+                    break
+        except BaseException:
+            # Uploads spooled to disk so far are removed with their files
+            if container is not None and not isinstance(container, list):
+                container.close()
+            for _, file in files:
+                file.close()
+            raise
+
+        return self.cls(fields), self.cls(files)
+
+
+class LimitedFormDataParser(FormDataParser):
+    """`FormDataParser` that raises 413 once any single field exceeds `max_field_size` bytes"""
+
+    max_field_size = None
+
+    def _parse_urlencoded(self, stream, mimetype, content_length, options):
+        if (self.max_form_memory_size is not None and content_length is not None
+                and content_length > self.max_form_memory_size):
+            raise RequestEntityTooLarge()
+
+        items = []
+        pending = b''
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if chunk:
+                # Everything before the last '&' is complete name=value pairs
+                *complete, pending = (pending + chunk).split(b'&')
+            else:
+                complete, pending = [pending], b''
+            for pair in complete:
+                self._check_size(len(pair), len(items))
+                if pair:
+                    items.extend(parse_qsl(pair.decode('utf-8', 'replace'), keep_blank_values=True))
+            self._check_size(len(pending), len(items))
+            if not chunk:
+                break
+        return stream, self.cls(items), self.cls()
+
+    def _parse_multipart(self, stream, mimetype, content_length, options):
+        parser = LimitedMultiPartParser(
+            stream_factory=self.stream_factory,
+            max_form_memory_size=self.max_form_memory_size,
+            max_form_parts=self.max_form_parts,
+            cls=self.cls,
+            max_field_size=self.max_field_size,
+        )
+        boundary = options.get('boundary', '').encode('ascii')
+        if not boundary:
+            raise ValueError('Missing boundary')
+        form, files = parser.parse(stream, boundary, content_length)
+        return stream, form, files
+
+    def _check_size(self, size, parts):
+        if self.max_field_size is not None and size > self.max_field_size:
+            raise RequestEntityTooLarge()
+        if self.max_form_parts is not None and parts > self.max_form_parts:
+            raise RequestEntityTooLarge()
+
+
+class LimitedRequest(Request):
+    """Request whose form parsing honours the ``MAX_FIELD_SIZE`` and ``MAX_FORM_PARTS`` config keys.
+
+    Uploaded files are written to the app's attachment store as they arrive.
+    """
+
+    form_data_parser_class = LimitedFormDataParser
+
+    @property
+    def max_form_parts(self):
+        return current_app.config['MAX_FORM_PARTS'] if current_app else Request.max_form_parts
+
+    def make_form_data_parser(self):
+        parser = super().make_form_data_parser()
+        if current_app:
+            parser.max_field_size = current_app.config['MAX_FIELD_SIZE']
+        return parser
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not current_app:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return get_service().attachment_store.spool()
@@ -0,0 +1,172 @@
+"""Non-blocking, structured logging with request correlation.
+
+`configure_logging` replaces ``logging.basicConfig`` in the entry points.
+Records are handed to a bounded in-memory queue on the calling thread and
+written to stderr by a listener thread, so a slow terminal or log collector
+never adds latency to a request. When the queue is full, records are
+dropped and counted in ``log_records_dropped_total`` rather than blocking;
+warnings and errors get a short grace period first.
+
+Every record carries the correlation id of the request that caused it. The
+id comes from a valid ``X-Request-ID`` header or is generated, is echoed in
+the response, and travels with each queued email. An SMTP failure on a mail
+worker thread, the event loop or the delivery daemon is therefore logged
+under the same ``request_id`` as the submission.
+
+Routine success messages pass ``extra={'sample': True}`` and are kept at
+LOG_SAMPLE_RATE; the rate is written into each kept record.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from .metrics import LOG_RECORDS_DROPPED, LOG_RECORDS_SAMPLED_OUT, REGISTRY
+
+request_id_var = ContextVar('request_id', default=None)
+
+# Accepted from clients as-is; anything else is replaced, so ids cannot forge log lines
+VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+
+# LogRecord attributes that are not `extra` fields
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id', 'sample'}
+
+
+@contextmanager
+def bound_request_id(request_id):
+    """Log everything in the ``with`` block under `request_id`"""
+    token = request_id_var.set(request_id)
+    try:
+        yield
+    finally:
+        request_id_var.reset(token)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _ContextFilter(logging.Filter):
+    """Stamps the request id and applies sampling, on the thread that logs"""
+
+    def __init__(self, sample_rate):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        if getattr(record, 'sample', False) and self.sample_rate < 1.0:
+            if random.random() >= self.sample_rate:
+                LOG_RECORDS_SAMPLED_OUT.inc()
+                return False
+            record.sample_rate = self.sample_rate
+        record.request_id = request_id_var.get()
+        return True
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """`QueueHandler` over a bounded queue, with its own listener thread per process"""
+
+    # Seconds a WARNING or worse may wait for room before it is dropped too
+    URGENT_WAIT = 0.05
+
+    def __init__(self, target, maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.target = target
+        self.maxsize = maxsize
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def prepare(self, record):
+        # Render the message and traceback here; the listener only formats
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = ''.join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=self.URGENT_WAIT)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(record.levelname)
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def flush(self):
+        """Stop the listener after it has written everything queued; a later record starts a new one"""
+        with self._start_lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+                self._listener = None
+                self._pid = None
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            if self._listener is not None:
+                # Forked: the parent's listener thread did not come along, nor may its queue's locks
+                self.queue = queue.Queue(self.maxsize)
+            self._listener = logging.handlers.QueueListener(self.queue, self.target, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+
+def configure_logging(default_format='json'):
+    """Install the queue handler on the root logger from the LOG_* settings; safe to call twice"""
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if isinstance(handler, BoundedQueueHandler):
+            return handler
+
+    fmt = os.getenv('LOG_FORMAT', default_format).lower()
+    target = logging.StreamHandler(sys.stderr)
+    if fmt == 'json':
+        target.setFormatter(JSONFormatter())
+    else:
+        target.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+
+    handler = BoundedQueueHandler(target, maxsize=int(os.getenv('LOG_QUEUE_SIZE', 10000)))
+    handler.addFilter(_ContextFilter(float(os.getenv('LOG_SAMPLE_RATE', 1.0))))
+    root.addHandler(handler)
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    REGISTRY.gauge('log_queue_depth', 'Log records waiting for the log writer thread', handler.depth)
+    atexit.register(handler.flush)
+    return handler
@@ -0,0 +1,266 @@
+"""Background delivery queue for outbound mail.
+
+`submit_form` hands rendered messages to a `MailQueue` instead of talking to
+the SMTP server itself. A small pool of daemon threads drains the queue and
+records the outcome of every job so it can be looked up later.
+"""
+import atexit
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .circuit_breaker import CircuitOpenError
+from .log_pipeline import bound_request_id, request_id_var
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = 'queued'
+STATUS_SENDING = 'sending'
+STATUS_SENT = 'sent'
+STATUS_FAILED = 'failed'
+
+_STOP = object()
+
+
+class MailQueue:
+    """Thread pool that delivers queued messages through `send_func`.
+
+    `send_func` is called as ``send_func(to_email, subject, html_body, **kwargs)``
+    and must return True on success, exactly like `send_email`. A failed send
+    raises, and the exception is logged and handed to `on_failed`; it is a
+    `CircuitOpenError` for a message not attempted because the circuit is
+    open.
+    """
+
+    def __init__(self, send_func, workers=2, maxsize=1000, status_limit=10000):
+        self.send_func = send_func
+        self.workers = workers
+        self.status_limit = status_limit
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+
+    def start(self):
+        """Start the worker threads for the current process.
+
+        Workers are started lazily so that a gunicorn master that imports the
+        app before forking does not hand dead threads to its children.
+        """
+        with self._lock:
+            if self._pid == os.getpid() and self._threads:
+                return
+            self._pid = os.getpid()
+            self._threads = []
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"mail-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def enqueue(self, to_email, subject, html_body, on_sent=None, on_failed=None, **kwargs):
+        """Queue a message for delivery and return its job id.
+
+        `on_sent`, if given, is called without arguments once the message has
+        been delivered, `on_failed` once the attempt has failed, with the
+        exception that failed it (None if `send_func` returned False). If the queue
+        is full the message is sent inline so that nothing is dropped. The
+        delivery is logged under the caller's request id.
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'to': to_email,
+            'subject': subject,
+            'status': STATUS_QUEUED,
+            'attempts': 0,
+            'queued_at': time.time(),
+            'finished_at': None,
+            'request_id': request_id_var.get(),
+        }
+        kwargs['on_sent'] = on_sent
+        kwargs['on_failed'] = on_failed
+        self._remember(job)
+
+        if self.workers <= 0:
+            self._deliver(job, html_body, kwargs)
+            return job_id
+
+        self.start()
+        try:
+            self._queue.put_nowait((job, html_body, kwargs))
+        except queue.Full:
+            logger.warning(f"Mail queue full, sending to {to_email} inline")
+            self._deliver(job, html_body, kwargs)
+        return job_id
+
+    def status(self, job_id):
+        """Return a copy of the job record for `job_id`, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def depth(self):
+        """Number of messages waiting for a worker"""
+        return self._queue.qsize()
+
+    def stop(self, timeout=10.0):
+        """Let the workers finish queued mail, then stop them"""
+        if self._pid != os.getpid():
+            return
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+    def _remember(self, job):
+        with self._lock:
+            self._jobs[job['id']] = job
+            while len(self._jobs) > self.status_limit:
+                self._jobs.popitem(last=False)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                job, html_body, kwargs = item
+                self._deliver(job, html_body, kwargs)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, job, html_body, kwargs):
+        with bound_request_id(job['request_id']):
+            self._send(job, html_body, kwargs)
+
+    def _send(self, job, html_body, kwargs):
+        job['status'] = STATUS_SENDING
+        job['attempts'] += 1
+        on_sent = kwargs.pop('on_sent', None)
+        on_failed = kwargs.pop('on_failed', None)
+        error = None
+        try:
+            sent = self.send_func(job['to'], job['subject'], html_body, **kwargs)
+        except CircuitOpenError as e:
+            # Already logged by the sender; `on_failed` decides what it costs
+            error, sent = e, False
+        except Exception as e:
+            logger.error(f"Failed to send email to {job['to']}: {str(e)}")
+            error, sent = e, False
+        job['status'] = STATUS_SENT if sent else STATUS_FAILED
+        job['finished_at'] = time.time()
+        callback, args = (on_sent, ()) if sent else (on_failed, (error,))
+        if callback is not None:
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.error(f"Mail job {job['id']} callback failed: {str(e)}")
+
+
+class AsyncMailQueue(MailQueue):
+    """`MailQueue` that delivers on an asyncio event loop instead of threads.
+
+    `send_func` is a coroutine function with the same signature and return
+    value as for `MailQueue`. `enqueue` may be called from any thread; at most
+    `concurrency` deliveries are in flight at once.
+    """
+
+    def __init__(self, send_func, loop, concurrency=10, status_limit=10000):
+        # Only the ASGI entry point needs asyncio; WSGI workers never import it
+        import asyncio
+
+        super().__init__(send_func, workers=0, status_limit=status_limit)
+        self.loop = loop
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks = set()
+        self._waiting = 0
+
+    def start(self):
+        pass
+
+    def enqueue(self, to_email, subject, html_body, on_sent=None, on_failed=None, **kwargs):
+        """Schedule a message for delivery on the loop and return its job id"""
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'to': to_email,
+            'subject': subject,
+            'status': STATUS_QUEUED,
+            'attempts': 0,
+            'queued_at': time.time(),
+            'finished_at': None,
+            'request_id': request_id_var.get(),
+        }
+        kwargs['on_sent'] = on_sent
+        kwargs['on_failed'] = on_failed
+        self._remember(job)
+        with self._lock:
+            self._waiting += 1
+        self.loop.call_soon_threadsafe(self._spawn, job, html_body, kwargs)
+        return job_id
+
+    def depth(self):
+        """Number of messages waiting for a delivery slot"""
+        return self._waiting
+
+    def stop(self, timeout=10.0):
+        pass
+
+    async def drain(self, timeout=10.0):
+        """Wait for in-flight deliveries to finish"""
+        import asyncio
+
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=timeout)
+
+    def _spawn(self, job, html_body, kwargs):
+        task = self.loop.create_task(self._deliver_async(job, html_body, kwargs))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver_async(self, job, html_body, kwargs):
+        # Tasks have their own context, so this stays with the delivery
+        request_id_var.set(job['request_id'])
+        async with self._semaphore:
+            with self._lock:
+                self._waiting -= 1
+            job['status'] = STATUS_SENDING
+            job['attempts'] += 1
+            on_sent = kwargs.pop('on_sent', None)
+            on_failed = kwargs.pop('on_failed', None)
+            error = None
+            try:
+                sent = await self.send_func(job['to'], job['subject'], html_body, **kwargs)
+            except CircuitOpenError as e:
+                error, sent = e, False
+            except Exception as e:
+                logger.error(f"Failed to send email to {job['to']}: {str(e)}")
+                error, sent = e, False
+        job['status'] = STATUS_SENT if sent else STATUS_FAILED
+        job['finished_at'] = time.time()
+        callback, args = (on_sent, ()) if sent else (on_failed, (error,))
+        if callback is not None:
+            try:
+                # Callbacks write to SQLite, keep them off the event loop (with the request id)
+                await self.loop.run_in_executor(None, contextvars.copy_context().run, callback, *args)
+            except Exception as e:
+                logger.error(f"Mail job {job['id']} callback failed: {str(e)}")
+
+
+def create_mail_queue(send_func):
+    """Build a `MailQueue` from MAIL_WORKERS / MAIL_QUEUE_SIZE and register shutdown"""
+    mail_queue = MailQueue(
+        send_func,
+        workers=int(os.getenv('MAIL_WORKERS', 2)),
+        maxsize=int(os.getenv('MAIL_QUEUE_SIZE', 1000)),
+    )
+    atexit.register(mail_queue.stop)
+    return mail_queue
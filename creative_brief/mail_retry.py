@@ -0,0 +1,316 @@
+"""Persistent retries for mail that could not be delivered.
+
+A failed send used to be logged and forgotten. Now the rendered message is
+written to SQLite together with the ``(submission_id, kind)`` receipts it
+would have marked sent, and `RetryScheduler` sends it again with jittered
+exponential backoff. After `max_attempts` failures the message moves to the
+dead-letter table, where it stays until ``flask replay-dead-letters`` puts it
+back in line.
+
+Every gunicorn worker polls the same database; a row is claimed by pushing
+its ``next_attempt_at`` past a lease in a single UPDATE, so only one worker
+resends it, and a worker that dies mid-send only delays it by the lease.
+A send the SMTP circuit breaker rejected was never attempted, so it is put
+back in line without using up an attempt. One whose addresses the server
+refused outright (550-553) goes straight to the dead letters, since no later
+attempt would fare better.
+"""
+import atexit
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from .circuit_breaker import CircuitOpenError
+from .delivery import address_rejected
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = "created_at, to_email, subject, html_body, options, receipts, attempts"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS retries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    to_email TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    html_body TEXT NOT NULL,
+    options TEXT NOT NULL,
+    receipts TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    next_attempt_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS retries_due ON retries (next_attempt_at);
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    to_email TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    html_body TEXT NOT NULL,
+    options TEXT NOT NULL,
+    receipts TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    failed_at REAL NOT NULL
+);
+"""
+
+
+class RetryStore:
+    """SQLite tables of messages waiting for another attempt and of dead letters"""
+
+    def __init__(self, path, busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.close()
+
+    def add(self, to_email, subject, html_body, options, receipts, attempts, next_attempt_at):
+        """Store a message for another attempt at `next_attempt_at`; returns its id"""
+        cursor = self._conn().execute(
+            f"INSERT INTO retries ({COLUMNS}, next_attempt_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (time.time(), to_email, subject, html_body, json.dumps(options), json.dumps(receipts),
+             attempts, next_attempt_at),
+        )
+        return cursor.lastrowid
+
+    def due(self, now, limit=50):
+        """Messages whose next attempt is due"""
+        rows = self._conn().execute(
+            "SELECT * FROM retries WHERE next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?", (now, limit)
+        ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def claim(self, record, lease_until):
+        """Take `record` for sending; False if another worker already did"""
+        cursor = self._conn().execute(
+            "UPDATE retries SET next_attempt_at = ? WHERE id = ? AND next_attempt_at = ?",
+            (lease_until, record['id'], record['next_attempt_at']),
+        )
+        return cursor.rowcount == 1
+
+    def reschedule(self, retry_id, attempts, next_attempt_at):
+        self._conn().execute(
+            "UPDATE retries SET attempts = ?, next_attempt_at = ? WHERE id = ?", (attempts, next_attempt_at, retry_id)
+        )
+
+    def delete(self, retry_id):
+        self._conn().execute("DELETE FROM retries WHERE id = ?", (retry_id,))
+
+    def bury(self, retry_id, attempts):
+        """Move a message to the dead-letter table"""
+        self._move(
+            f"INSERT INTO dead_letters ({COLUMNS}, failed_at)"
+            f" SELECT created_at, to_email, subject, html_body, options, receipts, ?, ? FROM retries WHERE id = ?",
+            (attempts, time.time(), retry_id),
+            "DELETE FROM retries WHERE id = ?", (retry_id,),
+        )
+
+    def revive(self, dead_ids=None):
+        """Move dead letters (all, or those in `dead_ids`) back to the retries, due now; returns how many"""
+        where, params = "", ()
+        if dead_ids:
+            where = f" WHERE id IN ({', '.join('?' * len(dead_ids))})"
+            params = tuple(dead_ids)
+        return self._move(
+            f"INSERT INTO retries ({COLUMNS}, next_attempt_at)"
+            f" SELECT created_at, to_email, subject, html_body, options, receipts, 0, ? FROM dead_letters{where}",
+            (0,) + params,
+            f"DELETE FROM dead_letters{where}", params,
+        )
+
+    def dead_letters(self, limit=None):
+        """Dead letters, oldest first (all of them unless `limit` is given)"""
+        if limit is None:
+            rows = self._conn().execute("SELECT * FROM dead_letters ORDER BY id").fetchall()
+        else:
+            rows = self._conn().execute("SELECT * FROM dead_letters ORDER BY id LIMIT ?", (limit,)).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def counts(self):
+        """``(waiting, dead)`` message counts"""
+        return tuple(self._conn().execute(
+            "SELECT (SELECT COUNT(*) FROM retries), (SELECT COUNT(*) FROM dead_letters)"
+        ).fetchone())
+
+    def receipts(self):
+        """Every ``(submission_id, kind)`` still owned by a retry or dead letter"""
+        conn = self._conn()
+        owned = set()
+        for table in ('retries', 'dead_letters'):
+            for (receipts,) in conn.execute(f"SELECT receipts FROM {table}"):
+                owned.update(tuple(receipt) for receipt in json.loads(receipts))
+        return owned
+
+    def _move(self, copy_sql, copy_params, delete_sql, delete_params):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            moved = conn.execute(copy_sql, copy_params).rowcount
+            conn.execute(delete_sql, delete_params)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return moved
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _row_to_dict(row):
+        record = dict(row)
+        record['options'] = json.loads(record['options'])
+        record['receipts'] = [tuple(receipt) for receipt in json.loads(record['receipts'])]
+        return record
+
+
+class RetryScheduler:
+    """Resends stored messages through `enqueue` with jittered exponential backoff.
+
+    `enqueue` has the signature of `MailQueue.enqueue`; `mark_sent` is called
+    with a message's receipts once it has been delivered. `permits` (if
+    given) works like `CircuitBreaker.permits`: it returns how many messages
+    may be resent now, or None for no limit. With the SMTP circuit open
+    nothing is resent; half-open, one message goes out per probe.
+    """
+
+    def __init__(self, store, enqueue, mark_sent, max_attempts=8, base_delay=30.0, max_delay=3600.0,
+                 poll_interval=5.0, lease=300.0, permits=None):
+        self.store = store
+        self.enqueue = enqueue
+        self.mark_sent = mark_sent
+        self.permits = permits
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def backoff(self, attempts):
+        """Seconds to wait after `attempts` failures: the capped exponential delay, jittered down to half"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return random.uniform(delay / 2, delay)
+
+    def schedule(self, to_email, subject, html_body, receipts, options, error=None):
+        """Store a message whose first attempt just failed with `error`.
+
+        A `CircuitOpenError` means there was no attempt: the message is due
+        as soon as the circuit lets mail through. A refused address is
+        stored as a dead letter straight away.
+        """
+        if isinstance(error, CircuitOpenError):
+            attempts, next_attempt_at = 0, time.time()
+        else:
+            attempts, next_attempt_at = 1, time.time() + self.backoff(1)
+        retry_id = self.store.add(to_email, subject, html_body, options, receipts, attempts, next_attempt_at)
+        if error is not None and address_rejected(error):
+            self.store.bury(retry_id, attempts)
+            logger.error(f"Email to {to_email} was refused ({str(error)}), moved to dead letters")
+            return
+        logger.warning(f"Email to {to_email} failed, will retry (retry {retry_id})")
+
+    def run_pending(self):
+        """Resend every message that is due; returns how many were handed to `enqueue`"""
+        sent = 0
+        # Messages put back during this run wait for the next poll
+        now = time.time()
+        while True:
+            limit = self.permits() if self.permits is not None else None
+            if limit == 0:
+                return sent
+            batch = [record for record in self.store.due(now, limit=limit or 50)
+                     if self.store.claim(record, time.time() + self.lease)]
+            for record in batch:
+                self._resend(record)
+            sent += len(batch)
+            if not batch or limit is not None:
+                # A limited run (one probe) waits for the next poll to see how it went
+                return sent
+
+    def start(self):
+        """Start polling in this process; again after a fork, since threads do not survive it"""
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='mail-retry', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            self._stop.set()
+            self._thread.join(self.poll_interval)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.run_pending()
+            except Exception as e:
+                logger.error(f"Mail retry poll failed: {str(e)}")
+
+    def _resend(self, record):
+        attempts = record['attempts'] + 1
+
+        def delivered():
+            self.store.delete(record['id'])
+            self.mark_sent(record['receipts'])
+            logger.info(f"Retry {record['id']} to {record['to_email']} delivered after {attempts} attempts")
+
+        def failed(error=None):
+            if isinstance(error, CircuitOpenError):
+                # Not attempted; due again once the circuit lets a message through
+                self.store.reschedule(record['id'], record['attempts'], time.time())
+            elif error is not None and address_rejected(error):
+                self.store.bury(record['id'], attempts)
+                logger.error(f"Email to {record['to_email']} was refused ({str(error)}), moved to dead letters")
+            elif attempts >= self.max_attempts:
+                self.store.bury(record['id'], attempts)
+                logger.error(f"Email to {record['to_email']} failed {attempts} times, moved to dead letters")
+            else:
+                self.store.reschedule(record['id'], attempts, time.time() + self.backoff(attempts))
+
+        self.enqueue(record['to_email'], record['subject'], record['html_body'],
+                     on_sent=delivered, on_failed=failed, **record['options'])
+
+
+def create_retry_scheduler(base_dir, enqueue, mark_sent, permits=None):
+    """Build a `RetryScheduler` from the MAIL_RETRY_* settings, or return None when disabled"""
+    if os.getenv('MAIL_RETRY_ENABLED', 'True').lower() != 'true':
+        return None
+    path = os.getenv('MAIL_RETRY_DB', os.path.join(base_dir, 'data', 'mail_retry.db'))
+    scheduler = RetryScheduler(
+        RetryStore(path),
+        enqueue,
+        mark_sent,
+        max_attempts=int(os.getenv('MAIL_RETRY_ATTEMPTS', 8)),
+        base_delay=float(os.getenv('MAIL_RETRY_BASE_DELAY', 30)),
+        max_delay=float(os.getenv('MAIL_RETRY_MAX_DELAY', 3600)),
+        poll_interval=float(os.getenv('MAIL_RETRY_POLL_INTERVAL', 5)),
+        permits=permits,
+    )
+    atexit.register(scheduler.stop)
+    return scheduler
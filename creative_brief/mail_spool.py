@@ -0,0 +1,191 @@
+"""Maildir-style spool of rendered messages for the delivery daemon.
+
+With ``MAIL_BACKEND=spool`` web workers do not send mail at all: each
+rendered message is written as a JSON file to ``tmp/`` and renamed into
+``new/``, so readers only ever see complete files. Delivery daemon workers
+(see `creative_brief.delivery_daemon`) claim a message by renaming it from
+``new/`` to ``cur/``; the rename succeeds for exactly one of them.
+
+Progress is checkpointed in the file name, maildir style. Once a message has
+been handed to the SMTP server its file gets the ``:2,S`` flag, and the
+file is removed after its receipts are recorded. A worker that dies
+mid-send leaves an unflagged file in ``cur/``, which is put back into
+``new/`` after the claim lease. A flagged file only has its receipts
+recorded and is not sent again.
+"""
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+
+from .log_pipeline import request_id_var
+
+logger = logging.getLogger(__name__)
+
+SENT_FLAG = ':2,S'
+
+
+class MailSpool:
+    """Directory with ``tmp``, ``new`` and ``cur`` subdirectories, shared by all processes on the host"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        for name in ('tmp', 'new', 'cur'):
+            os.makedirs(os.path.join(directory, name), exist_ok=True)
+
+    def put(self, message):
+        """Write `message` (a JSON-serializable dict) to the spool; returns its name"""
+        # Names sort by spool time, so the oldest message is claimed first
+        name = f"{time.time():.6f}.{uuid.uuid4().hex}.{socket.gethostname()}"
+        tmp_path = os.path.join(self.directory, 'tmp', name)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(message, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tmp_path, os.path.join(self.directory, 'new', name))
+        return name
+
+    def claim(self, limit):
+        """Take up to `limit` waiting messages, oldest first; returns ``[(path, message), ...]``"""
+        claimed = []
+        for name in sorted(os.listdir(os.path.join(self.directory, 'new'))):
+            if len(claimed) >= limit:
+                break
+            new_path = os.path.join(self.directory, 'new', name)
+            path = os.path.join(self.directory, 'cur', name)
+            try:
+                # Stamp the claim time for the lease before the file reaches cur/,
+                # so `recover` never sees it there with its old spool time
+                os.utime(new_path)
+                os.rename(new_path, path)
+            except FileNotFoundError:
+                # Another worker got there first
+                continue
+            message = self._read(path)
+            if message is not None:
+                claimed.append((path, message))
+        return claimed
+
+    def checkpoint(self, path):
+        """Flag a claimed message as sent; returns its new path"""
+        sent_path = path + SENT_FLAG
+        os.rename(path, sent_path)
+        return sent_path
+
+    def release(self, path):
+        """Put a claimed message back in line without a delivery attempt"""
+        try:
+            os.rename(path, os.path.join(self.directory, 'new', os.path.basename(path)))
+        except FileNotFoundError:
+            pass
+
+    def finish(self, path):
+        """Remove a message whose outcome is recorded elsewhere"""
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def recover(self, lease):
+        """Requeue messages claimed more than `lease` seconds ago; returns ``[(path, message), ...]``
+        of flagged ones, which were sent but not finished"""
+        sent = []
+        cutoff = time.time() - lease
+        for entry in os.scandir(os.path.join(self.directory, 'cur')):
+            try:
+                if entry.name.endswith(SENT_FLAG):
+                    message = self._read(entry.path)
+                    if message is not None:
+                        sent.append((entry.path, message))
+                elif entry.stat().st_mtime < cutoff:
+                    os.rename(entry.path, os.path.join(self.directory, 'new', entry.name))
+                    logger.warning(f"Requeued spooled message {entry.name} after its claim expired")
+            except FileNotFoundError:
+                continue
+        # Half-written files of a process that died while spooling
+        for entry in os.scandir(os.path.join(self.directory, 'tmp')):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                continue
+        return sent
+
+    def location(self, name):
+        """'new', 'cur' or None (delivered, or handed to the retry store)"""
+        for state in ('new', 'cur'):
+            if os.path.exists(os.path.join(self.directory, state, name)):
+                return state
+        return None
+
+    def depth(self):
+        """Messages waiting to be claimed"""
+        return len(os.listdir(os.path.join(self.directory, 'new')))
+
+    def receipts(self):
+        """Every ``(submission_id, kind)`` of a message still in the spool"""
+        owned = set()
+        for state in ('new', 'cur'):
+            for entry in os.scandir(os.path.join(self.directory, state)):
+                message = self._read(entry.path)
+                if message is not None:
+                    owned.update(tuple(receipt) for receipt in message['receipts'])
+        return owned
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.error(f"Unreadable spooled message {path}: {str(e)}")
+            return None
+
+
+class SpoolQueue:
+    """`MailQueue` interface for web workers: messages go to the spool for the delivery daemon.
+
+    Delivery happens in another process, so `on_sent`/`on_failed` are not
+    called; the daemon records the `receipts` stored with each message.
+    """
+
+    def __init__(self, spool):
+        self.spool = spool
+
+    def start(self):
+        pass
+
+    def enqueue(self, to_email, subject, html_body, on_sent=None, on_failed=None, receipts=(), **kwargs):
+        """Spool a message and return its name as the job id"""
+        return self.spool.put({
+            'to': to_email,
+            'subject': subject,
+            'html_body': html_body,
+            'options': kwargs,
+            'receipts': [list(receipt) for receipt in receipts],
+            'request_id': request_id_var.get(),
+        })
+
+    def status(self, job_id):
+        """Spool state of a message; None once it has left the spool"""
+        if '/' in job_id or job_id.startswith('.'):
+            return None
+        state = self.spool.location(job_id)
+        if state is None:
+            return None
+        return {'id': job_id, 'status': 'queued' if state == 'new' else 'sending'}
+
+    def depth(self):
+        return self.spool.depth()
+
+    def stop(self, timeout=10.0):
+        pass
+
+
+def create_mail_spool(base_dir):
+    """Open the spool at MAIL_SPOOL_DIR (default: data/mail_spool under `base_dir`)"""
+    return MailSpool(os.getenv('MAIL_SPOOL_DIR', os.path.join(base_dir, 'data', 'mail_spool')))
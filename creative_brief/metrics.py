@@ -0,0 +1,366 @@
+"""Prometheus-style metrics with multi-process aggregation.
+
+Counters and histograms are plain dicts guarded by one short lock per
+metric, so instrumenting a hot path costs well under a microsecond. Gauges
+are callbacks evaluated at scrape time.
+
+gunicorn runs several worker processes and a scrape only reaches one of them.
+When a metrics directory is configured, each process periodically writes a
+snapshot of its values to ``<dir>/<pid>-<start>.json``, where ``start`` is
+the process start time, so a recycled pid never overwrites an earlier
+process's counters. The process answering ``/metrics`` merges all
+snapshots: counters and histograms are summed over every file, and gauges
+only over processes still alive (a shared gauge, read from state every
+process sees, takes the largest value instead). A process starting its collector folds
+the counters and histograms of exited processes into ``<dir>/exited.json``
+and removes their snapshots, so totals never go backwards and the directory
+does not grow with every worker restart.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Rendering and validation take well under a millisecond
+STAGE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005) + DEFAULT_BUCKETS
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    @staticmethod
+    def merge(total, value):
+        return (total or 0.0) + value
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        # Per-bucket (non-cumulative) counts followed by sum and count
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        """Observe the wall-clock duration of the ``with`` block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def samples(self):
+        with self._lock:
+            return [[list(key), list(state)] for key, state in self._values.items()]
+
+    @staticmethod
+    def merge(total, value):
+        if total is None:
+            return list(value)
+        return [a + b for a, b in zip(total, value)]
+
+
+class Gauge:
+    type = 'gauge'
+
+    def __init__(self, name, help, func, shared=False):
+        self.name = name
+        self.help = help
+        self.labels = ()
+        self.func = func
+        # Read from state all processes share (a database, a directory): every process
+        # reports the same value, so the merge takes the largest instead of the sum
+        self.shared = shared
+
+    def samples(self):
+        try:
+            return [[[], float(self.func())]]
+        except Exception:
+            return []
+
+    def merge(self, total, value):
+        if self.shared:
+            return value if total is None else max(total, value)
+        return (total or 0.0) + value
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, func, shared=False):
+        return self._register(Gauge(name, help, func, shared))
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self):
+        return {
+            'pid': os.getpid(),
+            'metrics': {name: metric.samples() for name, metric in self.metrics.items()},
+        }
+
+    def render(self, snapshots):
+        """Prometheus text exposition of the merged `snapshots`"""
+        lines = []
+        for name, metric in self.metrics.items():
+            merged = {}
+            for snapshot in snapshots:
+                if metric.type == 'gauge' and not snapshot.get('live', True):
+                    continue
+                for label_values, value in snapshot['metrics'].get(name, []):
+                    key = tuple(label_values)
+                    merged[key] = metric.merge(merged.get(key), value)
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for key in sorted(merged):
+                labels = dict(zip(metric.labels, key))
+                if metric.type == 'histogram':
+                    lines.extend(_render_histogram(name, metric.buckets, labels, merged[key]))
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {merged[key]}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + '}'
+
+
+def _render_histogram(name, buckets, labels, state):
+    cumulative = 0
+    for bound, count in zip(buckets + ('+Inf',), state):
+        cumulative += count
+        yield f"{name}_bucket{_format_labels(dict(labels, le=bound))} {cumulative}"
+    yield f"{name}_sum{_format_labels(labels)} {state[-2]}"
+    yield f"{name}_count{_format_labels(labels)} {state[-1]}"
+
+
+class MultiProcessCollector:
+    """Shares a registry's values between the processes of one deployment"""
+
+    # Counters and histograms of processes that have exited
+    EXITED_FILE = 'exited.json'
+
+    def __init__(self, registry, directory=None, interval=5.0):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._pid = None
+        self._identity = None
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        """Begin writing periodic snapshots from the current process"""
+        if not self.directory or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.prune()
+            threading.Thread(target=self._run, name='metrics-writer', daemon=True).start()
+        atexit.register(self.write)
+
+    def write(self):
+        if not self.directory:
+            return
+        pid, start = self._process_identity()
+        snapshot = self.registry.snapshot()
+        snapshot['start'] = start
+        try:
+            self._dump(f"{pid}-{start}.json", snapshot)
+        except OSError as e:
+            logger.error(f"Failed to write metrics snapshot: {str(e)}")
+
+    def collect(self):
+        """Prometheus text for this deployment (or this process, without a directory)"""
+        if not self.directory:
+            return self.registry.render([self.registry.snapshot()])
+        self.write()
+        with self._locked(exclusive=False):
+            snapshots = [snapshot for _, snapshot in self._snapshots()]
+        for snapshot in snapshots:
+            snapshot['live'] = _is_live(snapshot)
+        return self.registry.render(snapshots)
+
+    def prune(self):
+        """Fold the snapshots of exited processes into EXITED_FILE and remove them"""
+        with self._locked(exclusive=True):
+            exited = {'pid': None, 'metrics': {}}
+            pruned = []
+            for file_name, snapshot in self._snapshots():
+                if file_name == self.EXITED_FILE:
+                    exited = snapshot
+                elif not _is_live(snapshot):
+                    pruned.append(file_name)
+                    self._fold(exited['metrics'], snapshot['metrics'])
+            if not pruned:
+                return
+            try:
+                self._dump(self.EXITED_FILE, exited)
+                for file_name in pruned:
+                    os.remove(os.path.join(self.directory, file_name))
+            except OSError as e:
+                logger.error(f"Failed to prune metrics snapshots: {str(e)}")
+                return
+        logger.info(f"Folded metrics snapshots of {len(pruned)} exited processes into {self.EXITED_FILE}")
+
+    def _fold(self, totals, metrics):
+        # Gauges describe a process while it runs; an exited one has none
+        for name, samples in metrics.items():
+            metric = self.registry.metrics.get(name)
+            if metric is None or metric.type == 'gauge':
+                continue
+            merged = {tuple(label_values): value for label_values, value in totals.get(name, [])}
+            for label_values, value in samples:
+                key = tuple(label_values)
+                merged[key] = metric.merge(merged.get(key), value)
+            totals[name] = [[list(key), value] for key, value in merged.items()]
+
+    def _process_identity(self):
+        pid = os.getpid()
+        if self._identity is None or self._identity[0] != pid:
+            # Without /proc, the time this process first wrote stands in for its start time
+            self._identity = (pid, _process_start(pid) or int(time.time() * 1000))
+        return self._identity
+
+    def _snapshots(self):
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, file_name)) as f:
+                    yield file_name, json.load(f)
+            except (OSError, ValueError):
+                continue
+
+    def _dump(self, file_name, data):
+        path = os.path.join(self.directory, file_name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @contextmanager
+    def _locked(self, exclusive):
+        """Keep a scrape from reading while another process folds snapshots away"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, '.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _run(self):
+        while True:
+            self.write()
+            time.sleep(self.interval)
+
+
+def _is_live(snapshot):
+    """Whether the process that wrote `snapshot` is still running, not just its pid"""
+    pid = snapshot.get('pid')
+    if not _pid_alive(pid):
+        return False
+    start = _process_start(pid)
+    return start is None or start == snapshot.get('start')
+
+
+def _process_start(pid):
+    """Start time of `pid` in clock ticks since boot, or None where /proc is unavailable"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Fields after the parenthesised command name; starttime is the 22nd field overall
+            return int(f.read().rsplit(')', 1)[1].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Process-wide registry used by the app and its helper modules
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter('http_requests_total', 'HTTP requests by route, method and status', ('route', 'method', 'status'))
+HTTP_LATENCY = REGISTRY.histogram('http_request_duration_seconds', 'HTTP request latency by route', ('route',))
+SUBMIT_STAGE_LATENCY = REGISTRY.histogram('submit_stage_duration_seconds', 'Latency of each /submit stage', ('stage',),
+                                          STAGE_BUCKETS)
+SUBMISSION_ERRORS = REGISTRY.counter('submission_errors_total', 'Submissions rejected or failed, by reason', ('reason',))
+SMTP_LATENCY = REGISTRY.histogram('smtp_operation_duration_seconds', 'SMTP connect/login/send timings', ('operation',))
+SMTP_FAILURES = REGISTRY.counter('smtp_failures_total', 'Failed SMTP operations', ('operation',))
+MAIL_SEND_FAILURES = REGISTRY.counter('mail_send_failures_total', 'Emails that could not be delivered', ('kind',))
+LOG_RECORDS_DROPPED = REGISTRY.counter('log_records_dropped_total', 'Log records dropped because the log queue was full',
+                                       ('level',))
+LOG_RECORDS_SAMPLED_OUT = REGISTRY.counter('log_records_sampled_out_total', 'Routine log records skipped by sampling')
+SMTP_CIRCUIT_REJECTIONS = REGISTRY.counter('smtp_circuit_rejections_total',
+                                          'Emails not attempted because the SMTP circuit was open')
@@ -0,0 +1,236 @@
+"""Opt-in profiling of individual requests.
+
+With PROFILING_ENABLED=True a request is profiled when it carries a valid
+``X-Profile`` token (``flask profile-token`` prints one, signed with
+SECRET_KEY) or is picked at random at PROFILING_SAMPLE_RATE. Other requests
+only pay for that check; the stage timers below cost them one dict lookup.
+
+A profiled request runs under `cProfile` and leaves three files in
+PROFILING_DIR (default data/profiles), which keeps the newest
+PROFILING_KEEP profiles:
+
+    <time>-<request id>.prof         cProfile stats, for pstats or snakeviz
+    <time>-<request id>.folded       collapsed stacks, for flamegraph.pl or speedscope
+    <time>-<request id>.stages.jsonl wall and CPU time of each stage
+
+The stages are those of ``submit_stage_duration_seconds`` (validation, store,
+admin_render, client_render, send_admin, send_client) plus the request as a
+whole. They are matched to the profile by request id, so a send that a mail
+worker or the event loop finishes after the response is appended later.
+CPU time is per thread; for a send on the event loop it includes whatever
+else the loop ran meanwhile. The response of a profiled request names its
+files in an ``X-Profile`` header.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from itsdangerous import BadSignature, TimestampSigner
+
+from .log_pipeline import request_id_var
+from .metrics import SUBMIT_STAGE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# How long a finished profile still collects stages from background sends
+LINGER = 300.0
+
+# Open profiles by request id; empty unless a profiled request is in flight or lingering
+_profiles = {}
+_profiles_lock = threading.Lock()
+
+
+@contextmanager
+def stage(name):
+    """Time one stage of a submission for ``submit_stage_duration_seconds`` and any profile of its request"""
+    profile = _profiles.get(request_id_var.get()) if _profiles else None
+    start = time.perf_counter()
+    cpu_start = time.thread_time() if profile is not None else 0.0
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - start
+        SUBMIT_STAGE_LATENCY.observe(wall, name)
+        if profile is not None:
+            profile.record(name, wall, time.thread_time() - cpu_start)
+
+
+class RequestProfile:
+    """cProfile run and stage timings of one request"""
+
+    def __init__(self, directory, request_id):
+        self.request_id = request_id
+        # Dots would split the name from its extensions
+        self.name = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{request_id.replace('.', '_')}"
+        self.path = os.path.join(directory, self.name)
+        self.expires = None
+        import cProfile
+
+        self._profiler = cProfile.Profile()
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        try:
+            self._profiler.enable()
+        except ValueError as e:
+            # Another profiler is active on this thread; keep the stage timings
+            logger.warning(f"Request {request_id} not profiled: {str(e)}")
+            self._profiler = None
+
+    def record(self, stage_name, wall, cpu, **details):
+        """Append a stage to the stages file"""
+        line = json.dumps(dict(details, stage=stage_name, wall_ms=round(wall * 1000, 3), cpu_ms=round(cpu * 1000, 3),
+                               offset_ms=round((time.perf_counter() - self._start - wall) * 1000, 3),
+                               thread=threading.current_thread().name))
+        with self._lock:
+            with open(self.path + '.stages.jsonl', 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+    def stop(self):
+        """Stop profiling; returns ``(wall, cpu)`` seconds since the start, or None if already stopped"""
+        if self.expires is not None:
+            return None
+        self.expires = time.monotonic() + LINGER
+        wall = time.perf_counter() - self._start
+        cpu = time.thread_time() - self._cpu_start
+        if self._profiler is not None:
+            self._profiler.disable()
+        return wall, cpu
+
+    def write(self):
+        """Write the cProfile stats and the collapsed stacks"""
+        if self._profiler is None:
+            return
+        import pstats
+
+        self._profiler.dump_stats(self.path + '.prof')
+        stacks = folded_stacks(pstats.Stats(self._profiler).stats)
+        with open(self.path + '.folded', 'w', encoding='utf-8') as f:
+            for stack, microseconds in stacks:
+                f.write(f"{stack} {microseconds}\n")
+
+
+class Profiler:
+    """Decides which requests to profile and keeps the output directory trimmed"""
+
+    HEADER = 'X-Profile'
+
+    def __init__(self, directory, secret_key, sample_rate=0.0, keep=50, token_max_age=3600):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.token_max_age = token_max_age
+        self._signer = TimestampSigner(secret_key, salt='profile')
+        os.makedirs(directory, exist_ok=True)
+
+    def token(self):
+        """A header value that has requests profiled for the next `token_max_age` seconds"""
+        return self._signer.sign('profile').decode()
+
+    def wanted(self, header_value):
+        """Whether to profile a request with this ``X-Profile`` header (None when absent)"""
+        if header_value:
+            try:
+                self._signer.unsign(header_value, max_age=self.token_max_age)
+                return True
+            except BadSignature:
+                logger.warning("Ignoring invalid or expired X-Profile token")
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self, request_id):
+        """Profile the rest of the current request on this thread"""
+        profile = RequestProfile(self.directory, request_id)
+        now = time.monotonic()
+        with _profiles_lock:
+            for expired in [key for key, open_profile in _profiles.items()
+                            if open_profile.expires is not None and open_profile.expires < now]:
+                del _profiles[expired]
+            _profiles[request_id] = profile
+        return profile
+
+    def finish(self, profile, endpoint, status):
+        """Stop `profile`, write its files and rotate the directory"""
+        elapsed = profile.stop()
+        if elapsed is None:
+            return
+        try:
+            profile.record('request', *elapsed, endpoint=endpoint, status=status)
+            profile.write()
+            self._rotate()
+        except OSError as e:
+            logger.error(f"Could not write profile {profile.name}: {str(e)}")
+            return
+        logger.info(f"Profiled request {profile.request_id} in {elapsed[0] * 1000:.1f}ms: {profile.path}")
+
+    def _rotate(self):
+        names = defaultdict(list)
+        for filename in os.listdir(self.directory):
+            names[filename.split('.', 1)[0]].append(filename)
+        for name in sorted(names)[:-self.keep]:
+            for filename in names[name]:
+                try:
+                    os.unlink(os.path.join(self.directory, filename))
+                except FileNotFoundError:
+                    pass
+
+
+def folded_stacks(stats, min_time=1e-6):
+    """``[(stack, microseconds), ...]`` in collapsed stack format from `pstats.Stats.stats`.
+
+    cProfile only records caller/callee pairs, so a function's time is split
+    between the paths that reach it in proportion to the time spent on each
+    call edge.
+    """
+    children = defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            children[caller].append((func, edge[3]))
+
+    totals = defaultdict(float)
+
+    def walk(func, stack, on_path, share):
+        own = stats[func][2] * share
+        stack = f"{stack};{_label(func)}" if stack else _label(func)
+        if own > 0:
+            totals[stack] += own
+        for child, edge_time in children[func]:
+            child_total = stats[child][3]
+            if child in on_path or child_total <= 0:
+                continue
+            child_share = edge_time * share / child_total
+            if child_share * child_total >= min_time:
+                walk(child, stack, on_path | {child}, child_share)
+
+    for func, (_, _, _, _, callers) in stats.items():
+        if not callers:
+            walk(func, '', frozenset([func]), 1.0)
+    return [(stack, round(seconds * 1e6)) for stack, seconds in totals.items() if seconds * 1e6 >= 0.5]
+
+
+def _label(func):
+    filename, line, name = func
+    if filename == '~':
+        # Built-in functions
+        label = name
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{line})"
+    return label.replace(';', ',')
+
+
+def create_profiler(config):
+    """Build the `Profiler` from the PROFILING_* settings, or return None when disabled"""
+    if os.getenv('PROFILING_ENABLED', 'False').lower() != 'true':
+        return None
+    return Profiler(
+        os.getenv('PROFILING_DIR', os.path.join(config.base_dir, 'data', 'profiles')),
+        config.secret_key,
+        sample_rate=float(os.getenv('PROFILING_SAMPLE_RATE', 0)),
+        keep=int(os.getenv('PROFILING_KEEP', 50)),
+        token_max_age=int(os.getenv('PROFILING_TOKEN_MAX_AGE', 3600)),
+    )
@@ -0,0 +1,141 @@
+"""Token-bucket rate limiting for form submissions.
+
+Each key (client IP, submitted email) owns a bucket holding up to `burst`
+tokens that refills at `rate` tokens per second; a submission takes one
+token. `MemoryTokenBuckets` keeps the buckets in an LRU-bounded table inside
+the process. `SQLiteTokenBuckets` keeps them in a small SQLite database so
+that all gunicorn workers on a host share the same limits.
+"""
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def _refill(tokens, updated_at, now, rate, burst):
+    return min(burst, tokens + (now - updated_at) * rate)
+
+
+class MemoryTokenBuckets:
+    """In-process token buckets with least-recently-used eviction"""
+
+    def __init__(self, rate, burst, max_keys=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """Take a token for `key`; return 0 if allowed, else seconds until one is free"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+            tokens = _refill(tokens, updated_at, now, self.rate, self.burst)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0 if allowed else (1 - tokens) / self.rate
+
+
+class SQLiteTokenBuckets:
+    """Token buckets shared between processes through SQLite"""
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path, rate, burst, busy_timeout=5.0):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._calls = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        conn.close()
+
+    def take(self, key):
+        """Take a token for `key`; return 0 if allowed, else seconds until one is free"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = _refill(row[0], row[1], now, self.rate, self.burst) if row else self.burst
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (key, tokens, now),
+            )
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                # A bucket idle long enough to refill completely is the same as no bucket
+                conn.execute("DELETE FROM buckets WHERE updated_at < ?", (now - self.burst / self.rate,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return 0 if allowed else (1 - tokens) / self.rate
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+
+class RateLimiter:
+    """Checks every key of a request against the same bucket table"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+
+    def check(self, *keys):
+        """Return 0 if every key is allowed, else the Retry-After in whole seconds"""
+        retry_after = 0
+        for key in keys:
+            if not key:
+                continue
+            try:
+                retry_after = max(retry_after, self.buckets.take(key))
+            except sqlite3.Error as e:
+                # Never turn away a brief because the limiter's storage failed
+                logger.error(f"Rate limiter unavailable: {str(e)}")
+                return 0
+        return math.ceil(retry_after)
+
+
+def create_rate_limiter(base_dir):
+    """Build the limiter from RATE_LIMIT_* settings, or return None when disabled"""
+    if os.getenv('RATE_LIMIT_ENABLED', 'True').lower() != 'true':
+        return None
+    burst = float(os.getenv('RATE_LIMIT_BURST', 5))
+    rate = float(os.getenv('RATE_LIMIT_PER_HOUR', 20)) / 3600
+    if os.getenv('RATE_LIMIT_BACKEND', 'memory').lower() == 'sqlite':
+        path = os.getenv('RATE_LIMIT_DB', os.path.join(base_dir, 'data', 'ratelimit.db'))
+        return RateLimiter(SQLiteTokenBuckets(path, rate, burst))
+    return RateLimiter(MemoryTokenBuckets(rate, burst, int(os.getenv('RATE_LIMIT_MAX_KEYS', 10000))))
@@ -0,0 +1,330 @@
+"""HTTP routes and CLI commands of the creative brief app"""
+import logging
+import time
+import uuid
+from datetime import datetime
+
+import click
+from flask import Blueprint, Response, abort, g, jsonify, request, send_file
+from werkzeug.exceptions import HTTPException
+
+from .dedup import fingerprint
+from .export import FORMATS, export_records, parse_since, render
+from .health import LIVE_BODY
+from .log_pipeline import VALID_REQUEST_ID, request_id_var
+from .metrics import HTTP_LATENCY, HTTP_REQUESTS, SUBMISSION_ERRORS
+from .profiling import stage
+from .schema import parse_form
+from .services import get_service
+
+logger = logging.getLogger(__name__)
+
+# cli_group=None keeps the commands at the top level: flask replay-submissions
+bp = Blueprint('creative_brief', __name__, cli_group=None)
+
+
+@bp.before_app_request
+def assign_request_id():
+    """Correlation id for every log line caused by this request, including its emails"""
+    request_id = request.headers.get('X-Request-ID', '')
+    if not VALID_REQUEST_ID.match(request_id):
+        request_id = uuid.uuid4().hex
+    g.request_id = request_id
+    g.request_id_token = request_id_var.set(request_id)
+
+
+@bp.teardown_app_request
+def release_request_id(exc):
+    # Handler threads are reused, the id must not leak into the next request
+    if 'request_id_token' in g:
+        request_id_var.reset(g.pop('request_id_token'))
+
+
+@bp.before_app_request
+def start_request_timer():
+    get_service().metrics_collector.start()
+    g.request_started = time.perf_counter()
+
+
+@bp.before_app_request
+def start_profile():
+    profiler = get_service().profiler
+    if profiler is not None and profiler.wanted(request.headers.get(profiler.HEADER)):
+        g.profile = profiler.start(g.request_id)
+
+
+@bp.after_app_request
+def finish_profile(response):
+    if 'profile' in g:
+        get_service().profiler.finish(g.profile, request.endpoint, response.status_code)
+        response.headers['X-Profile'] = g.profile.name
+    return response
+
+
+@bp.teardown_app_request
+def stop_profile(exc):
+    # An exception in a later hook skipped finish_profile; stop profiling this thread anyway
+    if 'profile' in g:
+        g.pop('profile').stop()
+
+
+@bp.after_app_request
+def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+    if 'request_started' in g:
+        HTTP_LATENCY.observe(time.perf_counter() - g.request_started, route)
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+
+@bp.route('/')
+def index():
+    try:
+        return get_service().static_assets.response('index.html')
+    except Exception as e:
+        logger.error(f"Error serving index page: {str(e)}")
+        return "Application error", 500
+
+
+@bp.route('/styles.css')
+def styles():
+    try:
+        return get_service().static_assets.response('styles.css')
+    except Exception as e:
+        logger.error(f"Error serving CSS: {str(e)}")
+        return "CSS not found", 404
+
+
+@bp.route('/script.js')
+def script():
+    try:
+        return get_service().static_assets.response('script.js')
+    except Exception as e:
+        logger.error(f"Error serving JS: {str(e)}")
+        return "JS not found", 404
+
+
+# Only names shaped like ``styles.<hash>.css``, so other paths (GET /submit) keep their 404/405
+@bp.route('/<stem>.<string(length=12):digest>.<ext>')
+def fingerprinted_asset(stem, digest, ext):
+    """Content-hashed asset URL, cacheable forever"""
+    static_assets = get_service().static_assets
+    name = static_assets.resolve(f"{stem}.{digest}.{ext}")
+    if name is None:
+        abort(404)
+    return static_assets.response(name, fingerprinted=True)
+
+
+@bp.route('/submit', methods=['POST'])
+def submit_form():
+    service = get_service()
+    try:
+        # Throttle per client address and per submitted email
+        if service.rate_limiter is not None:
+            email = request.form.get('email', '').strip().lower()
+            retry_after = service.rate_limiter.check(f"ip:{request.remote_addr}", email and f"email:{email}")
+            if retry_after:
+                logger.warning(f"Rate limited submission from {request.remote_addr} ({email})")
+                response = jsonify({
+                    'success': False,
+                    'message': f"Too many submissions. Please try again in {retry_after} seconds."
+                })
+                response.headers['Retry-After'] = str(retry_after)
+                SUBMISSION_ERRORS.inc('rate_limited')
+                return response, 429
+
+        # Every field rule and the acknowledgement are checked while collecting the form
+        with stage('validation'):
+            form_data, errors = parse_form(request.form)
+
+        # Reference files were spooled to disk while the form was parsed
+        uploads = [upload for upload in request.files.getlist('attachments') if upload.filename]
+        if len(uploads) > service.config.max_attachments:
+            errors['attachments'] = f"At most {service.config.max_attachments} files can be attached"
+
+        if errors:
+            message = '; '.join(errors.values())
+            logger.warning(f"Form validation errors: {message}")
+            SUBMISSION_ERRORS.inc('validation')
+            return jsonify({'success': False, 'message': message, 'errors': errors})
+
+        # A repeat of a recent submission gets the original result back
+        idempotency_key = request.headers.get('Idempotency-Key', '').strip()
+        digests = sorted(upload.stream.sha256.hexdigest() for upload in uploads)
+        previous, claim = service.duplicate_index.begin([
+            idempotency_key and f"key:{idempotency_key}",
+            f"form:{fingerprint(dict(form_data, attachments=' '.join(digests)) if digests else form_data)}"
+        ])
+        if previous is not None:
+            logger.info(f"Duplicate submission from {form_data['email']}, returning submission {previous['submission_id']}")
+            return jsonify(previous)
+
+        try:
+            # Store the submission before any mail is attempted
+            with stage('store'):
+                attachments = [service.attachment_store.save(upload.stream, upload.filename, upload.mimetype)
+                               for upload in uploads]
+                submission_id = service.submission_store.add(form_data, request.remote_addr, attachments)
+
+            # Log submission
+            logger.info(f"New form submission {submission_id} from {form_data['email']} for project: {form_data['projectTitle']}"
+                        + (f" with {len(attachments)} attachment(s)" if attachments else ""))
+
+            delivery = service.queue_emails(submission_id, form_data, attachments=attachments)
+        except Exception:
+            service.duplicate_index.abandon(claim)
+            raise
+
+        result = {
+            'success': True,
+            'message': 'Creative brief submitted successfully! You should receive a confirmation email shortly.',
+            'submission_id': submission_id,
+            'delivery': delivery
+        }
+        service.duplicate_index.complete(claim, result)
+        return jsonify(result)
+
+    except HTTPException:
+        # e.g. 413 from the body limits, answered by the error handlers below
+        raise
+    except Exception as e:
+        SUBMISSION_ERRORS.inc('error')
+        logger.error(f"Error processing form submission: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'An error occurred while processing your submission. Please try again or contact us directly.'
+        })
+
+
+@bp.route('/attachments/<token>')
+def attachment_download(token):
+    """Signed link to a file too large to attach to the admin email"""
+    found = get_service().resolve_attachment_link(token)
+    if found is None:
+        abort(404)
+    path, attachment = found
+    response = send_file(path, mimetype=attachment['content_type'], as_attachment=True,
+                         download_name=attachment['filename'])
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
+
+
+@bp.route('/delivery/<job_id>')
+def delivery_status(job_id):
+    """Delivery status of a queued email"""
+    job = get_service().mail_queue.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Not found'}), 404
+    return jsonify(job)
+
+
+@bp.route('/metrics')
+def metrics():
+    """Prometheus metrics, aggregated over all worker processes"""
+    return Response(get_service().metrics_collector.collect(), mimetype='text/plain; version=0.0.4')
+
+
+@bp.route('/health')
+def health_check():
+    """Health check endpoint for deployment platforms"""
+    service = get_service()
+    breaker = service.smtp_breaker.snapshot() if service.smtp_breaker is not None else None
+    return jsonify({
+        # Still 200 with the circuit open: submissions are stored and their mail is retried
+        'status': 'degraded' if breaker and breaker['state'] != 'closed' else 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'smtp_configured': service.config.smtp_configured,
+        'smtp_circuit': breaker
+    })
+
+
+@bp.route('/health/live')
+def liveness():
+    """Liveness probe: the process is serving requests"""
+    return Response(LIVE_BODY, mimetype='application/json', headers={'Cache-Control': 'no-store'})
+
+
+@bp.route('/health/ready')
+def readiness():
+    """Readiness probe: the latest background check of storage, mail backlog and SMTP"""
+    body, status = get_service().health.readiness()
+    return Response(body, status, mimetype='application/json', headers={'Cache-Control': 'no-store'})
+
+
+@bp.cli.command('replay-submissions')
+def replay_submissions():
+    """Re-send emails for stored submissions that were never delivered"""
+    service = get_service()
+    for submission_id, pending in service.replay_unsent():
+        print(f"Queued {', '.join(pending)} email(s) for submission {submission_id}")
+    service.mail_queue.stop()
+
+
+@bp.cli.command('replay-dead-letters')
+@click.option('--id', 'dead_ids', type=int, multiple=True, help='Only this dead letter (repeatable)')
+def replay_dead_letters(dead_ids):
+    """Retry emails that exhausted their attempts, with a fresh retry budget"""
+    service = get_service()
+    if service.mail_retry is None:
+        print("Mail retries are disabled (MAIL_RETRY_ENABLED=False)")
+        return
+    for record in service.mail_retry.store.dead_letters():
+        if not dead_ids or record['id'] in dead_ids:
+            print(f"Retrying dead letter {record['id']} to {record['to_email']}: {record['subject']}")
+    revived = service.mail_retry.store.revive(dead_ids)
+    if service.spooled:
+        print(f"Requeued {revived} dead letter(s) for the delivery daemon")
+        return
+    sent = service.mail_retry.run_pending()
+    service.mail_queue.stop()
+    print(f"Requeued {revived} dead letter(s), {sent} email(s) sent for delivery")
+
+
+@bp.cli.command('profile-token')
+def profile_token():
+    """Print an X-Profile header value that has requests profiled (needs PROFILING_ENABLED)"""
+    profiler = get_service().profiler
+    if profiler is None:
+        print("Profiling is disabled (PROFILING_ENABLED=False)")
+        return
+    print(f"{profiler.HEADER}: {profiler.token()}")
+    print(f"Valid for {profiler.token_max_age} seconds; profiles are written to {profiler.directory}")
+
+
+@bp.cli.command('export-submissions')
+@click.option('--format', 'fmt', type=click.Choice(sorted(FORMATS)), default='csv', show_default=True)
+@click.option('--after-id', type=int, default=0, help='Only submissions after this cursor (from a previous export)')
+@click.option('--since', help='Only submissions from this ISO date or date and time')
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='File to write (default: stdout)')
+def export_submissions(fmt, after_id, since, output):
+    """Write stored submissions as CSV or JSON Lines for import elsewhere"""
+    try:
+        created_from = parse_since(since) if since else None
+    except ValueError:
+        raise click.BadParameter('must be an ISO date or date and time', param_hint='--since')
+    cursor, records = export_records(get_service().submission_store, after_id, created_from)
+    for chunk in render(records, fmt):
+        output.write(chunk)
+    output.flush()
+    # stderr, so the cursor never ends up in an export written to stdout
+    click.echo(f"Exported submissions up to {cursor}; continue with --after-id {cursor}", err=True)
+
+
+@bp.app_errorhandler(404)
+def not_found(error):
+    return jsonify({'error': 'Not found'}), 404
+
+
+@bp.app_errorhandler(413)
+def request_too_large(error):
+    return jsonify({
+        'success': False,
+        'message': 'Your submission is too large. Please shorten your answers and try again.'
+    }), 413
+
+
+@bp.app_errorhandler(500)
+def internal_error(error):
+    return jsonify({'error': 'Internal server error'}), 500
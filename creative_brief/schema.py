@@ -0,0 +1,176 @@
+"""Fields of the creative brief form and the validator compiled from them.
+
+This is the one place that lists the form's fields, their labels and the
+rules they must satisfy. Everything derived from it (field order, the admin
+email layout, the validator) is computed once at import.
+"""
+from collections import namedtuple
+from datetime import date
+
+Field = namedtuple('Field', 'name label error kind max_length choices')
+
+# Textareas match the 1000 character counter in script.js
+MAX_LENGTHS = {'text': 200, 'textarea': 1000, 'email': 254, 'date': 10, 'choice': 100}
+
+
+def _field(name, label, required=None, kind='text', max_length=None, choices=None):
+    """`required` is the label used in the "... is required" message"""
+    return Field(name, label, f"{required} is required" if required else None,
+                 kind, max_length or MAX_LENGTHS[kind], tuple(choices) if choices else None)
+
+
+# Option values of the <select> elements in index.html
+PROJECT_TYPES = ('Branding', 'Website', 'Video', 'Campaign', 'Logo Design', 'Social Media', 'Print Design', 'Other')
+BUDGETS = ('Under $1,000', '$1,000 - $5,000', '$5,000 - $10,000', '$10,000 - $25,000', '$25,000+', 'To be discussed')
+COMMUNICATION_METHODS = ('Email', 'Phone', 'WhatsApp', 'Slack', 'Teams')
+
+SECTIONS = (
+    ("Client Information", (
+        _field('fullName', 'Full Name', required='Full Name'),
+        _field('companyName', 'Company/Organization Name'),
+        _field('jobTitle', 'Job Title/Role'),
+        _field('email', 'Email Address', required='Email Address', kind='email'),
+        _field('phone', 'Phone Number', max_length=50),
+        _field('website', 'Website / Social Media Handles', max_length=500),
+    )),
+    ("Project Overview", (
+        _field('projectTitle', 'Project Title', required='Project Title'),
+        _field('projectType', 'Type of Project', required='Project Type', kind='choice', choices=PROJECT_TYPES),
+        _field('projectDescription', 'Project Description', required='Project Description', kind='textarea'),
+        _field('keyObjectives', 'Key Objectives', required='Key Objectives', kind='textarea'),
+        _field('targetAudience', 'Target Audience', required='Target Audience', kind='textarea'),
+    )),
+    ("Creative Direction", (
+        _field('preferredStyle', 'Preferred Style/Tone'),
+        _field('designElements', 'Design Elements to Use', kind='textarea'),
+        _field('avoidElements', 'Design Elements to Avoid', kind='textarea'),
+        _field('inspirations', 'Inspirations/References', kind='textarea'),
+    )),
+    ("Content & Deliverables", (
+        _field('mainMessage', 'Main Message', required='Main Message', kind='textarea'),
+        _field('contentProvided', 'Content Provided by Client', kind='textarea'),
+        _field('deliverables', 'Final Deliverables Expected', required='Deliverables', kind='textarea'),
+        _field('fileFormats', 'File Formats Required'),
+    )),
+    ("Timeline & Budget", (
+        _field('startDate', 'Ideal Start Date', kind='date'),
+        _field('deadline', 'Ideal Completion Date', kind='date'),
+        _field('budget', 'Budget Range', kind='choice', choices=BUDGETS),
+    )),
+    ("Contact & Communication", (
+        _field('primaryContact', 'Primary Contact Person'),
+        _field('communicationMethod', 'Preferred Communication Method', kind='choice', choices=COMMUNICATION_METHODS),
+        _field('secondaryContact', 'Secondary Contact'),
+    )),
+)
+
+# Rendered on its own at the end of the admin email rather than in a section
+NOTES_FIELD = _field('additionalNotes', 'Additional Notes', kind='textarea')
+
+FIELDS = tuple(field for _, fields in SECTIONS for field in fields) + (NOTES_FIELD,)
+FIELD_NAMES = tuple(field.name for field in FIELDS)
+REQUIRED_FIELDS = tuple(field for field in FIELDS if field.error)
+
+# Stored submissions: the admin API filters on the choice fields by exact value
+# and full-text searches the names, the title and every textarea
+FILTER_FIELDS = tuple(field.name for field in FIELDS if field.kind == 'choice')
+SEARCH_FIELDS = ('fullName', 'companyName', 'projectTitle') + tuple(
+    field.name for field in FIELDS if field.kind == 'textarea')
+
+# (earlier, later) date fields; the later one may not come before the earlier one
+DATE_ORDER = (('startDate', 'deadline'),)
+
+ACKNOWLEDGEMENT_ERROR = 'You must acknowledge the terms to submit the form'
+
+
+def _check_email(value):
+    # email_validator pulls in dnspython, so it is only imported on first use
+    from email_validator import EmailNotValidError, validate_email
+    try:
+        validate_email(value, check_deliverability=False)
+    except EmailNotValidError as e:
+        return str(e)
+    return None
+
+
+def _check_date(label):
+    error = f"{label} must be a date (YYYY-MM-DD)"
+
+    def check(value):
+        try:
+            date.fromisoformat(value)
+        except ValueError:
+            return error
+        return None
+    return check
+
+
+def _check_choice(label, choices):
+    allowed = frozenset(choices)
+    error = f"{label} must be one of: {', '.join(choices)}"
+    return lambda value: None if value in allowed else error
+
+
+class Validator:
+    """Single-pass validator compiled from a field schema.
+
+    Each field becomes one ``(name, required_error, max_length,
+    too_long_error, check)`` step with its messages and check function built
+    up front, so validating a form is one ``form.get`` per field plus the
+    checks that apply to non-empty values.
+    """
+
+    def __init__(self, fields, date_order=()):
+        labels = {field.name: field.label for field in fields}
+        self.steps = tuple(self._compile(field) for field in fields)
+        self.date_order = tuple(
+            (earlier, later, f"{labels[later]} must not be before {labels[earlier]}")
+            for earlier, later in date_order
+        )
+
+    @staticmethod
+    def _compile(field):
+        if field.kind == 'email':
+            check = _check_email
+        elif field.kind == 'date':
+            check = _check_date(field.label)
+        elif field.choices:
+            check = _check_choice(field.label, field.choices)
+        else:
+            check = None
+        too_long = f"{field.label} must be at most {field.max_length} characters"
+        return field.name, field.error, field.max_length, too_long, check
+
+    def __call__(self, form):
+        """Collect and check `form`; returns ``(form_data, errors)``.
+
+        `errors` maps field names to one message each, in form order, and is
+        empty when the form is valid.
+        """
+        form_data = {}
+        errors = {}
+        for name, required_error, max_length, too_long, check in self.steps:
+            value = form.get(name, '').strip()
+            form_data[name] = value
+            if not value:
+                if required_error:
+                    errors[name] = required_error
+                continue
+            # Browsers submit textarea line breaks as CRLF but count them as one character
+            if len(value) > max_length and len(value) - value.count('\r\n') > max_length:
+                errors[name] = too_long
+                continue
+            if check is not None:
+                error = check(value)
+                if error:
+                    errors[name] = error
+        for earlier, later, error in self.date_order:
+            if form_data[earlier] and form_data[later] and earlier not in errors and later not in errors:
+                if date.fromisoformat(form_data[later]) < date.fromisoformat(form_data[earlier]):
+                    errors[later] = error
+        if not form.get('acknowledgement'):
+            errors['acknowledgement'] = ACKNOWLEDGEMENT_ERROR
+        return form_data, errors
+
+
+parse_form = Validator(FIELDS, DATE_ORDER)
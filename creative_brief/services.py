@@ -0,0 +1,260 @@
+"""Per-app state and the submission workflow shared by every route.
+
+`create_app` builds one `BriefService` and stores it in
+``app.extensions['creative_brief']``; views look it up with `get_service()`.
+"""
+import logging
+import os
+import weakref
+from datetime import datetime
+from functools import partial
+
+from flask import current_app, request
+from itsdangerous import BadSignature, URLSafeSerializer
+
+from .admin_digest import create_admin_digest
+from .attachments import AttachmentStore
+from .circuit_breaker import CLOSED, create_smtp_breaker
+from .dedup import DuplicateIndex
+from .delivery import create_delivery
+from .email_templates import render_admin_digest, render_admin_email, render_client_email
+from .health import create_health_checker
+from .mail_retry import create_retry_scheduler
+from .mail_spool import SpoolQueue
+from .metrics import REGISTRY, MultiProcessCollector
+from .profiling import create_profiler, stage
+from .rate_limit import create_rate_limiter
+from .static_assets import StaticAssetCache
+from .submission_store import create_submission_store
+
+logger = logging.getLogger(__name__)
+
+EXTENSION = 'creative_brief'
+
+
+def get_service():
+    """The `BriefService` of the current app"""
+    return current_app.extensions[EXTENSION]
+
+
+class BriefService:
+    """Storage, delivery and throttling for one app instance"""
+
+    def __init__(self, config, delivery=None):
+        self.config = config
+
+        # Every brief is stored before any mail is attempted
+        self.submission_store = create_submission_store(config.base_dir)
+
+        # Uploaded reference files, stored once per distinct content
+        self.attachment_store = AttachmentStore(config.upload_dir, max_size=config.max_attachment_size)
+        self._attachment_links = URLSafeSerializer(config.secret_key, salt='attachment')
+
+        # Flood protection for /submit (None when RATE_LIMIT_ENABLED is false)
+        self.rate_limiter = create_rate_limiter(config.base_dir)
+
+        # Recently seen submissions, so double submits are not stored and mailed twice
+        self.duplicate_index = DuplicateIndex(window=config.dedup_window)
+
+        self.static_assets = self._load_static_assets()
+
+        # Fails SMTP sends fast during a provider outage (None when SMTP_BREAKER_ENABLED is false)
+        self.smtp_breaker = create_smtp_breaker()
+
+        # Any object with the MailQueue interface; see creative_brief.delivery
+        self.mail_queue = delivery if delivery is not None else create_delivery(config, self.smtp_breaker)
+        # The MAIL_BACKEND that built it, or None when `delivery` was passed in
+        self.mail_backend = config.mail_backend.lower() if delivery is None else None
+
+        # Failed sends are stored and retried with backoff (None when MAIL_RETRY_ENABLED is false),
+        # holding off while the SMTP circuit is open and resending one message per half-open probe
+        self.mail_retry = create_retry_scheduler(
+            config.base_dir, lambda *args, **kwargs: self.mail_queue.enqueue(*args, **kwargs), self.mark_sent,
+            permits=self.smtp_breaker.permits if self.smtp_breaker is not None else None)
+
+        # Optional batching of admin notifications (None unless ADMIN_DIGEST_ENABLED)
+        self.admin_digest = create_admin_digest(self.send_admin_digest)
+
+        # cProfile runs of requests picked by token or sampling (None unless PROFILING_ENABLED)
+        self.profiler = create_profiler(config)
+
+        # Storage, backlog and SMTP checks behind /health/ready, run in the background
+        self.health = create_health_checker(self)
+
+        # Request metrics; snapshots in metrics_dir let /metrics cover every gunicorn worker
+        self.metrics_collector = MultiProcessCollector(REGISTRY, config.metrics_dir)
+        # The spool directory is one queue for all processes; the threaded queues are one each
+        REGISTRY.gauge('mail_queue_depth', 'Emails waiting for a delivery worker', lambda: self.mail_queue.depth(),
+                       shared=self.spooled)
+        REGISTRY.gauge('admin_digest_pending', 'Admin notifications buffered for the next digest',
+                       lambda: self.admin_digest.pending() if self.admin_digest is not None else 0)
+        # Every process reads the same retry database
+        REGISTRY.gauge('mail_retry_waiting', 'Failed emails waiting for another attempt',
+                       lambda: self.mail_retry.store.counts()[0] if self.mail_retry is not None else 0, shared=True)
+        REGISTRY.gauge('mail_dead_letters', 'Emails that exhausted their retries',
+                       lambda: self.mail_retry.store.counts()[1] if self.mail_retry is not None else 0, shared=True)
+        REGISTRY.gauge('smtp_circuit_open', 'Worker processes whose SMTP circuit is open or half-open',
+                       lambda: self.smtp_breaker is not None and self.smtp_breaker.state != CLOSED)
+        self._restart_after_fork = False
+
+    def start_background_tasks(self):
+        """Start the retry poller and the health checker, here and in every process forked from this one"""
+        if not self._restart_after_fork and hasattr(os, 'register_at_fork'):
+            # gunicorn --preload builds the app once and forks the workers, which do not inherit threads
+            os.register_at_fork(after_in_child=partial(_start_after_fork, weakref.ref(self)))
+            self._restart_after_fork = True
+        self._start_threads()
+
+    def _start_threads(self):
+        # With the spool backend the delivery daemon polls the retry store
+        if self.mail_retry is not None and not self.spooled:
+            self.mail_retry.start()
+        self.health.start()
+
+    def _load_static_assets(self):
+        """Page and static assets, served from memory"""
+        config = self.config
+        static_assets = StaticAssetCache(config.base_dir, auto_reload=config.debug or config.static_auto_reload)
+        for asset_name, mimetype in [('styles.css', 'text/css'), ('script.js', 'application/javascript')]:
+            try:
+                static_assets.add(asset_name, mimetype, f"public, max-age={config.static_max_age}", fingerprint=True)
+            except OSError as e:
+                logger.error(f"Error loading static asset {asset_name}: {str(e)}")
+        try:
+            # References to styles.css / script.js become styles.<hash>.css / script.<hash>.js
+            static_assets.add_page('index.html')
+        except OSError as e:
+            logger.error(f"Error loading static asset index.html: {str(e)}")
+        return static_assets
+
+    def admin_email_body(self, form_data, submitted_at=None, remote_addr=None, attachments=()):
+        """Create HTML email body for admin notification"""
+        if remote_addr is None:
+            remote_addr = request.remote_addr if request else 'Unknown'
+        return render_admin_email(form_data, submitted_at or datetime.now(), remote_addr, self.config.website_url,
+                                  attachments)
+
+    def client_email_body(self, form_data):
+        """Create HTML confirmation email for the client"""
+        return render_client_email(form_data, datetime.now(), self.config.to_email, self.config.website_url)
+
+    def attachment_link(self, submission_id, sha256):
+        """Signed download URL for a file uploaded with a submission"""
+        token = self._attachment_links.dumps([submission_id, sha256])
+        return f"{self.config.website_url}/attachments/{token}"
+
+    def resolve_attachment_link(self, token):
+        """``(path, metadata)`` of the file behind a download token, or None"""
+        try:
+            submission_id, sha256 = self._attachment_links.loads(token)
+        except (BadSignature, ValueError):
+            return None
+        for attachment in self.submission_store.attachments(submission_id):
+            if attachment['sha256'] == sha256:
+                return self.attachment_store.path(sha256), attachment
+        return None
+
+    def queue_emails(self, submission_id, form_data, pending=('admin', 'client'), submitted_at=None, remote_addr=None,
+                     attachments=()):
+        """Queue the admin and/or client email for a stored submission"""
+        delivery = {}
+
+        if 'admin' in pending and self.admin_digest is not None and not attachments:
+            # Non-urgent admin notifications go out in the next digest
+            if self.admin_digest.add(submission_id, form_data, submitted_at or datetime.now(),
+                                     remote_addr or (request.remote_addr if request else 'Unknown')):
+                pending = [kind for kind in pending if kind != 'admin']
+
+        if 'admin' in pending:
+            # Small files are attached to the admin email, larger ones are linked
+            inline_limit = self.config.attachment_inline_limit
+            files, listed = [], []
+            for attachment in attachments:
+                inline = attachment['size'] <= inline_limit
+                if inline:
+                    files.append((self.attachment_store.path(attachment['sha256']),
+                                  attachment['filename'], attachment['content_type']))
+                listed.append(dict(attachment, url=None if inline else
+                                   self.attachment_link(submission_id, attachment['sha256'])))
+
+            admin_subject = f"New Creative Brief Submission - {form_data['projectTitle']}"
+            with stage('admin_render'):
+                admin_body = self.admin_email_body(form_data, submitted_at, remote_addr, listed)
+            delivery['admin'] = self.enqueue(
+                self.config.to_email, admin_subject, admin_body, [(submission_id, 'admin')], attachments=files)
+
+        if 'client' in pending:
+            client_subject = f"Creative Brief Received - {form_data['projectTitle']}"
+            with stage('client_render'):
+                client_body = self.client_email_body(form_data)
+            delivery['client'] = self.enqueue(
+                form_data['email'], client_subject, client_body, [(submission_id, 'client')], is_client_email=True)
+
+        return delivery
+
+    def enqueue(self, to_email, subject, html_body, receipts, **options):
+        """Queue a message that marks the ``(submission_id, kind)`` `receipts` sent once delivered.
+
+        A failed first attempt is handed to the retry scheduler. `options`
+        (``is_client_email``, ``attachments``) must be JSON-serializable.
+        With the spool backend the delivery daemon does both.
+        """
+        if self.spooled:
+            return self.mail_queue.enqueue(to_email, subject, html_body, receipts=receipts, **options)
+
+        on_failed = None
+        if self.mail_retry is not None:
+            def on_failed(error=None):
+                self.mail_retry.schedule(to_email, subject, html_body, receipts, options, error)
+
+        return self.mail_queue.enqueue(to_email, subject, html_body,
+                                       on_sent=lambda: self.mark_sent(receipts), on_failed=on_failed, **options)
+
+    @property
+    def spooled(self):
+        """Whether mail is left to the delivery daemon (MAIL_BACKEND=spool)"""
+        return isinstance(self.mail_queue, SpoolQueue)
+
+    def mark_sent(self, receipts):
+        for submission_id, kind in receipts:
+            self.submission_store.mark_sent(submission_id, kind)
+
+    def send_admin_digest(self, entries):
+        """Queue one admin email covering several buffered submissions"""
+        subject = f"Creative Brief Digest - {len(entries)} new submissions"
+        body = render_admin_digest(entries, datetime.now(), self.config.website_url)
+        self.enqueue(self.config.to_email, subject, body, [(entry[0], 'admin') for entry in entries])
+
+    def replay_unsent(self):
+        """Queue every email of stored submissions that was never delivered; yields ``(id, kinds)``.
+
+        Emails already waiting in the retry store, the dead letters or the spool are left to those.
+        """
+        retrying = self.mail_retry.store.receipts() if self.mail_retry is not None else set()
+        if self.spooled:
+            retrying |= self.mail_queue.spool.receipts()
+        after_id = 0
+        while True:
+            batch = self.submission_store.unsent(after_id=after_id)
+            if not batch:
+                break
+            for record in batch:
+                after_id = record['id']
+                pending = [kind for kind in ('admin', 'client')
+                           if not record[f"{kind}_sent_at"] and (record['id'], kind) not in retrying]
+                if not pending:
+                    continue
+                self.queue_emails(
+                    record['id'], record['data'], pending,
+                    submitted_at=datetime.fromtimestamp(record['created_at']),
+                    remote_addr=record['remote_addr'] or 'Unknown',
+                    attachments=self.submission_store.attachments(record['id']))
+                yield record['id'], pending
+        if self.admin_digest is not None:
+            self.admin_digest.flush()
+
+
+def _start_after_fork(service_ref):
+    service = service_ref()
+    if service is not None:
+        service._start_threads()
@@ -0,0 +1,199 @@
+"""Pool of authenticated SMTP sessions shared by all outbound mail.
+
+Opening a session costs a TCP connect, a STARTTLS handshake and an AUTH round
+trip. The pool keeps sessions open between messages, checks them with NOOP
+before reuse, and retires them after `max_messages` sends or `idle_timeout`
+seconds without use.
+"""
+import atexit
+import logging
+import os
+import smtplib
+import threading
+import time
+
+from .delivery import StreamingMessage
+from .metrics import SMTP_FAILURES, SMTP_LATENCY
+
+logger = logging.getLogger(__name__)
+
+
+class _Connection:
+    __slots__ = ('smtp', 'created_at', 'last_used', 'messages')
+
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages = 0
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of logged-in `smtplib.SMTP` sessions"""
+
+    def __init__(self, host, port, username=None, password=None, max_size=2,
+                 max_messages=100, idle_timeout=60.0, noop_after=5.0, timeout=30.0, use_tls=True):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_size = max_size
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.noop_after = noop_after
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def send_message(self, msg):
+        """Send `msg` over a pooled session, reconnecting once if it was dropped"""
+        conn = self._acquire()
+        try:
+            self._send(conn, msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+            self._discard(conn)
+            if not conn.messages:
+                raise
+            # A reused session can be closed by the server between messages
+            logger.info(f"SMTP session dropped ({str(e)}), reconnecting")
+            conn = self._connect()
+            try:
+                self._send(conn, msg)
+            except Exception:
+                self._discard(conn)
+                raise
+        except Exception:
+            self._discard(conn)
+            raise
+        conn.messages += 1
+        self._release(conn)
+
+    def check(self):
+        """Open and log in to a fresh session, then quit it; raises if the server cannot be reached"""
+        self._discard(self._connect())
+
+    def close(self):
+        """Log out of every idle session"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            owned = self._pid == os.getpid()
+        if owned:
+            for conn in idle:
+                self._discard(conn)
+
+    def _acquire(self):
+        while True:
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Sessions inherited across fork belong to the parent
+                    self._pid = os.getpid()
+                    self._idle = []
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+
+            idle_for = time.monotonic() - conn.last_used
+            if idle_for > self.idle_timeout:
+                self._discard(conn)
+                continue
+            if idle_for > self.noop_after and not self._alive(conn):
+                self._discard(conn)
+                continue
+            return conn
+
+    def _release(self, conn):
+        conn.last_used = time.monotonic()
+        if conn.messages >= self.max_messages:
+            self._discard(conn)
+            return
+        with self._lock:
+            if self._pid == os.getpid() and len(self._idle) < self.max_size:
+                self._idle.append(conn)
+                return
+        self._discard(conn)
+
+    @staticmethod
+    def _send(conn, msg):
+        try:
+            with SMTP_LATENCY.time('send'):
+                if isinstance(msg, StreamingMessage):
+                    _send_streaming(conn.smtp, msg)
+                else:
+                    conn.smtp.send_message(msg)
+        except Exception:
+            SMTP_FAILURES.inc('send')
+            raise
+
+    def _connect(self):
+        operation = 'connect'
+        try:
+            with SMTP_LATENCY.time('connect'):
+                smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                operation = 'login'
+                with SMTP_LATENCY.time('login'):
+                    if self.use_tls:
+                        smtp.starttls()
+                    if self.username:
+                        smtp.login(self.username, self.password)
+            except Exception:
+                smtp.close()
+                raise
+        except Exception:
+            SMTP_FAILURES.inc(operation)
+            raise
+        return _Connection(smtp)
+
+    @staticmethod
+    def _alive(conn):
+        try:
+            return conn.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.smtp.close()
+
+
+def _send_streaming(smtp, msg):
+    """`smtplib.SMTP.send_message` for a `StreamingMessage`, writing DATA chunk by chunk"""
+    sender, recipients = msg.envelope()
+    smtp.ehlo_or_helo_if_needed()
+    code, reply = smtp.mail(sender)
+    if code != 250:
+        raise smtplib.SMTPSenderRefused(code, reply, sender)
+    for recipient in recipients:
+        code, reply = smtp.rcpt(recipient)
+        if code not in (250, 251):
+            raise smtplib.SMTPRecipientsRefused({recipient: (code, reply)})
+    code, reply = smtp.docmd('DATA')
+    if code != 354:
+        raise smtplib.SMTPDataError(code, reply)
+    for chunk in msg.smtp_data():
+        smtp.send(chunk)
+    code, reply = smtp.docmd('.')
+    if code != 250:
+        raise smtplib.SMTPDataError(code, reply)
+
+
+def create_smtp_pool(host, port, username, password):
+    """Build an `SMTPConnectionPool` from the SMTP_POOL_* settings and register shutdown"""
+    pool = SMTPConnectionPool(
+        host,
+        port,
+        username,
+        password,
+        max_size=int(os.getenv('SMTP_POOL_SIZE', 2)),
+        max_messages=int(os.getenv('SMTP_MAX_MESSAGES', 100)),
+        idle_timeout=float(os.getenv('SMTP_IDLE_TIMEOUT', 60)),
+        timeout=float(os.getenv('SMTP_TIMEOUT', 30)),
+        use_tls=os.getenv('SMTP_USE_TLS', 'True').lower() == 'true',
+    )
+    atexit.register(pool.close)
+    return pool
@@ -0,0 +1,150 @@
+"""In-memory cache for the page and its static assets.
+
+Files are read, hashed and precompressed (gzip, plus brotli when the
+``brotli`` package is installed) once at startup. Responses carry a strong
+ETag and Cache-Control, and conditional requests are answered with 304. With
+`auto_reload` enabled (dev mode) a file is reloaded when its mtime changes.
+
+Assets added with ``fingerprint=True`` are also reachable under a
+content-hashed name such as ``styles.<hash>.css``, and pages added with
+`add_page` have their references rewritten to those names. A deploy changes
+the hash, so fingerprinted URLs can be cached forever.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import threading
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Compressing tiny files costs more than it saves
+MIN_COMPRESS_SIZE = 256
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class StaticAsset:
+    """One file held in memory with its precompressed variants"""
+
+    def __init__(self, path, mimetype, cache_control, rewrite=None):
+        self.path = path
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self.rewrite = rewrite
+        self.load()
+
+    def load(self):
+        with open(self.path, 'rb') as f:
+            body = f.read()
+        self.mtime = os.stat(self.path).st_mtime_ns
+        if self.rewrite is not None:
+            body = self.rewrite(body)
+        self.etag = hashlib.sha256(body).hexdigest()[:20]
+        self.variants = {None: body}
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+            if brotli is not None:
+                self.variants['br'] = brotli.compress(body)
+
+    @property
+    def fingerprinted_name(self):
+        stem, ext = os.path.splitext(os.path.basename(self.path))
+        return f"{stem}.{self.etag[:12]}{ext}"
+
+    def is_stale(self):
+        try:
+            return os.stat(self.path).st_mtime_ns != self.mtime
+        except OSError:
+            return False
+
+    def pick_encoding(self, accept_encoding):
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accept_encoding[encoding]:
+                return encoding
+        return None
+
+
+class StaticAssetCache:
+    """Registry of `StaticAsset` objects served from memory"""
+
+    def __init__(self, directory, auto_reload=False):
+        self.directory = directory
+        self.auto_reload = auto_reload
+        self._assets = {}
+        self._pages = []
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, mimetype, cache_control='no-cache', fingerprint=False):
+        """Load `name` from the asset directory and keep it in memory"""
+        asset = StaticAsset(os.path.join(self.directory, name), mimetype, cache_control)
+        self._assets[name] = asset
+        if fingerprint:
+            self._fingerprints[name] = asset.fingerprinted_name
+        return asset
+
+    def add_page(self, name, mimetype='text/html', cache_control='no-cache'):
+        """Load a page whose references to fingerprinted assets are rewritten.
+
+        Add pages after the assets they reference.
+        """
+        asset = StaticAsset(os.path.join(self.directory, name), mimetype, cache_control, self._rewrite_references)
+        self._assets[name] = asset
+        self._pages.append(name)
+        return asset
+
+    def resolve(self, fingerprinted_name):
+        """Map a fingerprinted file name back to its asset name, or None"""
+        for name, fingerprinted in self._fingerprints.items():
+            if fingerprinted == fingerprinted_name:
+                return name
+        return None
+
+    def get(self, name):
+        if self.auto_reload:
+            self._reload_stale()
+        return self._assets[name]
+
+    def _rewrite_references(self, body):
+        for name, fingerprinted in self._fingerprints.items():
+            body = body.replace(f'"{name}"'.encode(), f'"{fingerprinted}"'.encode())
+        return body
+
+    def _reload_stale(self):
+        stale = [name for name, asset in self._assets.items() if asset.is_stale()]
+        if not stale:
+            return
+        with self._lock:
+            for name in stale:
+                logger.info(f"Reloading changed asset {name}")
+                self._assets[name].load()
+                if name in self._fingerprints:
+                    self._fingerprints[name] = self._assets[name].fingerprinted_name
+            # Pages are rebuilt last so they pick up the new fingerprints
+            for page in self._pages:
+                self._assets[page].load()
+
+    def response(self, name, fingerprinted=False):
+        """Serve `name` for the current request, honouring If-None-Match"""
+        asset = self.get(name)
+        encoding = asset.pick_encoding(request.accept_encodings)
+        etag = f"{asset.etag}-{encoding}" if encoding else asset.etag
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if fingerprinted else asset.cache_control
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
@@ -0,0 +1,262 @@
+"""Durable, append-only store for creative brief submissions.
+
+Every validated brief is written to SQLite before any mail is attempted, so a
+failed send no longer loses the submission. The database runs in WAL mode:
+readers never block the writer and each insert is a single short transaction,
+which keeps several gunicorn workers from contending on the file lock.
+
+`search` serves the admin API. The choice fields it filters on have
+expression indexes over the stored JSON, ending in ``id`` so a filtered page
+is read straight off the index in keyset order. Free text goes through an
+FTS5 table kept up to date by an insert trigger; without FTS5 the search
+falls back to LIKE.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .schema import FILTER_FIELDS, SEARCH_FIELDS
+
+logger = logging.getLogger(__name__)
+
+MAIL_KINDS = ('admin', 'client')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    remote_addr TEXT,
+    data TEXT NOT NULL,
+    admin_sent_at REAL,
+    client_sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS submissions_unsent
+    ON submissions (id) WHERE admin_sent_at IS NULL OR client_sent_at IS NULL;
+CREATE TABLE IF NOT EXISTS attachments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    submission_id INTEGER NOT NULL REFERENCES submissions (id),
+    sha256 TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    content_type TEXT NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attachments_submission ON attachments (submission_id);
+CREATE INDEX IF NOT EXISTS submissions_created ON submissions (created_at);
+""" + ''.join(
+    f"CREATE INDEX IF NOT EXISTS submissions_{name} ON submissions (json_extract(data, '$.{name}'), id);\n"
+    for name in FILTER_FIELDS
+)
+
+_SEARCH_COLUMNS = ', '.join(SEARCH_FIELDS)
+
+# Contentless: the index only maps words to submission ids, the text stays in `data`
+FTS_SCHEMA = (
+    f"CREATE VIRTUAL TABLE submissions_fts USING fts5({_SEARCH_COLUMNS}, content='')",
+    f"""CREATE TRIGGER submissions_fts_insert AFTER INSERT ON submissions BEGIN
+        INSERT INTO submissions_fts (rowid, {_SEARCH_COLUMNS})
+        VALUES (new.id, {', '.join(f"json_extract(new.data, '$.{name}')" for name in SEARCH_FIELDS)});
+    END""",
+    f"""INSERT INTO submissions_fts (rowid, {_SEARCH_COLUMNS})
+        SELECT id, {', '.join(f"json_extract(data, '$.{name}')" for name in SEARCH_FIELDS)} FROM submissions""",
+)
+
+INSERT_SUBMISSION = "INSERT INTO submissions (created_at, remote_addr, data) VALUES (?, ?, ?)"
+
+
+class SubmissionStore:
+    """SQLite-backed submission journal with one connection per thread"""
+
+    def __init__(self, path, busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        self.full_text = self._create_fts(conn)
+        conn.close()
+
+    def add(self, form_data, remote_addr=None, attachments=()):
+        """Persist a submission and the metadata of its `attachments`; returns its id"""
+        conn = self._conn()
+        row = (time.time(), remote_addr, json.dumps(form_data, ensure_ascii=False))
+        if not attachments:
+            return conn.execute(INSERT_SUBMISSION, row).lastrowid
+
+        # One transaction, so a submission is never stored without its files
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            submission_id = conn.execute(INSERT_SUBMISSION, row).lastrowid
+            conn.executemany(
+                "INSERT INTO attachments (submission_id, sha256, filename, content_type, size)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [(submission_id, a['sha256'], a['filename'], a['content_type'], a['size']) for a in attachments],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return submission_id
+
+    def mark_sent(self, submission_id, kind):
+        """Record that the `kind` ('admin' or 'client') email went out"""
+        if kind not in MAIL_KINDS:
+            raise ValueError(f"Unknown mail kind: {kind}")
+        self._conn().execute(
+            f"UPDATE submissions SET {kind}_sent_at = ? WHERE id = ?",
+            (time.time(), submission_id),
+        )
+
+    def check_writable(self):
+        """Take and release the write lock; raises if the database cannot be written"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("ROLLBACK")
+
+    def get(self, submission_id):
+        """Return a single submission as a dict, or None"""
+        row = self._conn().execute(
+            "SELECT * FROM submissions WHERE id = ?", (submission_id,)
+        ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def attachments(self, submission_id):
+        """Metadata of the files uploaded with a submission, in upload order"""
+        rows = self._conn().execute(
+            "SELECT sha256, filename, content_type, size FROM attachments WHERE submission_id = ? ORDER BY id",
+            (submission_id,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def search(self, filters=None, text=None, created_from=None, created_to=None, before_id=None, limit=50):
+        """Newest-first page of submissions matching every given condition.
+
+        `filters` maps FILTER_FIELDS names to exact values, `text` is matched
+        word by word against SEARCH_FIELDS, `created_from`/`created_to` bound
+        the submission time (epoch seconds, `created_to` exclusive) and
+        `before_id` is the keyset cursor: the id of the last row of the
+        previous page.
+        """
+        sql, key = "SELECT * FROM submissions", "id"
+        where, params = [], []
+        words = (text or '').split()
+        if words and self.full_text:
+            # Walk the full-text matches newest first and stop once the page is
+            # full, rather than collecting every match before filtering
+            sql = "SELECT submissions.* FROM submissions_fts CROSS JOIN submissions ON id = submissions_fts.rowid"
+            key = "submissions_fts.rowid"
+            where.append("submissions_fts MATCH ?")
+            # Every word is quoted, so user input is never parsed as FTS5 syntax
+            params.append(' '.join('"' + word.replace('"', '""') + '"' for word in words))
+        elif words:
+            for word in words:
+                where.append("data LIKE ?")
+                params.append(f"%{word}%")
+        for name, value in (filters or {}).items():
+            if name not in FILTER_FIELDS:
+                raise ValueError(f"Cannot filter on {name}")
+            where.append(f"json_extract(data, '$.{name}') = ?")
+            params.append(value)
+        if created_from is not None:
+            where.append("created_at >= ?")
+            params.append(created_from)
+        if created_to is not None:
+            where.append("created_at < ?")
+            params.append(created_to)
+        if before_id is not None:
+            where.append(f"{key} < ?")
+            params.append(before_id)
+
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        rows = self._conn().execute(f"{sql} ORDER BY {key} DESC LIMIT ?", params + [limit]).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def export(self, after_id=0, created_from=None, up_to_id=None, batch_size=500):
+        """Yield submissions with ids in (`after_id`, `up_to_id`] in id order.
+
+        Rows are read `batch_size` at a time, each batch its own query, so
+        memory stays flat and no read transaction is held open between batches.
+        """
+        where, params = ["id > ?"], []
+        if created_from is not None:
+            where.append("created_at >= ?")
+            params.append(created_from)
+        if up_to_id is not None:
+            where.append("id <= ?")
+            params.append(up_to_id)
+        sql = f"SELECT * FROM submissions WHERE {' AND '.join(where)} ORDER BY id LIMIT ?"
+        while True:
+            rows = self._conn().execute(sql, [after_id] + params + [batch_size]).fetchall()
+            for row in rows:
+                yield self._row_to_dict(row)
+            if len(rows) < batch_size:
+                return
+            after_id = rows[-1]['id']
+
+    def last_id(self):
+        """Id of the newest submission, 0 if there is none"""
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM submissions").fetchone()[0]
+
+    def unsent(self, limit=100, after_id=0):
+        """Submissions whose admin or client email has not been delivered yet"""
+        rows = self._conn().execute(
+            "SELECT * FROM submissions"
+            " WHERE id > ? AND (admin_sent_at IS NULL OR client_sent_at IS NULL)"
+            " ORDER BY id LIMIT ?",
+            (after_id, limit),
+        ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    @staticmethod
+    def _create_fts(conn):
+        """Create and fill the full-text index once; False if SQLite lacks FTS5"""
+        options = {row[0] for row in conn.execute("PRAGMA compile_options")}
+        if 'ENABLE_FTS5' not in options:
+            logger.warning("SQLite has no FTS5, submission search falls back to LIKE")
+            return False
+        exists = "SELECT 1 FROM sqlite_master WHERE name = 'submissions_fts'"
+        if conn.execute(exists).fetchone():
+            return True
+        # Workers starting together: only the first one to get the write lock builds the index
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not conn.execute(exists).fetchone():
+                for statement in FTS_SCHEMA:
+                    conn.execute(statement)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _row_to_dict(row):
+        record = dict(row)
+        record['data'] = json.loads(record['data'])
+        return record
+
+
+def create_submission_store(base_dir):
+    """Open the store at SUBMISSIONS_DB (default: data/submissions.db under `base_dir`)"""
+    path = os.getenv('SUBMISSIONS_DB', os.path.join(base_dir, 'data', 'submissions.db'))
+    return SubmissionStore(path)
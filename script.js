@@ -3,6 +3,9 @@ document.addEventListener('DOMContentLoaded', function() {
     const form = document.getElementById('creativeBriefForm');
     const submitBtn = document.querySelector('.submit-btn');
     
+    // One key per filled-in brief, so retries are recognised by the server
+    let idempotencyKey = newIdempotencyKey();
+    
     // Add smooth scrolling for better UX
     document.querySelectorAll('a[href^="#"]').forEach(anchor => {
         anchor.addEventListener('click', function (e) {
@@ -31,6 +34,7 @@ document.addEventListener('DOMContentLoaded', function() {
         // Submit form via fetch API
         fetch('/submit', {
             method: 'POST',
+            headers: { 'Idempotency-Key': idempotencyKey },
             body: formData
         })
         .then(response => response.json())
@@ -38,10 +42,18 @@ document.addEventListener('DOMContentLoaded', function() {
             if (data.success) {
                 showSuccessMessage('Thank you! Your creative brief has been submitted successfully. We will contact you soon.');
                 form.reset();
+                idempotencyKey = newIdempotencyKey();
                 // Scroll to top to show success message
                 window.scrollTo({ top: 0, behavior: 'smooth' });
             } else {
                 showErrorMessage(data.message || 'There was an error submitting your form. Please try again.');
+                // Point at each field the server rejected
+                Object.entries(data.errors || {}).forEach(([name, message]) => {
+                    const field = form.elements[name];
+                    if (field) {
+                        showFieldError(field, message);
+                    }
+                });
             }
         })
         .catch(error => {
@@ -99,6 +111,13 @@ document.addEventListener('DOMContentLoaded', function() {
         field.parentNode.appendChild(errorDiv);
     }
 
+    function newIdempotencyKey() {
+        if (window.crypto && window.crypto.randomUUID) {
+            return window.crypto.randomUUID();
+        }
+        return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+    }
+
     function isValidEmail(email) {
         const emailRegex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
         return emailRegex.test(email);
@@ -0,0 +1,53 @@
+"""Shared test setup.
+
+The repository root goes on ``sys.path`` so tests import ``creative_brief``
+and the entry points the way the servers do. Every test gets an environment
+that points SMTP at a closed local port, so nothing reaches the provider
+named in a developer's ``.env``.
+"""
+import os
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def isolated_env(monkeypatch, tmp_path):
+    monkeypatch.setenv('SMTP_SERVER', '127.0.0.1')
+    monkeypatch.setenv('SMTP_PORT', '9')
+    monkeypatch.delenv('SMTP_USERNAME', raising=False)
+    monkeypatch.delenv('SMTP_PASSWORD', raising=False)
+    monkeypatch.setenv('ENV_FILE', str(tmp_path / 'no.env'))
+    monkeypatch.setenv('METRICS_DIR', '')
+    monkeypatch.setenv('MAIL_RETRY_DB', str(tmp_path / 'mail_retry.db'))
+    monkeypatch.setenv('SUBMISSIONS_DB', str(tmp_path / 'submissions.db'))
+    monkeypatch.setenv('MAIL_SPOOL_DIR', str(tmp_path / 'mail_spool'))
+    monkeypatch.setenv('PROFILING_DIR', str(tmp_path / 'profiles'))
+    return tmp_path
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """``make_app(delivery=None, **settings)`` builds the app on the repository's assets, with mail only logged"""
+    from creative_brief import Config, create_app
+
+    def make(delivery=None, **settings):
+        settings.setdefault('mail_backend', 'log')
+        return create_app(Config(ROOT, metrics_dir='', upload_dir=str(tmp_path / 'uploads'), **settings), delivery)
+    return make
+
+
+@pytest.fixture
+def wait_for():
+    """``wait_for(condition, timeout=10.0)`` polls `condition` until it is true, failing the test on timeout"""
+    def wait(condition, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline, 'timed out'
+            time.sleep(0.01)
+    return wait
@@ -0,0 +1,67 @@
+import pytest
+
+from creative_brief.services import EXTENSION
+
+from test_schema import VALID
+
+TOKEN = 'admin-secret'
+
+
+@pytest.fixture
+def admin(make_app):
+    app = make_app(admin_token=TOKEN)
+    store = app.extensions[EXTENSION].submission_store
+    for number, project_type in enumerate(('Branding', 'Website', 'Branding')):
+        store.add(dict(VALID, fullName=f"Client {number}", projectType=project_type,
+                       projectTitle=f"Launch {number}"), '127.0.0.1')
+    return app.test_client()
+
+
+def auth(token=TOKEN, scheme='Bearer'):
+    return {'Authorization': f"{scheme} {token}"}
+
+
+def test_api_is_disabled_without_a_token(make_app):
+    client = make_app().test_client()
+
+    assert client.get('/admin/submissions').status_code == 404
+    assert client.get('/admin/submissions', headers=auth()).status_code == 404
+
+
+@pytest.mark.parametrize('headers', [{}, auth('wrong'), auth(TOKEN + 'x'), auth(TOKEN, scheme='Basic'), auth('')])
+def test_missing_or_wrong_token_is_refused(admin, headers):
+    for path in ('/admin/submissions', '/admin/submissions/1', '/admin/export'):
+        response = admin.get(path, headers=headers)
+
+        assert response.status_code == 401
+        assert response.headers['WWW-Authenticate'] == 'Bearer'
+        assert response.get_json() == {'error': 'Unauthorized'}
+
+
+def test_correct_token_lists_newest_first(admin):
+    response = admin.get('/admin/submissions', headers=auth(scheme='bearer'))
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [row['fullName'] for row in body['submissions']] == ['Client 2', 'Client 1', 'Client 0']
+    assert body['next_cursor'] is None
+
+
+def test_filters_and_keyset_pages(admin):
+    first = admin.get('/admin/submissions?projectType=Branding&limit=1', headers=auth()).get_json()
+    second = admin.get(f"/admin/submissions?projectType=Branding&limit=1&cursor={first['next_cursor']}",
+                       headers=auth()).get_json()
+
+    assert [row['fullName'] for row in first['submissions']] == ['Client 2']
+    assert [row['fullName'] for row in second['submissions']] == ['Client 0']
+    assert second['next_cursor'] is None
+
+
+def test_one_submission_and_bad_queries(admin):
+    record = admin.get('/admin/submissions/2', headers=auth()).get_json()
+
+    assert record['data']['projectTitle'] == 'Launch 1'
+    assert record['attachments'] == []
+    assert admin.get('/admin/submissions/99', headers=auth()).status_code == 404
+    assert admin.get('/admin/submissions?limit=0', headers=auth()).status_code == 400
+    assert admin.get('/admin/submissions?from=yesterday', headers=auth()).status_code == 400
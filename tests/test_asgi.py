@@ -0,0 +1,100 @@
+import asyncio
+import csv
+import io
+import os
+
+from urllib.parse import urlencode
+
+from flask import send_file
+
+from creative_brief.export import ROWS_PER_CHUNK
+from creative_brief.services import EXTENSION
+
+from test_schema import VALID
+
+
+def call(application, path, query_string=b'', headers=(), method='GET', body=b''):
+    """Run one request through `application`; returns the ASGI messages it sent"""
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query_string,
+        'headers': list(headers), 'client': ('127.0.0.1', 5000), 'server': ('testserver', 80),
+    }
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+def bodies(sent):
+    assert sent[0]['type'] == 'http.response.start'
+    assert all(message['type'] == 'http.response.body' for message in sent[1:])
+    # Every chunk but the closing empty one says more is coming
+    assert all(message['more_body'] for message in sent[1:-1])
+    assert sent[-1] == {'type': 'http.response.body', 'body': b''}
+    return [message['body'] for message in sent[1:-1]]
+
+
+def make_asgi(make_app, **settings):
+    from asgi import ASGIApp
+
+    # With the spool backend startup does not open an SMTP pool
+    return ASGIApp(make_app(mail_backend='spool', **settings), threads=2)
+
+
+def test_export_is_streamed_chunk_by_chunk(make_app):
+    application = make_asgi(make_app, admin_token='secret')
+    store = application.wsgi_app.extensions[EXTENSION].submission_store
+    for number in range(3 * ROWS_PER_CHUNK):
+        store.add({'fullName': f"Client {number}", 'projectTitle': 'Brief'}, '127.0.0.1')
+
+    sent = call(application, '/admin/export', b'format=csv', [(b'authorization', b'Bearer secret')])
+
+    assert sent[0]['status'] == 200
+    chunks = bodies(sent)
+    assert len(chunks) >= 3
+    rows = list(csv.DictReader(io.StringIO(b''.join(chunks).decode('utf-8'))))
+    assert [row['fullName'] for row in rows] == [f"Client {number}" for number in range(3 * ROWS_PER_CHUNK)]
+
+
+def test_file_download_is_streamed(make_app, tmp_path):
+    content = os.urandom(256 * 1024)
+    path = tmp_path / 'reference.bin'
+    path.write_bytes(content)
+    application = make_asgi(make_app)
+    application.wsgi_app.add_url_rule('/download-test', 'download_test', lambda: send_file(str(path)))
+
+    chunks = bodies(call(application, '/download-test'))
+
+    assert len(chunks) > 1
+    assert max(len(chunk) for chunk in chunks) < len(content)
+    assert b''.join(chunks) == content
+
+
+def test_small_response(make_app):
+    sent = call(make_asgi(make_app), '/health/live')
+
+    assert sent[0]['status'] == 200
+    assert b''.join(bodies(sent)) == b'{"status": "alive"}'
+
+
+def test_log_backend_is_kept(make_app):
+    from asgi import ASGIApp
+
+    application = ASGIApp(make_app(mail_backend='log'), threads=2)
+    service = application.wsgi_app.extensions[EXTENSION]
+    queue = service.mail_queue
+
+    sent = call(application, '/submit', method='POST', body=urlencode(VALID).encode(),
+                headers=[(b'content-type', b'application/x-www-form-urlencoded')])
+
+    assert sent[0]['status'] == 200
+    assert service.mail_queue is queue and application.smtp_pool is None
+    submission = service.submission_store.get(1)
+    # Logged, not handed to SMTP on 127.0.0.1:9
+    assert submission['admin_sent_at'] and submission['client_sent_at']
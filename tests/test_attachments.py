@@ -0,0 +1,118 @@
+import hashlib
+import io
+import os
+import re
+from urllib.parse import urlsplit
+
+import pytest
+
+from creative_brief.mail_queue import MailQueue
+
+from test_schema import VALID
+
+SMALL = b'small reference file'
+LARGE = bytes(range(256)) * 3
+
+
+@pytest.fixture
+def uploads(make_app, tmp_path):
+    """``(client, sent, directory)``: files over 100 bytes are linked from the admin email, not attached"""
+    sent = []
+
+    def record(to_email, subject, html_body, **options):
+        sent.append(dict(options, to=to_email, html_body=html_body))
+        return True
+
+    app = make_app(delivery=MailQueue(record, workers=0),
+                   max_attachments=2, max_attachment_size=1024, attachment_inline_limit=100)
+    return app.test_client(), sent, tmp_path / 'uploads'
+
+
+def stored_path(directory, content):
+    digest = hashlib.sha256(content).hexdigest()
+    return str(directory / digest[:2] / digest)
+
+
+def stored_files(directory):
+    return [name for folder, _, names in os.walk(directory) if not folder.endswith('tmp') for name in names]
+
+
+def leftover_parts(directory):
+    return [name for name in os.listdir(directory / 'tmp') if name.endswith('.part')]
+
+
+def test_small_file_is_attached_and_large_file_linked(uploads):
+    client, sent, directory = uploads
+
+    response = client.post('/submit', data=dict(VALID, attachments=[
+        (io.BytesIO(SMALL), 'C:\\briefs\\notes.txt', 'text/plain'),
+        (io.BytesIO(LARGE), 'moodboard.bin'),
+    ]))
+
+    assert response.get_json()['success'] is True
+    admin, confirmation = sent
+    assert admin['attachments'] == [(stored_path(directory, SMALL), 'notes.txt', 'text/plain')]
+    assert 'attached to this email' in admin['html_body']
+    assert 'attachments' not in confirmation
+    assert leftover_parts(directory) == []
+
+    # The large file is only reachable through the signed link in the email
+    link = urlsplit(re.search(r"<a href='([^']+)'>download</a>", admin['html_body']).group(1)).path
+    download = client.get(link)
+    assert download.status_code == 200
+    assert download.data == LARGE
+    assert download.headers['Content-Type'] == 'application/octet-stream'
+    assert download.headers['X-Content-Type-Options'] == 'nosniff'
+    assert download.headers['Content-Disposition'].startswith('attachment;')
+    assert client.get('/attachments/forged').status_code == 404
+
+
+def test_same_content_is_stored_once(uploads):
+    client, _, directory = uploads
+
+    for number in range(2):
+        response = client.post('/submit', data=dict(VALID, projectTitle=f"Brief {number}",
+                                                     attachments=[(io.BytesIO(LARGE), f"copy{number}.bin")]))
+        assert response.get_json()['success'] is True
+
+    assert stored_files(directory) == [hashlib.sha256(LARGE).hexdigest()]
+
+
+def test_declared_type_is_never_rendered_inline(uploads):
+    # Any type is accepted, but a download never renders in the admin's browser
+    client, sent, _ = uploads
+    page = b'<script>alert(1)</script>' * 8
+
+    client.post('/submit', data=dict(VALID, attachments=[(io.BytesIO(page), 'page.html', 'text/html')]))
+    link = urlsplit(re.search(r"<a href='([^']+)'>download</a>", sent[0]['html_body']).group(1)).path
+    download = client.get(link)
+
+    assert download.data == page
+    assert download.headers['Content-Disposition'] == 'attachment; filename=page.html'
+    assert download.headers['X-Content-Type-Options'] == 'nosniff'
+
+
+def test_oversized_file_is_refused_with_413(uploads):
+    client, sent, directory = uploads
+
+    response = client.post('/submit', data=dict(VALID, attachments=[(io.BytesIO(b'x' * 1025), 'huge.bin')]))
+
+    assert response.status_code == 413
+    assert response.get_json()['success'] is False
+    assert sent == []
+    assert leftover_parts(directory) == []
+
+
+def test_too_many_files_is_a_validation_error(uploads):
+    client, sent, directory = uploads
+
+    response = client.post('/submit', data=dict(VALID, attachments=[
+        (io.BytesIO(SMALL), f"file{number}.txt") for number in range(3)
+    ]))
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['success'] is False
+    assert body['errors']['attachments'] == 'At most 2 files can be attached'
+    assert sent == []
+    assert leftover_parts(directory) == []
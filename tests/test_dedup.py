@@ -0,0 +1,81 @@
+import threading
+import time
+
+from creative_brief.dedup import DuplicateIndex, fingerprint
+
+from test_schema import VALID
+
+
+def test_fingerprint_ignores_case_and_whitespace():
+    assert fingerprint({'name': 'Ada  Lovelace', 'notes': 'Line\r\nTwo'}) == \
+        fingerprint({'notes': 'line two ', 'name': ' ada lovelace'})
+    assert fingerprint({'name': 'Ada'}) != fingerprint({'name': 'Ada', 'notes': ''})
+    assert fingerprint({'name': 'Ada'}) != fingerprint({'name': 'Adam'})
+
+
+def test_repeat_gets_the_first_result():
+    index = DuplicateIndex()
+    previous, claim = index.begin(['key:abc', 'form:123'])
+    assert previous is None
+    index.complete(claim, {'submission_id': 1})
+
+    # Matching on either key is enough
+    assert index.begin(['key:other', 'form:123']) == ({'submission_id': 1}, None)
+    assert index.begin(['', 'key:abc']) == ({'submission_id': 1}, None)
+
+
+def test_abandoned_submission_can_be_retried():
+    index = DuplicateIndex()
+    _, claim = index.begin(['form:123'])
+    index.abandon(claim)
+
+    previous, claim = index.begin(['form:123'])
+    assert previous is None and claim is not None
+
+
+def test_entries_expire_after_the_window():
+    index = DuplicateIndex(window=0.05)
+    _, claim = index.begin(['form:123'])
+    index.complete(claim, {'submission_id': 1})
+    time.sleep(0.1)
+
+    assert index.begin(['form:123'])[0] is None
+
+
+def test_index_is_bounded():
+    index = DuplicateIndex(max_entries=2)
+    for number in range(3):
+        _, claim = index.begin([f"form:{number}"])
+        index.complete(claim, {'submission_id': number})
+
+    assert index.begin(['form:0'])[0] is None
+    assert index.begin(['form:2'])[0] == {'submission_id': 2}
+
+
+def test_concurrent_duplicate_waits_for_the_first_result():
+    index = DuplicateIndex()
+    _, claim = index.begin(['form:123'])
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(index.begin(['form:123'])))
+    waiter.start()
+    time.sleep(0.05)
+    index.complete(claim, {'submission_id': 7})
+    waiter.join(5)
+
+    assert results == [({'submission_id': 7}, None)]
+
+
+def test_double_submit_is_stored_once(make_app):
+    client = make_app().test_client()
+
+    first = client.post('/submit', data=VALID).get_json()
+    second = client.post('/submit', data=dict(VALID, fullName='  ada LOVELACE ')).get_json()
+    keyed = client.post('/submit', data=dict(VALID, projectTitle='Other'),
+                        headers={'Idempotency-Key': 'retry-1'}).get_json()
+    repeat = client.post('/submit', data=dict(VALID, projectTitle='Changed'),
+                         headers={'Idempotency-Key': 'retry-1'}).get_json()
+
+    assert first['success'] is True
+    assert second == first
+    assert keyed['submission_id'] != first['submission_id']
+    assert repeat == keyed
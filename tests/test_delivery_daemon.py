@@ -0,0 +1,99 @@
+import logging
+import multiprocessing
+import sys
+import time
+from types import SimpleNamespace
+
+from creative_brief.circuit_breaker import CircuitBreaker, CircuitOpenError
+from creative_brief.delivery_daemon import DeliveryWorker
+from creative_brief.mail_spool import MailSpool
+
+
+class HeldQueue:
+    """Mail queue that keeps the callbacks of every message for the test to call"""
+
+    workers = 4
+
+    def __init__(self):
+        self.held = []
+
+    def enqueue(self, to_email, subject, html_body, on_sent=None, on_failed=None, **kwargs):
+        self.held.append((to_email, on_sent, on_failed))
+
+
+def make_worker(tmp_path, breaker, messages=5):
+    spool = MailSpool(str(tmp_path / 'spool'))
+    for number in range(messages):
+        spool.put({'to': f"user{number}@example.com", 'subject': 'Subject', 'html_body': '<p>Hi</p>',
+                   'options': {}, 'receipts': [[number, 'client']]})
+    service = SimpleNamespace(smtp_breaker=breaker, mail_queue=HeldQueue(), mail_retry=None)
+    return DeliveryWorker(service, spool), spool
+
+
+def half_open_breaker():
+    breaker = CircuitBreaker('SMTP', min_calls=1, open_timeout=0.01)
+    breaker.record(failed=True)
+    time.sleep(0.02)
+    return breaker
+
+
+def test_closed_circuit_claims_a_batch(tmp_path):
+    worker, spool = make_worker(tmp_path, CircuitBreaker('SMTP'))
+
+    assert worker.run_once() == 5
+    assert spool.depth() == 0
+
+
+def test_half_open_circuit_claims_one_probe_at_a_time(tmp_path):
+    worker, spool = make_worker(tmp_path, half_open_breaker())
+
+    assert worker.run_once() == 1
+    # The probe is still in flight
+    assert worker.run_once() == 0
+    assert len(worker.service.mail_queue.held) == 1
+
+
+def test_circuit_rejection_returns_message_to_spool(tmp_path):
+    worker, spool = make_worker(tmp_path, half_open_breaker())
+    worker.run_once()
+    to_email, _, on_failed = worker.service.mail_queue.held[0]
+
+    on_failed(CircuitOpenError('SMTP circuit is open'))
+
+    assert spool.depth() == 5
+    assert to_email in [message['to'] for _, message in spool.claim(5)]
+
+
+
+def run_configured_worker(log_path):
+    from creative_brief.delivery_daemon import run_worker
+    from creative_brief.log_pipeline import configure_logging
+
+    # A fresh log pipeline, not the one another test installed in the parent
+    logging.getLogger().handlers.clear()
+    sys.stderr = open(log_path, 'w')
+    configure_logging('text')
+    run_worker()
+
+
+def test_stopped_worker_flushes_logs_and_metrics(monkeypatch, tmp_path, wait_for):
+    monkeypatch.setenv('METRICS_DIR', str(tmp_path / 'metrics'))
+    monkeypatch.setenv('MAIL_DAEMON_POLL_INTERVAL', '0.05')
+    log_path = tmp_path / 'worker.log'
+    log_path.touch()
+    process = multiprocessing.get_context('fork').Process(target=run_configured_worker, args=(str(log_path),))
+    process.start()
+    try:
+        wait_for(lambda: 'started with' in log_path.read_text())
+        snapshots = list((tmp_path / 'metrics').glob(f"{process.pid}*.json"))
+        started = max(path.stat().st_mtime_ns for path in snapshots)
+        process.terminate()
+        process.join(10)
+    finally:
+        process.kill()
+
+    assert process.exitcode == 0
+    # Logged after SIGTERM: only there if the child drained its log queue
+    assert f"Delivery worker {process.pid} stopped" in log_path.read_text()
+    snapshots = list((tmp_path / 'metrics').glob(f"{process.pid}*.json"))
+    assert max(path.stat().st_mtime_ns for path in snapshots) > started
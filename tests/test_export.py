@@ -0,0 +1,36 @@
+import csv
+import io
+import json
+
+from creative_brief.export import COLUMNS, ROWS_PER_CHUNK, render
+
+
+def records(count, **fields):
+    return ({'id': number, 'submitted_at': '2026-01-01T00:00:00', **fields} for number in range(1, count + 1))
+
+
+def test_csv_is_chunked_with_one_header():
+    chunks = list(render(records(2 * ROWS_PER_CHUNK + 1, fullName='Ada'), 'csv'))
+
+    assert len(chunks) == 3
+    rows = list(csv.DictReader(io.StringIO(''.join(chunks))))
+    assert len(rows) == 2 * ROWS_PER_CHUNK + 1
+    assert list(rows[0]) == list(COLUMNS)
+
+
+def test_csv_neutralizes_formulas():
+    values = ['=HYPERLINK("http://evil.example","x")', '+1 555 0100', '-2+3', '@SUM(A1)', '\tTab', '\rCR',
+              'Plain = text', '']
+    chunks = render(({'id': number, 'fullName': value} for number, value in enumerate(values)), 'csv')
+
+    rows = list(csv.DictReader(io.StringIO(''.join(chunks))))
+    assert [row['fullName'] for row in rows] == [
+        '\'=HYPERLINK("http://evil.example","x")', "'+1 555 0100", "'-2+3", "'@SUM(A1)", "'\tTab", "'\rCR",
+        'Plain = text', '']
+    assert [row['id'] for row in rows] == [str(number) for number in range(len(values))]
+
+
+def test_jsonl_keeps_values_as_submitted():
+    lines = ''.join(render(records(2, fullName='=1+1'), 'jsonl')).splitlines()
+
+    assert [json.loads(line)['fullName'] for line in lines] == ['=1+1', '=1+1']
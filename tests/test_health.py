@@ -0,0 +1,70 @@
+import json
+import threading
+
+from creative_brief.health import HealthChecker
+from creative_brief.services import EXTENSION
+
+
+def verdict(checker):
+    body, status = checker.readiness()
+    return json.loads(body), status
+
+
+def test_verdict_published_before_slow_check_finishes(wait_for):
+    release = threading.Event()
+    checker = HealthChecker(interval=60)
+    checker.add('storage', lambda: {'writable': True})
+    checker.add('smtp', lambda: release.wait(5) and None, critical=False, slow=True)
+
+    checker.start()
+    wait_for(lambda: verdict(checker)[1] == 200)
+    body, _ = verdict(checker)
+    assert body['status'] == 'ready'
+    assert body['checks']['storage']['ok'] is True
+    assert body['checks']['smtp'] == {'ok': None, 'pending': True}
+
+    release.set()
+    wait_for(lambda: verdict(checker)[0]['checks']['smtp']['ok'] is True)
+
+
+def test_failing_critical_check_is_not_ready():
+    def broken():
+        raise OSError('read-only file system')
+
+    checker = HealthChecker()
+    checker.add('storage', broken)
+    checker.add('smtp', lambda: None, critical=False, slow=True)
+    checker.run_checks()
+
+    body, status = verdict(checker)
+    assert status == 503
+    assert body['status'] == 'not_ready'
+    assert body['checks']['storage']['ok'] is False
+    assert body['checks']['storage']['error'] == 'read-only file system'
+
+
+def test_failing_slow_check_only_degrades():
+    def unreachable():
+        raise ConnectionRefusedError()
+
+    checker = HealthChecker()
+    checker.add('storage', lambda: None)
+    checker.add('smtp', unreachable, critical=False, slow=True)
+    checker.run_checks()
+
+    body, status = verdict(checker)
+    assert status == 200
+    assert body['status'] == 'degraded'
+    assert body['checks']['smtp']['error'] == 'ConnectionRefusedError'
+
+
+def test_app_is_ready_without_a_probe_starting_the_checker(make_app, wait_for):
+    app = make_app(smtp_username='user', smtp_password='secret')
+    service = app.extensions[EXTENSION]
+
+    assert service.health._thread is not None and service.health._thread.is_alive()
+    # SMTP points at a closed port: degraded once that check has run, ready before
+    wait_for(lambda: json.loads(service.health._verdict[0])['status'] != 'starting')
+    response = app.test_client().get('/health/ready')
+    assert response.status_code == 200
+    assert response.get_json()['status'] in ('ready', 'degraded')
@@ -0,0 +1,93 @@
+from urllib.parse import urlencode
+
+import pytest
+from flask import request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from creative_brief.limits import CHUNK_SIZE
+
+
+def parse(app, body, content_type):
+    with app.test_request_context('/submit', method='POST', data=body, content_type=content_type):
+        return request.form.to_dict(flat=False), {name: file.read() for name, file in request.files.items()}
+
+
+def multipart(fields=(), files=(), boundary='testboundary'):
+    parts = []
+    for name, value in fields:
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode() + value)
+    for name, filename, content in files:
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: application/octet-stream\r\n\r\n'.encode() + content)
+    return b'\r\n'.join(parts) + f'\r\n--{boundary}--\r\n'.encode(), f'multipart/form-data; boundary={boundary}'
+
+
+def test_urlencoded_fields_across_chunk_boundaries(make_app):
+    app = make_app(max_field_size=3 * CHUNK_SIZE)
+    fields = [('a', 'x' * (CHUNK_SIZE - 3)), ('b', 'ü&=' * (CHUNK_SIZE // 6)), ('a', ''), ('c', 'end')]
+
+    form, _ = parse(app, urlencode(fields).encode(), 'application/x-www-form-urlencoded')
+
+    assert form == {'a': ['x' * (CHUNK_SIZE - 3), ''], 'b': ['ü&=' * (CHUNK_SIZE // 6)], 'c': ['end']}
+
+
+def test_urlencoded_field_over_limit_is_refused(make_app):
+    app = make_app(max_field_size=1024)
+    body = urlencode({'ok': 'x' * 100, 'big': 'y' * 2000}).encode()
+
+    with pytest.raises(RequestEntityTooLarge):
+        parse(app, body, 'application/x-www-form-urlencoded')
+
+
+def test_urlencoded_field_over_limit_is_refused_before_its_end(make_app):
+    # No '&' for several chunks: the pending pair alone is over the limit
+    app = make_app(max_field_size=CHUNK_SIZE)
+
+    with pytest.raises(RequestEntityTooLarge):
+        parse(app, b'big=' + b'y' * (4 * CHUNK_SIZE), 'application/x-www-form-urlencoded')
+
+
+def test_urlencoded_too_many_parts_is_refused(make_app):
+    app = make_app(max_form_parts=10)
+
+    with pytest.raises(RequestEntityTooLarge):
+        parse(app, urlencode([(f"f{number}", 'v') for number in range(20)]).encode(),
+              'application/x-www-form-urlencoded')
+
+
+def test_multipart_fields_and_files(make_app):
+    app = make_app(max_field_size=1024)
+    content = bytes(range(256)) * 64
+    body, content_type = multipart([('name', 'Zoë'.encode()), ('notes', b'x' * 1024)],
+                                   [('attachments', 'ref.bin', content)])
+
+    form, files = parse(app, body, content_type)
+
+    assert form == {'name': ['Zoë'], 'notes': ['x' * 1024]}
+    # Files are not fields: only the attachment limits apply to them
+    assert files == {'attachments': content}
+
+
+def test_multipart_field_over_limit_is_refused(make_app):
+    app = make_app(max_field_size=1024)
+    body, content_type = multipart([('notes', b'x' * 1025)])
+
+    with pytest.raises(RequestEntityTooLarge):
+        parse(app, body, content_type)
+
+
+def test_submit_answers_413_with_json(make_app):
+    client = make_app(max_field_size=1024).test_client()
+
+    response = client.post('/submit', data={'fullName': 'x' * 5000})
+
+    assert response.status_code == 413
+    assert response.get_json()['success'] is False
+
+
+def test_body_over_content_length_limit_is_refused(make_app):
+    client = make_app(max_content_length=4096).test_client()
+
+    response = client.post('/submit', data={'notes': 'x' * 1000, 'more': 'y' * 4000})
+
+    assert response.status_code == 413
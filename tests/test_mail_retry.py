@@ -0,0 +1,203 @@
+import os
+import smtplib
+import threading
+import time
+
+import pytest
+
+from creative_brief.circuit_breaker import OPEN, CircuitBreaker, CircuitOpenError
+from creative_brief.config import Config
+from creative_brief.delivery import SMTPSender
+from creative_brief.mail_queue import MailQueue
+from creative_brief.mail_retry import RetryScheduler, RetryStore
+from creative_brief.services import EXTENSION
+
+
+class FakePool:
+    """Stands in for `SMTPConnectionPool`, counting real send attempts"""
+
+    def __init__(self, up=False):
+        self.up = up
+        self.attempts = 0
+
+    def send_message(self, msg):
+        self.attempts += 1
+        if not self.up:
+            raise ConnectionRefusedError('SMTP server down')
+
+
+class RefusingPool:
+    """Stands in for `SMTPConnectionPool` on a server that refuses every recipient"""
+
+    attempts = 0
+
+    def send_message(self, msg):
+        self.attempts += 1
+        raise smtplib.SMTPRecipientsRefused({msg['To']: (550, b'No such user')})
+
+
+def make_scheduler(tmp_path, pool, breaker, max_attempts=3):
+    config = Config(str(tmp_path), smtp_username='user', smtp_password='secret')
+    queue = MailQueue(SMTPSender(config, pool=pool, breaker=breaker).send, workers=0)
+    store = RetryStore(str(tmp_path / 'retry.db'))
+    sent = []
+    scheduler = RetryScheduler(store, queue.enqueue, sent.extend, max_attempts=max_attempts,
+                               base_delay=0.0, max_delay=0.0, permits=breaker.permits)
+    return scheduler, sent
+
+
+def open_breaker(open_timeout):
+    breaker = CircuitBreaker('SMTP', min_calls=1, open_timeout=open_timeout)
+    breaker.record(failed=True)
+    assert breaker.state == OPEN
+    return breaker
+
+
+def add_due(store, count):
+    for number in range(count):
+        store.add(f"user{number}@example.com", 'Subject', '<p>Hi</p>', {}, [(number, 'client')], 1, time.time())
+
+
+def attempts(store):
+    return sorted(record['attempts'] for record in store.due(time.time() + 3600, limit=100))
+
+
+def test_open_circuit_resends_nothing(tmp_path):
+    pool = FakePool()
+    scheduler, _ = make_scheduler(tmp_path, pool, open_breaker(open_timeout=60))
+    add_due(scheduler.store, 8)
+
+    assert scheduler.run_pending() == 0
+    assert pool.attempts == 0
+    assert attempts(scheduler.store) == [1] * 8
+
+
+def test_half_open_resends_one_message_per_probe(tmp_path):
+    pool = FakePool()
+    breaker = open_breaker(open_timeout=0.01)
+    scheduler, _ = make_scheduler(tmp_path, pool, breaker)
+    add_due(scheduler.store, 8)
+    time.sleep(0.02)
+
+    assert scheduler.run_pending() == 1
+    assert pool.attempts == 1
+    assert breaker.state == OPEN
+    assert attempts(scheduler.store) == [1] * 7 + [2]
+    assert scheduler.store.counts() == (8, 0)
+
+
+def test_outage_uses_one_attempt_per_real_send(tmp_path):
+    pool = FakePool()
+    breaker = open_breaker(open_timeout=0.01)
+    scheduler, _ = make_scheduler(tmp_path, pool, breaker, max_attempts=3)
+    add_due(scheduler.store, 8)
+
+    for _ in range(40):
+        if scheduler.store.counts()[0] == 0:
+            break
+        time.sleep(0.02)
+        scheduler.run_pending()
+
+    # Two more real sends each before any message is buried
+    dead = scheduler.store.dead_letters()
+    assert pool.attempts == 16
+    assert len(dead) == 8
+    assert all(record['attempts'] == 3 for record in dead)
+
+
+def test_rejected_send_keeps_its_attempts(tmp_path):
+    pool = FakePool()
+    breaker = open_breaker(open_timeout=60)
+    scheduler, _ = make_scheduler(tmp_path, pool, breaker)
+    add_due(scheduler.store, 3)
+    # A scheduler without a gate still hands messages to the open circuit
+    scheduler.permits = None
+
+    assert scheduler.run_pending() == 3
+    assert pool.attempts == 0
+    assert attempts(scheduler.store) == [1, 1, 1]
+    assert scheduler.store.counts() == (3, 0)
+
+
+def test_recovery_closes_circuit_then_sends_the_rest(tmp_path):
+    pool = FakePool(up=True)
+    breaker = open_breaker(open_timeout=0.01)
+    scheduler, sent = make_scheduler(tmp_path, pool, breaker)
+    add_due(scheduler.store, 8)
+    time.sleep(0.02)
+
+    assert scheduler.run_pending() == 1
+    assert scheduler.run_pending() == 7
+    assert pool.attempts == 8
+    assert scheduler.store.counts() == (0, 0)
+    assert sorted(sent) == [(number, 'client') for number in range(8)]
+
+
+def test_first_send_rejected_by_circuit_is_stored_without_an_attempt(tmp_path):
+    scheduler, _ = make_scheduler(tmp_path, FakePool(), open_breaker(open_timeout=60))
+
+    scheduler.schedule('a@example.com', 'Subject', '<p>Hi</p>', [(1, 'client')], {}, CircuitOpenError('open'))
+    scheduler.schedule('b@example.com', 'Subject', '<p>Hi</p>', [(2, 'client')], {}, OSError('down'))
+
+    assert attempts(scheduler.store) == [0, 1]
+
+
+def retry_threads():
+    return [thread for thread in threading.enumerate() if thread.name == 'mail-retry' and thread.is_alive()]
+
+
+def test_app_starts_the_poller_without_waiting_for_mail(make_app):
+    service = make_app(mail_backend='queue').extensions[EXTENSION]
+
+    assert service.mail_retry._thread in retry_threads()
+
+
+def test_spooled_app_leaves_polling_to_the_daemon(make_app):
+    service = make_app(mail_backend='spool').extensions[EXTENSION]
+
+    assert service.mail_retry._thread is None
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_forked_worker_starts_its_own_poller(make_app):
+    service = make_app(mail_backend='queue').extensions[EXTENSION]
+
+    pid = os.fork()
+    if pid == 0:
+        # Child: exit status 0 only if this process has its own polling thread
+        thread = service.mail_retry._thread
+        os._exit(0 if thread in retry_threads() and service.mail_retry._pid == os.getpid() else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+
+
+def test_refused_address_is_not_retried(tmp_path):
+    pool = RefusingPool()
+    breaker = CircuitBreaker('SMTP', min_calls=1)
+    scheduler, sent = make_scheduler(tmp_path, pool, breaker, max_attempts=8)
+    add_due(scheduler.store, 1)
+
+    assert scheduler.run_pending() == 1
+
+    assert pool.attempts == 1
+    assert scheduler.store.counts() == (0, 1)
+    assert scheduler.store.dead_letters()[0]['attempts'] == 2
+    assert sent == []
+    # The server answered; the circuit stays closed
+    assert breaker.state != OPEN
+
+
+def test_refused_first_attempt_goes_straight_to_dead_letters(tmp_path):
+    config = Config(str(tmp_path), smtp_username='user', smtp_password='secret')
+    queue = MailQueue(SMTPSender(config, pool=RefusingPool()).send, workers=0)
+    scheduler = RetryScheduler(RetryStore(str(tmp_path / 'retry.db')), queue.enqueue, lambda receipts: None)
+    errors = []
+
+    def on_failed(error=None):
+        errors.append(error)
+        scheduler.schedule('nobody@example.com', 'Subject', '<p>Hi</p>', [(1, 'client')], {}, error)
+
+    queue.enqueue('nobody@example.com', 'Subject', '<p>Hi</p>', on_failed=on_failed)
+
+    assert isinstance(errors[0], smtplib.SMTPRecipientsRefused)
+    assert scheduler.store.counts() == (0, 1)
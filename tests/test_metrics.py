@@ -0,0 +1,112 @@
+import json
+import os
+import subprocess
+import sys
+
+from creative_brief.metrics import MultiProcessCollector, Registry
+
+
+def make_registry():
+    registry = Registry()
+    registry.counter('emails_total', 'Emails sent', ('kind',)).inc('client', amount=3)
+    registry.histogram('send_seconds', 'Send latency', buckets=(1.0,)).observe(0.5)
+    registry.gauge('queue_depth', 'Messages waiting', lambda: 7)
+    return registry
+
+
+def exited_pid():
+    process = subprocess.Popen([sys.executable, '-c', ''])
+    process.wait()
+    return process.pid
+
+
+def write_snapshot(directory, registry, pid, start):
+    snapshot = dict(registry.snapshot(), pid=pid, start=start)
+    (directory / f"{pid}-{start}.json").write_text(json.dumps(snapshot))
+
+
+def sample(text, name):
+    return [line for line in text.splitlines() if line.startswith(name)]
+
+
+def test_snapshot_is_named_by_pid_and_start_time(tmp_path):
+    collector = MultiProcessCollector(make_registry(), str(tmp_path))
+    collector.write()
+
+    (path,) = tmp_path.glob('*.json')
+    snapshot = json.loads(path.read_text())
+    assert path.name == f"{os.getpid()}-{snapshot['start']}.json"
+    assert snapshot['pid'] == os.getpid()
+
+
+def test_exited_process_counts_but_its_gauges_do_not(tmp_path):
+    registry = make_registry()
+    write_snapshot(tmp_path, registry, exited_pid(), 1)
+    collector = MultiProcessCollector(registry, str(tmp_path))
+
+    text = collector.collect()
+
+    assert sample(text, 'emails_total') == ['emails_total{kind="client"} 6.0']
+    assert sample(text, 'queue_depth') == ['queue_depth 7.0']
+
+
+def test_recycled_pid_is_a_different_process(tmp_path):
+    registry = make_registry()
+    # An earlier process that had this pid, started at another time
+    write_snapshot(tmp_path, registry, os.getpid(), 1)
+    collector = MultiProcessCollector(registry, str(tmp_path))
+
+    text = collector.collect()
+
+    assert len(list(tmp_path.glob(f"{os.getpid()}-*.json"))) == 2
+    assert sample(text, 'emails_total') == ['emails_total{kind="client"} 6.0']
+    assert sample(text, 'queue_depth') == ['queue_depth 7.0']
+
+
+def test_prune_folds_exited_processes_into_one_file(tmp_path):
+    registry = make_registry()
+    collector = MultiProcessCollector(registry, str(tmp_path))
+    collector.write()
+    (own,) = [path.name for path in tmp_path.glob('*.json')]
+    for start in (1, 2):
+        write_snapshot(tmp_path, registry, exited_pid(), start)
+    write_snapshot(tmp_path, registry, os.getpid(), 3)
+
+    collector.prune()
+    collector.prune()
+
+    names = sorted(path.name for path in tmp_path.glob('*.json'))
+    assert names == sorted([MultiProcessCollector.EXITED_FILE, own])
+    exited = json.loads((tmp_path / MultiProcessCollector.EXITED_FILE).read_text())
+    assert 'queue_depth' not in exited['metrics']
+    text = collector.collect()
+    # Three exited processes and this one: nothing lost, nothing counted twice
+    assert sample(text, 'emails_total') == ['emails_total{kind="client"} 12.0']
+    assert 'send_seconds_count 4' in text
+    assert sample(text, 'queue_depth') == ['queue_depth 7.0']
+
+
+def test_shared_gauge_is_not_summed_across_processes():
+    registry = Registry()
+    registry.gauge('retry_waiting', 'Rows in the shared retry database', lambda: 1, shared=True)
+    registry.gauge('threads_busy', 'Busy threads in this process', lambda: 1)
+    snapshot = registry.snapshot()
+
+    text = registry.render([snapshot, dict(snapshot, pid=snapshot['pid'] + 1)])
+
+    assert sample(text, 'retry_waiting') == ['retry_waiting 1.0']
+    assert sample(text, 'threads_busy') == ['threads_busy 2.0']
+
+
+def test_spool_depth_is_counted_once(make_app):
+    from creative_brief.metrics import REGISTRY
+    from creative_brief.services import EXTENSION
+
+    service = make_app(mail_backend='spool').extensions[EXTENSION]
+    service.mail_queue.enqueue('client@example.com', 'Subject', '<p>Hi</p>')
+    snapshot = REGISTRY.snapshot()
+
+    # Two web workers looking at the same spool directory
+    text = REGISTRY.render([snapshot, dict(snapshot, pid=snapshot['pid'] + 1)])
+
+    assert sample(text, 'mail_queue_depth') == ['mail_queue_depth 1.0']
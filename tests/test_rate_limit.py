@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from creative_brief.rate_limit import MemoryTokenBuckets
+
+from test_schema import VALID
+
+
+def brief(number):
+    # Distinct briefs, so the duplicate check never answers for the limiter
+    return dict(VALID, projectTitle=f"Brief {number}")
+
+
+@pytest.fixture
+def limited(monkeypatch, tmp_path):
+    monkeypatch.setenv('RATE_LIMIT_ENABLED', 'True')
+    monkeypatch.setenv('RATE_LIMIT_BURST', '2')
+    monkeypatch.setenv('RATE_LIMIT_PER_HOUR', '20')
+    monkeypatch.setenv('RATE_LIMIT_DB', str(tmp_path / 'ratelimit.db'))
+    return monkeypatch
+
+
+def test_submissions_past_the_burst_get_429(make_app, limited):
+    client = make_app().test_client()
+
+    accepted = [client.post('/submit', data=brief(number)) for number in range(2)]
+    refused = client.post('/submit', data=brief(2))
+
+    assert [response.status_code for response in accepted] == [200, 200]
+    assert refused.status_code == 429
+    assert refused.get_json()['success'] is False
+    # One token every 180 seconds at 20 an hour
+    assert 170 < int(refused.headers['Retry-After']) <= 180
+
+
+def test_email_is_limited_across_addresses(make_app, limited):
+    client = make_app().test_client()
+
+    for number in range(2):
+        client.post('/submit', data=brief(number), environ_base={'REMOTE_ADDR': f"10.0.0.{number}"})
+    refused = client.post('/submit', data=brief(2), environ_base={'REMOTE_ADDR': '10.0.0.9'})
+    other = client.post('/submit', data=dict(brief(3), email='grace@example.com'),
+                        environ_base={'REMOTE_ADDR': '10.0.0.10'})
+
+    assert refused.status_code == 429
+    assert other.status_code == 200
+
+
+def test_window_resets(make_app, limited):
+    limited.setenv('RATE_LIMIT_PER_HOUR', str(10 * 3600))
+    client = make_app().test_client()
+
+    for number in range(2):
+        client.post('/submit', data=brief(number))
+    refused = client.post('/submit', data=brief(2))
+    time.sleep(0.15)
+    retried = client.post('/submit', data=brief(3))
+
+    assert refused.status_code == 429
+    assert refused.headers['Retry-After'] == '1'
+    assert retried.status_code == 200
+
+
+def test_sqlite_buckets_are_shared_between_apps(make_app, limited):
+    limited.setenv('RATE_LIMIT_BACKEND', 'sqlite')
+    first, second = make_app().test_client(), make_app().test_client()
+
+    statuses = [client.post('/submit', data=brief(number)).status_code
+                for number, client in enumerate([first, second, first, second])]
+
+    assert statuses == [200, 200, 429, 429]
+
+
+def test_disabled_limiter_lets_everything_through(make_app, limited):
+    limited.setenv('RATE_LIMIT_ENABLED', 'False')
+    client = make_app().test_client()
+
+    statuses = {client.post('/submit', data=brief(number)).status_code for number in range(4)}
+
+    assert statuses == {200}
+
+
+def test_memory_buckets_evict_the_least_recent_key():
+    buckets = MemoryTokenBuckets(rate=1 / 3600, burst=1, max_keys=2)
+    buckets.take('a')
+    buckets.take('b')
+    buckets.take('c')
+
+    assert buckets.take('a') == 0
+    assert buckets.take('c') > 0
@@ -0,0 +1,80 @@
+from werkzeug.datastructures import MultiDict
+
+from creative_brief.schema import ACKNOWLEDGEMENT_ERROR, FIELD_NAMES, parse_form
+
+VALID = {
+    'fullName': 'Ada Lovelace',
+    'email': 'ada@example.com',
+    'projectTitle': 'Analytical Engine launch',
+    'projectType': 'Branding',
+    'projectDescription': 'A brand for the engine.',
+    'keyObjectives': 'Awareness',
+    'targetAudience': 'Mathematicians',
+    'mainMessage': 'It computes.',
+    'deliverables': 'Logo, guidelines',
+    'acknowledgement': 'on',
+}
+
+
+def form(**changes):
+    return MultiDict(dict(VALID, **changes))
+
+
+def test_valid_form_is_collected_in_field_order():
+    form_data, errors = parse_form(form(fullName='  Ada Lovelace \n', startDate='2026-01-05'))
+
+    assert errors == {}
+    assert tuple(form_data) == FIELD_NAMES
+    assert form_data['fullName'] == 'Ada Lovelace'
+    assert form_data['startDate'] == '2026-01-05'
+    assert form_data['companyName'] == ''
+
+
+def test_missing_required_fields_and_acknowledgement():
+    _, errors = parse_form(MultiDict({'fullName': '   '}))
+
+    assert errors['fullName'] == 'Full Name is required'
+    assert errors['projectType'] == 'Project Type is required'
+    assert errors['acknowledgement'] == ACKNOWLEDGEMENT_ERROR
+    assert 'companyName' not in errors
+
+
+def test_invalid_email():
+    _, errors = parse_form(form(email='ada@'))
+
+    assert list(errors) == ['email']
+
+
+def test_max_length_counts_crlf_as_one_character():
+    _, errors = parse_form(form(projectDescription='x\r\n' * 500, keyObjectives='x' * 1001))
+
+    assert list(errors) == ['keyObjectives']
+    assert errors['keyObjectives'] == 'Key Objectives must be at most 1000 characters'
+
+
+def test_choices_are_enforced():
+    _, errors = parse_form(form(projectType='Sculpture', budget='$25,000+'))
+
+    assert list(errors) == ['projectType']
+    assert errors['projectType'].startswith('Type of Project must be one of: Branding, Website')
+
+
+def test_dates_must_parse_and_be_in_order():
+    _, errors = parse_form(form(startDate='2026-02-30', deadline='2026-01-01'))
+    assert errors == {'startDate': 'Ideal Start Date must be a date (YYYY-MM-DD)'}
+
+    _, errors = parse_form(form(startDate='2026-03-01', deadline='2026-02-01'))
+    assert errors == {'deadline': 'Ideal Completion Date must not be before Ideal Start Date'}
+
+    _, errors = parse_form(form(startDate='2026-03-01', deadline='2026-03-01'))
+    assert errors == {}
+
+
+def test_submit_returns_errors_per_field(make_app):
+    client = make_app().test_client()
+
+    response = client.post('/submit', data=dict(VALID, email='not-an-email', acknowledgement=''))
+
+    body = response.get_json()
+    assert body['success'] is False
+    assert set(body['errors']) == {'email', 'acknowledgement'}
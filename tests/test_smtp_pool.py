@@ -0,0 +1,122 @@
+import asyncio
+import email
+import os
+import socket
+import time
+
+import pytest
+
+from benchmarks.smtp_sink import SMTPSink
+from creative_brief.delivery import build_message
+from creative_brief.smtp_pool import SMTPConnectionPool
+
+
+@pytest.fixture
+def sink():
+    server = SMTPSink(keep=True).start()
+    yield server
+    server.stop()
+
+
+def make_pool(sink, **kwargs):
+    return SMTPConnectionPool('127.0.0.1', sink.port, 'user', 'secret', use_tls=False, timeout=5, **kwargs)
+
+
+def message(number):
+    return build_message('noreply@example.com', 'client@example.com', f"Message {number}", '<p>Hi</p>')
+
+
+def test_session_is_reused_across_sends(sink):
+    pool = make_pool(sink)
+
+    for number in range(5):
+        pool.send_message(message(number))
+
+    assert sink.messages == 5
+    assert sink.connections == 1
+    assert sink.logins == 1
+    pool.close()
+
+
+def test_idle_session_checked_with_noop_and_replaced_once_dropped(sink):
+    pool = make_pool(sink, noop_after=0.0)
+    pool.send_message(message(1))
+    pool.send_message(message(2))
+    assert sink.noops == 1 and sink.connections == 1
+
+    sink.drop_connections()
+    pool.send_message(message(3))
+
+    assert sink.connections == 2
+    assert sink.messages == 3
+    pool.close()
+
+
+def test_dropped_session_is_reconnected_once_without_noop(sink):
+    pool = make_pool(sink, noop_after=60.0)
+    pool.send_message(message(1))
+
+    sink.drop_connections()
+    pool.send_message(message(2))
+
+    assert sink.noops == 0
+    assert sink.connections == 2
+    assert sink.messages == 2
+    pool.close()
+
+
+def test_session_retired_after_idle_timeout(sink):
+    pool = make_pool(sink, idle_timeout=0.05)
+    pool.send_message(message(1))
+    time.sleep(0.1)
+    pool.send_message(message(2))
+
+    assert sink.connections == 2
+    assert sink.noops == 0
+    pool.close()
+
+
+def test_session_retired_after_max_messages(sink):
+    pool = make_pool(sink, max_messages=2)
+
+    for number in range(5):
+        pool.send_message(message(number))
+
+    assert sink.messages == 5
+    assert sink.connections == 3
+    pool.close()
+
+
+def test_streamed_message_arrives_byte_exact(sink, tmp_path):
+    html_body = 'first line\n.\n..two dots\n.leading dot\nlast line'
+    payload = os.urandom(200 * 1024) + b'\n.\r\n.trailing'
+    path = tmp_path / 'reference.bin'
+    path.write_bytes(payload)
+    pool = make_pool(sink)
+
+    pool.send_message(build_message('noreply@example.com', 'client@example.com', 'Streamed', html_body,
+                                    [(str(path), 'reference.bin', 'application/octet-stream')]))
+
+    received = email.message_from_bytes(sink.received[0])
+    html_part, attachment = [part for part in received.walk() if not part.is_multipart()]
+    assert html_part.get_payload(decode=True).replace(b'\r\n', b'\n') == html_body.encode()
+    assert attachment.get_filename() == 'reference.bin'
+    assert attachment.get_payload(decode=True) == payload
+    assert received['Subject'] == 'Streamed'
+    pool.close()
+
+
+def test_async_pool_times_out_on_a_server_that_never_greets():
+    from creative_brief.async_smtp import AsyncSMTPPool
+
+    silent = socket.socket()
+    silent.bind(('127.0.0.1', 0))
+    # Connections complete in the backlog but nobody ever answers them
+    silent.listen(1)
+    pool = AsyncSMTPPool('127.0.0.1', silent.getsockname()[1], 'user', 'secret', use_tls=False, timeout=0.2)
+
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(pool.send_message(message(1)), 5))
+    assert time.monotonic() - started < 2
+    silent.close()
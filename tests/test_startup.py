@@ -0,0 +1,48 @@
+"""Cold start of ``app_production``, each import in a fresh interpreter.
+
+``benchmarks/bench_import_time.py`` breaks the time down; this guards
+against heavy modules creeping back into the import path, and against the
+import getting much slower: a plain checkout takes 0.25-0.3s, so doubling it
+goes over the budget.
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use, never by importing the app
+LAZY_MODULES = ('smtplib', 'asyncio', 'cProfile', 'email.mime.multipart', 'email.mime.text',
+                'email_validator', 'dotenv', 'creative_brief.smtp_pool', 'creative_brief.async_smtp')
+
+BUDGET_SECONDS = 0.5
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import app_production
+print(json.dumps({'seconds': time.perf_counter() - start, 'modules': sorted(sys.modules)}))
+"""
+
+
+def cold_import(tmp_path):
+    # No .env file: python-dotenv must not be imported either
+    env = dict(os.environ, ENV_FILE=str(tmp_path / 'missing.env'))
+    result = subprocess.run([sys.executable, '-c', SCRIPT], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_import_leaves_lazy_modules_alone(tmp_path):
+    modules = set(cold_import(tmp_path)['modules'])
+
+    assert [name for name in LAZY_MODULES if name in modules] == []
+
+
+def test_import_time_within_budget(tmp_path):
+    # Best of three, so one slow run on a busy CI machine does not fail the build
+    seconds = min(cold_import(tmp_path)['seconds'] for _ in range(3))
+
+    assert seconds < BUDGET_SECONDS
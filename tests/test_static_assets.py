@@ -0,0 +1,27 @@
+import re
+
+
+def test_fingerprinted_asset_is_cached_forever(make_app):
+    client = make_app().test_client()
+    page = client.get('/').get_data(as_text=True)
+    (css,) = re.findall(r'"(styles\.[0-9a-f]{12}\.css)"', page)
+
+    response = client.get(f"/{css}")
+
+    assert response.status_code == 200
+    assert 'immutable' in response.headers['Cache-Control']
+    assert response.get_data() == client.get('/styles.css').get_data()
+
+
+def test_unknown_fingerprint_is_not_found(make_app):
+    client = make_app().test_client()
+
+    assert client.get('/styles.000000000000.css').status_code == 404
+    assert client.get('/missing.txt').status_code == 404
+
+
+def test_other_routes_are_not_shadowed(make_app):
+    client = make_app().test_client()
+
+    assert client.get('/submit').status_code == 405
+    assert client.get('/metrics').status_code == 200